@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+
+import contextlib
+import copy
+import functools
+import glob
+import os
+import re
+import shutil
+import time
+import typing
+
+
+# Results of the host probes while cached_probes is active
+_probe_cache: typing.Optional[typing.Dict[str, typing.Any]] = None
+
+
+@contextlib.contextmanager
+def cached_probes():
+    """Within the context, the static host probes (online CPUs and the cgroup
+    limits) are only read once, e.g. for a batch of runs in one process. The
+    counters, such as the OOM kills, are always read live."""
+    global _probe_cache
+    _probe_cache = {}
+    try:
+        yield
+    finally:
+        _probe_cache = None
+
+
+def cached_probe(probe: typing.Callable[[], typing.Any]):
+    @functools.wraps(probe)
+    def cached():
+        if _probe_cache is None:
+            return probe()
+        if probe.__name__ not in _probe_cache:
+            _probe_cache[probe.__name__] = probe()
+        return copy.copy(_probe_cache[probe.__name__])
+
+    return cached
+
+
+def parse_cpu_list(cpu_list: str) -> typing.List[int]:
+    """Expand a CPU list such as "0,2-3,6", as used by taskset and sysfs."""
+    cpus = []
+    for group in cpu_list.strip().split(","):
+        if not group:
+            continue
+        first, _, last = group.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def format_cpu_list(cpus: typing.Iterable[int]) -> str:
+    """Compress CPU numbers into a CPU list such as "0,2-3,6"."""
+    groups = []
+    for cpu in sorted(set(cpus)):
+        if groups and groups[-1][1] == cpu - 1:
+            groups[-1][1] = cpu
+        else:
+            groups.append([cpu, cpu])
+    return ",".join(
+        str(first) if first == last else f"{first}-{last}" for first, last in groups
+    )
+
+
+@cached_probe
+def online_cpus() -> typing.List[int]:
+    try:
+        with open("/sys/devices/system/cpu/online", "r") as online:
+            return parse_cpu_list(online.read())
+    except OSError:
+        return list(range(os.cpu_count() or 1))
+
+
+def meminfo() -> typing.Dict[str, int]:
+    """Return the /proc/meminfo values, converted to bytes where they have a
+    unit."""
+    info = {}
+    with open("/proc/meminfo", "r") as proc_meminfo:
+        for line in proc_meminfo:
+            key, _, value = line.partition(":")
+            fields = value.split()
+            if not fields:
+                continue
+            multiplier = 1024 if len(fields) > 1 and fields[1] == "kB" else 1
+            info[key] = int(fields[0]) * multiplier
+    return info
+
+
+def disk_usage(path: str):
+    return shutil.disk_usage(path)
+
+
+def proc_stat() -> typing.Dict[str, int]:
+    """Return the system-wide counters of /proc/stat, such as ctxt, processes
+    and procs_running; for intr and softirq, the total."""
+    values = {}
+    with open("/proc/stat", "r") as stat:
+        for line in stat:
+            fields = line.split()
+            if len(fields) > 1 and not fields[0].startswith("cpu"):
+                values[fields[0]] = int(fields[1])
+    return values
+
+
+def cpu_busy_fraction(interval: float) -> float:
+    """Return the fraction of CPU time in use on all CPUs over the interval,
+    from the aggregate cpu line of /proc/stat."""
+
+    def cpu_times() -> typing.Tuple[int, int]:
+        with open("/proc/stat", "r") as stat:
+            times = [int(t) for t in stat.readline().split()[1:]]
+        # idle and iowait
+        idle = sum(times[3:5])
+        return sum(times) - idle, sum(times)
+
+    busy_before, total_before = cpu_times()
+    time.sleep(interval)
+    busy, total = cpu_times()
+    return (busy - busy_before) / max(total - total_before, 1)
+
+
+def package_temperature() -> typing.Optional[float]:
+    """Return the hottest CPU package temperature in degrees Celsius from the
+    thermal zones, or of any thermal zone if none is a package sensor; None if
+    there are no thermal zones."""
+    package, other = [], []
+    for zone in glob.glob("/sys/class/thermal/thermal_zone*"):
+        try:
+            with open(os.path.join(zone, "type"), "r") as zone_type:
+                sensor = zone_type.read().strip()
+            with open(os.path.join(zone, "temp"), "r") as zone_temp:
+                temperature = int(zone_temp.read()) / 1000
+        except (OSError, ValueError):
+            continue
+        (package if "pkg" in sensor else other).append(temperature)
+    temperatures = package or other
+    return max(temperatures) if temperatures else None
+
+
+def cpu_frequency() -> typing.Optional[float]:
+    """Return the average current frequency of the CPUs in MHz, from cpufreq or
+    else /proc/cpuinfo; None if neither reports it."""
+    frequencies = []
+    for path in glob.glob("/sys/devices/system/cpu/cpu*/cpufreq/scaling_cur_freq"):
+        try:
+            with open(path, "r") as frequency:
+                frequencies.append(int(frequency.read()) / 1000)
+        except (OSError, ValueError):
+            continue
+    if not frequencies:
+        try:
+            with open("/proc/cpuinfo", "r") as cpuinfo:
+                for line in cpuinfo:
+                    key, _, value = line.partition(":")
+                    if key.strip() == "cpu MHz":
+                        frequencies.append(float(value))
+        except (OSError, ValueError):
+            pass
+    return sum(frequencies) / len(frequencies) if frequencies else None
+
+
+def read_setting(path: str) -> str:
+    """Return the value of a sysfs or procfs setting; for settings listing the
+    choices with the current one in brackets (e.g. "always [madvise] never"),
+    only the current one."""
+    with open(path, "r") as setting:
+        value = setting.read().strip()
+    selected = re.search(r"\[([^]]*)\]", value)
+    return selected.group(1) if selected else value
+
+
+def write_setting(path: str, value: str):
+    with open(path, "w") as setting:
+        setting.write(value)
+
+
+def per_cpu_counters(path: str) -> typing.Dict[str, typing.List[int]]:
+    """Return the per-CPU counts of each line of /proc/interrupts or
+    /proc/softirqs, keyed by the IRQ (with its description, if any) or the
+    softirq type. Lines without per-CPU counts, such as ERR, are left out."""
+    counters = {}
+    with open(path, "r") as counters_file:
+        cpus = len(counters_file.readline().split())
+        for line in counters_file:
+            name, _, values = line.partition(":")
+            fields = values.split()
+            counts = fields[:cpus]
+            if len(counts) < cpus or not all(c.isdigit() for c in counts):
+                continue
+            name = name.strip()
+            if name.isdigit() and len(fields) > cpus:
+                name = " ".join([name] + fields[cpus:])
+            counters[name] = [int(c) for c in counts]
+    return counters
+
+
+def process_stat(pid: int) -> typing.List[str]:
+    """Return the fields of /proc/<pid>/stat, starting with the state (the
+    third field), as the command name before it may contain spaces."""
+    with open(f"/proc/{pid}/stat", "r") as stat:
+        return stat.read().rpartition(")")[2].split()
+
+
+def process_counters(pid: int) -> typing.Optional[typing.Dict[str, typing.Any]]:
+    """Return the name and the cumulative context switch, page fault and I/O
+    counters of a process, or None if it is gone. The I/O counters are missing
+    if /proc/<pid>/io is not accessible."""
+    try:
+        stat = process_stat(pid)
+        status = process_status(pid)
+        counters = {
+            "name": status["Name"],
+            "voluntary_ctxt_switches": int(status["voluntary_ctxt_switches"]),
+            "nonvoluntary_ctxt_switches": int(status["nonvoluntary_ctxt_switches"]),
+            "minflt": int(stat[7]),
+            "majflt": int(stat[9]),
+        }
+    except (OSError, KeyError, IndexError):
+        return None
+    io = read_proc(pid, "io")
+    for line in (io or "").splitlines():
+        key, _, value = line.partition(":")
+        if key in ("syscr", "syscw", "read_bytes", "write_bytes"):
+            counters[key] = int(value)
+    return counters
+
+
+def process_group(pgid: int) -> typing.List[int]:
+    """Return the live (non-zombie) processes of a process group."""
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            stat = process_stat(int(entry))
+        except OSError:
+            continue
+        if int(stat[2]) == pgid and stat[0] != "Z":
+            pids.append(int(entry))
+    return pids
+
+
+def process_status(pid: int) -> typing.Dict[str, str]:
+    status = {}
+    try:
+        with open(f"/proc/{pid}/status", "r") as proc_status:
+            for line in proc_status:
+                key, _, value = line.partition(":")
+                status[key] = value.strip()
+    except OSError:
+        pass
+    return status
+
+
+def read_proc(pid: int, name: str) -> typing.Optional[str]:
+    """Return the contents of /proc/<pid>/<name>, or None if it is not readable
+    (e.g. the stack without CAP_SYS_ADMIN)."""
+    try:
+        with open(f"/proc/{pid}/{name}", "r") as proc_file:
+            return proc_file.read()
+    except OSError:
+        return None
+
+
+def cgroup_root() -> str:
+    """Return the mount point of the cgroup v2 hierarchy, which is a
+    subdirectory on hosts with the hybrid v1/v2 layout."""
+    if os.path.isdir("/sys/fs/cgroup/unified"):
+        return "/sys/fs/cgroup/unified"
+    return "/sys/fs/cgroup"
+
+
+@cached_probe
+def cgroup_path() -> typing.Optional[str]:
+    """Return the cgroup v2 directory of this process, or None without cgroup
+    v2."""
+    try:
+        with open("/proc/self/cgroup", "r") as proc_cgroup:
+            for line in proc_cgroup:
+                hierarchy, _, path = line.strip().split(":", 2)
+                if hierarchy == "0":
+                    return os.path.join(cgroup_root(), path.lstrip("/"))
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def read_keyed_values(path: str) -> typing.Dict[str, int]:
+    """Read a file of "key value" lines, such as /proc/vmstat or cgroup
+    memory.events."""
+    values = {}
+    with open(path, "r") as keyed_file:
+        for line in keyed_file:
+            fields = line.split()
+            if len(fields) == 2 and fields[1].lstrip("-").isdigit():
+                values[fields[0]] = int(fields[1])
+    return values
+
+
+def oom_kill_count() -> typing.Optional[int]:
+    """Return the number of OOM kills in this process' cgroup or, failing that,
+    on the whole system; None if neither is available."""
+    cgroup = cgroup_path()
+    paths = [os.path.join(cgroup, "memory.events")] if cgroup else []
+    paths.append("/proc/vmstat")
+    for path in paths:
+        try:
+            values = read_keyed_values(path)
+        except OSError:
+            continue
+        if "oom_kill" in values:
+            return values["oom_kill"]
+    return None
+
+
+def _cgroup_file(cgroup: str, name: str) -> typing.Optional[str]:
+    try:
+        with open(os.path.join(cgroup, name), "r") as cgroup_file:
+            return cgroup_file.read().strip()
+    except OSError:
+        return None
+
+
+@cached_probe
+def cgroup_cpu_quota() -> typing.Optional[float]:
+    """Return the number of CPUs the cgroup v2 cpu.max quotas of this process'
+    cgroup and its ancestors allow, or None if unlimited."""
+    root = cgroup_root()
+    cgroup = cgroup_path()
+    quota = None
+    while cgroup and cgroup.startswith(root):
+        cpu_max = _cgroup_file(cgroup, "cpu.max")
+        if cpu_max and not cpu_max.startswith("max"):
+            limit, period = cpu_max.split()
+            cpus = int(limit) / int(period)
+            quota = cpus if quota is None else min(quota, cpus)
+        if cgroup.rstrip("/") == root:
+            break
+        cgroup = os.path.dirname(cgroup.rstrip("/"))
+    return quota
+
+
+@cached_probe
+def cgroup_cpuset() -> typing.Optional[typing.List[int]]:
+    """Return the CPUs of the effective cgroup v2 cpuset of this process."""
+    cgroup = cgroup_path()
+    cpus = _cgroup_file(cgroup, "cpuset.cpus.effective") if cgroup else None
+    return parse_cpu_list(cpus) if cpus else None
+
+
+def cgroup_cpu_stat() -> typing.Dict[str, int]:
+    """Return the cgroup v2 cpu.stat values of this process' cgroup, such as
+    nr_throttled and throttled_usec; empty without cgroup v2."""
+    cgroup = cgroup_path()
+    try:
+        return read_keyed_values(os.path.join(cgroup, "cpu.stat")) if cgroup else {}
+    except OSError:
+        return {}
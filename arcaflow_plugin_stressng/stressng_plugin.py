@@ -1,23 +1,1434 @@
 #!/usr/bin/env python3
 
+import concurrent.futures
+import contextlib
+import copy
+import csv
+import dataclasses
+import functools
+import glob
+import itertools
+import math
+import operator
+import random
+import re
+import shutil
+import signal
+import sqlite3
+import statistics
 import sys
+import threading
+import time
 import typing
 import tempfile
 import subprocess
 import os
 import yaml
 
+import stressng_host
+import stressng_stats
+import stressng_store
 from arcaflow_plugin_sdk import plugin
 from stressng_schema import (
+    ExportFormat,
+    HddOpts,
     Stressors,
+    StressorState,
+    StressorStatus,
     StressNGParams,
     WorkloadResults,
     WorkloadError,
+    PlanResults,
+    StressNGBinary,
+    MethodBreakdownParams,
+    MethodBreakdownEntry,
+    MethodBreakdownResults,
+    LoadProfileParams,
+    LoadProfileResults,
+    LoadProfileSegment,
+    LoadShape,
+    InterferenceParams,
+    InterferenceResults,
+    InterferenceRow,
+    BatchEntry,
+    BatchParams,
+    BatchResults,
+    MetricSummary,
+    TunableCombination,
+    TunableComparison,
+    TunablesParams,
+    TunablesResults,
+    ChangePoint,
+    ChangePointParams,
+    ChangePointResults,
+    ChangePointSeries,
+    TrendPoint,
+    TrendQueryParams,
+    TrendResults,
+    SearchKnob,
+    SearchParams,
+    SearchProbe,
+    SearchResults,
+    ProcessAccounting,
+    ProcessDiagnostics,
+    PacingResult,
+    SystemActivity,
+    HostSetting,
+    HygieneReport,
+    SettleConditions,
+    SettleParams,
+    SettleReport,
+    ResourceBudget,
+    ResourceFootprint,
+    ResourcePolicy,
+    CommonOutput,
+    CpuBudget,
+    WorkerPolicy,
     system_info_output_schema,
+    common_output_schema,
+    jobfile_value,
     stressor_schemas,
 )
 
 
+# Use the libyaml-backed loader when PyYAML has been built with it, as it is
+# considerably faster than the pure-Python one.
+yaml_loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Only these top-level sections of the stress-ng YAML output are used by the
+# plugin; the rest is skipped without being parsed.
+yaml_sections = ("system-info", "metrics")
+yaml_section_pattern = re.compile(r"^(?=[^\s#.-])", re.MULTILINE)
+
+
+def load_stressng_yaml(output: str) -> typing.Dict[str, typing.Any]:
+    """Parse the system-info and metrics sections of the stress-ng YAML output."""
+    sections = [
+        section
+        for section in yaml_section_pattern.split(output)
+        if section.partition(":")[0] in yaml_sections
+    ]
+    return yaml.load("".join(sections), Loader=yaml_loader) or {}
+
+
+# Columns of the exported results, in a stable order: the system info fields
+# followed by the scalar fields every stressor output has in common, each named
+# by its schema id.
+export_columns = list(system_info_output_schema.properties) + [
+    column for column in common_output_schema.properties if column != "extra-metrics"
+]
+
+
+def export_results(
+    system_info: typing.Dict[str, typing.Any],
+    metrics: typing.List[typing.Dict[str, typing.Any]],
+    workdir: str,
+    export_format: ExportFormat,
+) -> str:
+    """Write one row per stressor with the system info and the common stressor
+    output fields to a file in the workdir and return its path. The file is
+    created anew, with a counter appended to its name if runs started in the
+    same second already exported theirs."""
+    name = f"stressng-results-{system_info['hostname']}-{system_info['epoch-secs']}"
+    for attempt in itertools.count():
+        suffix = f"-{attempt}" if attempt else ""
+        path = os.path.join(workdir, f"{name}{suffix}.{export_format.value}")
+        try:
+            export_file = open(path, "x", newline="")
+        except FileExistsError:
+            continue
+        break
+    with export_file:
+        writer = csv.DictWriter(
+            export_file, fieldnames=export_columns, extrasaction="ignore"
+        )
+        writer.writeheader()
+        writer.writerows({**system_info, **metric} for metric in metrics)
+    return path
+
+
+# The stress-ng executable, which can be substituted, e.g. by a build of its
+# own or the stand-in of the tests
+stressng_binary = os.environ.get("STRESSNG_BINARY", "/usr/bin/stress-ng")
+
+# Seconds a capability probe of the stress-ng executable may take
+probe_timeout = 10
+
+version_pattern = re.compile(r"version (\S+)")
+help_option_pattern = re.compile(r"--([a-z0-9][a-z0-9-]*)")
+
+
+@functools.lru_cache(maxsize=None)
+def _probe_binary(
+    binary: str, modified: float, *args: str
+) -> typing.Tuple[typing.Optional[int], str]:
+    try:
+        probe = subprocess.run(
+            [binary, *args],
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            timeout=probe_timeout,
+        )
+    except (EnvironmentError, subprocess.TimeoutExpired):
+        return None, ""
+    return probe.returncode, probe.stdout
+
+
+def probe_binary(binary: str, *args: str) -> typing.Tuple[typing.Optional[int], str]:
+    """Return the return code (None if it could not be run) and the console
+    output of the stress-ng executable run with the arguments. The result is
+    cached until the executable is replaced."""
+    try:
+        modified = os.stat(binary).st_mtime
+    except OSError:
+        return None, ""
+    return _probe_binary(binary, modified, *args)
+
+
+def binary_version(binary: str) -> typing.Optional[str]:
+    _, output = probe_binary(binary, "--version")
+    version = version_pattern.search(output)
+    return version.group(1) if version else None
+
+
+def supported_stressors(binary: str) -> typing.Optional[typing.FrozenSet[str]]:
+    """Return the stressors the stress-ng executable supports, or None if it
+    does not tell."""
+    returncode, output = probe_binary(binary, "--stressors")
+    return frozenset(output.split()) if returncode == 0 else None
+
+
+def supported_options(binary: str) -> typing.Optional[typing.FrozenSet[str]]:
+    """Return the long options listed in the --help output of the stress-ng
+    executable, or None if it does not tell."""
+    returncode, output = probe_binary(binary, "--help")
+    options = frozenset(help_option_pattern.findall(output))
+    # Not a usable listing if it lacks even the timeout
+    return options if returncode == 0 and "timeout" in options else None
+
+
+def method_choices(binary: str, option: str) -> typing.Optional[typing.FrozenSet[str]]:
+    """Return the methods the stress-ng executable accepts for a method option
+    such as cpu-method, or None if it does not tell."""
+    _, output = probe_binary(binary, f"--{option}", "which")
+    _, listed, choices = output.partition("one of:")
+    return frozenset(choices.split()) if listed else None
+
+
+def unsupported_stressors(params: StressNGParams, binary: str) -> typing.List[str]:
+    """Return a problem for each stressor the stress-ng executable lacks."""
+    stressors = supported_stressors(binary)
+    if stressors is None:
+        return []
+    return [
+        f"{binary} (version {binary_version(binary)}) does not support the "
+        f"{jobfile_value(s.stressor)} stressor"
+        for s in params.stressors
+        if jobfile_value(s.stressor) not in stressors
+    ]
+
+
+def unsupported_methods(params: StressNGParams, binary: str) -> typing.List[str]:
+    """Return a problem for each stressor method the stress-ng executable does
+    not accept. Running another method than the chosen one would measure
+    something else, so these are not left out like the other options."""
+    options = supported_options(binary)
+    problems = []
+    for line in params.jobfile_lines():
+        option, _, value = line.partition(" ")
+        if not option.endswith("-method"):
+            continue
+        if options is not None and option not in options:
+            continue
+        choices = method_choices(binary, option)
+        if choices is not None and value not in choices:
+            problems.append(
+                f"{binary} (version {binary_version(binary)}) does not support the "
+                f"{value} method of the {option.rsplit('-', 1)[0]} stressor"
+            )
+    return problems
+
+
+def render_supported_jobfile(
+    params: StressNGParams, binary: str
+) -> typing.Tuple[str, typing.List[str]]:
+    """Render the jobfile with only the options the stress-ng executable
+    supports, and return it with the lines which were left out. Whatever the
+    executable does not tell about is rendered as is."""
+    options = supported_options(binary)
+    lines, unsupported = [], []
+    for line in params.jobfile_lines():
+        option = line.partition(" ")[0]
+        supported = (
+            options is None
+            or option in options
+            or option in Stressors.__members__.values()
+        )
+        (lines if supported else unsupported).append(line)
+    return "\n".join(lines) + "\n", unsupported
+
+
+def binary_info(binary: str, unsupported: typing.List[str]) -> StressNGBinary:
+    return StressNGBinary(
+        path=os.path.realpath(binary),
+        version=binary_version(binary),
+        unsupported_options=unsupported or None,
+    )
+
+
+# Seconds to wait for the stress-ng process group to exit after each
+# termination signal before escalating to the next one
+signal_escalation_delay = 5
+
+# Seconds between the calls of the monitors of a running stress-ng
+monitor_interval = 0.5
+
+# Directory for the control files when memfd is not available; a tmpfs, so
+# that their I/O does not compete with the stressors on the working directory.
+control_file_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+class ControlFile:
+    """A bookkeeping file of the plugin, such as the jobfile or the stress-ng
+    YAML output, kept in memory-backed storage rather than on the device under
+    test, and always removed when the context exits.
+
+    It is an anonymous memfd where available, which stress-ng opens through
+    the /proc/self/fd path of the file descriptor it inherits; pass ``fd`` in
+    ``pass_fds`` to the stress-ng process."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.fd = -1
+        self.path = ""
+
+    def __enter__(self) -> "ControlFile":
+        try:
+            self.fd = os.memfd_create(f"stressng-{self.name}")
+            self.path = f"/proc/self/fd/{self.fd}"
+        except (AttributeError, OSError):
+            self.fd, self.path = tempfile.mkstemp(
+                prefix=f"stressng-{self.name}-", dir=control_file_dir
+            )
+        return self
+
+    def __exit__(self, *args):
+        os.close(self.fd)
+        if not self.path.startswith("/proc/"):
+            os.remove(self.path)
+
+    def write(self, text: str):
+        with open(self.fd, "w", closefd=False) as control_file:
+            control_file.seek(0)
+            control_file.truncate()
+            control_file.write(text)
+
+    def read(self) -> str:
+        with open(self.fd, "r", closefd=False) as control_file:
+            control_file.seek(0)
+            return control_file.read()
+
+
+class HostSettings:
+    """Context manager changing sysfs and procfs settings, which records the
+    original values and restores them in reverse order on exit, also when the
+    run failed. Settings which cannot be changed, e.g. without privileges, are
+    recorded with the error and otherwise skipped."""
+
+    def __init__(self):
+        self.settings: typing.List[HostSetting] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        for setting in reversed(self.settings):
+            if setting.original is None or setting.error:
+                continue
+            try:
+                stressng_host.write_setting(setting.path, setting.original)
+                setting.restored = True
+            except OSError as error:
+                setting.error = f"{error} while restoring it"
+        return False
+
+    def apply(self, path: str, value: str):
+        setting = HostSetting(path=path, value=value)
+        self.settings.append(setting)
+        try:
+            setting.original = stressng_host.read_setting(path)
+            if setting.original != value:
+                stressng_host.write_setting(path, value)
+        except OSError as error:
+            setting.error = str(error)
+
+
+# The sysfs and procfs files of the hygiene settings
+governor_files = "/sys/devices/system/cpu/cpu*/cpufreq/scaling_governor"
+randomize_va_space_file = "/proc/sys/kernel/randomize_va_space"
+thp_defrag_file = "/sys/kernel/mm/transparent_hugepage/defrag"
+drop_caches_file = "/proc/sys/vm/drop_caches"
+
+# Stressors whose results depend on the state of the page cache
+io_stressors = {Stressors.HDD, Stressors.IOMIX}
+
+
+def apply_hygiene(params: StressNGParams, settings: HostSettings) -> HygieneReport:
+    """Tune the host for a low-noise run and wait for it to become idle."""
+    hygiene = params.hygiene
+    if hygiene.governor:
+        for path in sorted(glob.glob(governor_files)):
+            settings.apply(path, hygiene.governor)
+    if hygiene.disable_aslr:
+        settings.apply(randomize_va_space_file, "0")
+    if hygiene.disable_thp_defrag:
+        settings.apply(thp_defrag_file, "never")
+    report = HygieneReport(settings=settings.settings)
+
+    if hygiene.drop_caches and any(
+        s.stressor in io_stressors for s in params.stressors
+    ):
+        os.sync()
+        try:
+            stressng_host.write_setting(drop_caches_file, "3")
+            report.caches_dropped = True
+        except OSError as error:
+            print(f"==>> WARNING: {error} while dropping the caches")
+
+    if hygiene.idle_timeout:
+        print("==>> Waiting for the host to become idle...")
+        start = time.monotonic()
+        report.idle = False
+        while time.monotonic() - start < hygiene.idle_timeout:
+            if stressng_host.cpu_busy_fraction(1) * 100 < hygiene.idle_threshold:
+                report.idle = True
+                break
+        report.idle_wait = round(time.monotonic() - start, 1)
+        if not report.idle:
+            print(
+                f"==>> WARNING: the host did not become idle within "
+                f"{hygiene.idle_timeout} seconds"
+            )
+    return report
+
+
+def settle_conditions() -> SettleConditions:
+    return SettleConditions(
+        package_temperature=stressng_host.package_temperature(),
+        cpu_frequency=stressng_host.cpu_frequency(),
+        load_average=os.getloadavg()[0],
+    )
+
+
+def is_settled(
+    conditions: SettleConditions, baseline: SettleConditions, settle: SettleParams
+) -> bool:
+    """Check the conditions against the baseline; conditions which cannot be
+    measured do not hold the run back."""
+    if None not in (conditions.package_temperature, baseline.package_temperature):
+        if (
+            conditions.package_temperature
+            > baseline.package_temperature + settle.temperature_tolerance
+        ):
+            return False
+    if None not in (conditions.cpu_frequency, baseline.cpu_frequency):
+        deviation = abs(conditions.cpu_frequency - baseline.cpu_frequency)
+        if deviation > baseline.cpu_frequency * settle.frequency_tolerance / 100:
+            return False
+    if None not in (conditions.load_average, baseline.load_average):
+        if conditions.load_average > baseline.load_average + settle.load_tolerance:
+            return False
+    return True
+
+
+def idle_baseline(settle: SettleParams) -> SettleConditions:
+    """Return the baseline of the settle gate: the given one, or else an
+    absolute idle host at the idle temperature with no load. A baseline
+    measured by the plugin itself would be taken on a host still hot from the
+    previous step, and the frequency of an idle host depends on its governor,
+    so the absolute baseline leaves the frequency unchecked."""
+    if settle.baseline is not None:
+        return settle.baseline
+    return SettleConditions(
+        package_temperature=settle.idle_temperature, load_average=0.0
+    )
+
+
+def settle_host(settle: SettleParams) -> SettleReport:
+    """Wait until the host is back within the tolerances of the baseline, or
+    for the maximum wait."""
+    baseline = idle_baseline(settle)
+    start = time.monotonic()
+    conditions = settle_conditions()
+    settled = is_settled(conditions, baseline, settle)
+    if not settled:
+        print("==>> Waiting for the host to settle...")
+    while not settled and time.monotonic() - start < settle.max_wait:
+        time.sleep(settle_interval)
+        conditions = settle_conditions()
+        settled = is_settled(conditions, baseline, settle)
+    if not settled:
+        print(
+            f"==>> WARNING: the host did not settle within {settle.max_wait} "
+            f"seconds: {conditions}, baseline {baseline}"
+        )
+    return SettleReport(
+        settled=settled,
+        waited=round(time.monotonic() - start, 1),
+        baseline=baseline,
+        start=conditions,
+    )
+
+
+# Seconds between the checks of the settle gate
+settle_interval = 1
+
+
+def remove_stressng_leftovers(workdir: str):
+    """Remove the temporary directories stress-ng failed to clean up, e.g.
+    because it was killed, from the working directory."""
+    for leftover in glob.glob(os.path.join(workdir, "tmp-stress-ng-*")):
+        shutil.rmtree(leftover, ignore_errors=True)
+
+
+size_multipliers = {"k": 1 << 10, "m": 1 << 20, "g": 1 << 30, "t": 1 << 40}
+
+# The per-worker size parameter of each stressor that allocates memory or
+# writes to disk, stress-ng's default for it, and the resource it consumes.
+sized_stressors = {
+    Stressors.VM: ("vm_bytes", "256M", "memory"),
+    Stressors.MMAP: ("mmap_bytes", "256M", "memory"),
+    Stressors.HDD: ("hdd_bytes", "1G", "disk"),
+    Stressors.IOMIX: ("iomix_bytes", "1G", "disk"),
+}
+
+memory_stressors = {
+    stressor for stressor, sized in sized_stressors.items() if sized[2] == "memory"
+}
+
+# hdd-opts which select mutually exclusive behaviors in stress-ng
+exclusive_hdd_opts = (
+    {HddOpts.RD_RND, HddOpts.RD_SEQ},
+    {HddOpts.WR_RND, HddOpts.WR_SEQ},
+    {opt for opt in HddOpts if opt.value.startswith("fadv-")},
+)
+
+
+def parse_size(size: str, workers: int, total: int) -> int:
+    """Return the bytes demanded by all workers for a size in bytes per worker
+    (with K, M, G or T unit suffix) or in percent of the total resource, which
+    stress-ng shares among the workers."""
+    number, unit = float(size[:-1]), size[-1].lower()
+    if unit == "%":
+        return int(total * number / 100)
+    return int(number * size_multipliers[unit]) * workers
+
+
+def stressor_demands(
+    params: StressNGParams, cpus_online: int, memory_available: int, disk_free: int
+) -> typing.List[typing.Tuple[int, str, int]]:
+    """Return the index, the consumed resource and the total bytes demanded by
+    all workers of each stressor which allocates memory or writes to disk.
+    Percentages are resolved against the available memory and the free disk
+    space, the quantities the demands are checked against."""
+    demands = []
+    for index, stressor in enumerate(params.stressors):
+        if stressor.stressor not in sized_stressors:
+            continue
+        field, default, resource = sized_stressors[stressor.stressor]
+        demand = parse_size(
+            getattr(stressor, field) or default,
+            stressor.workers or cpus_online,
+            memory_available if resource == "memory" else disk_free,
+        )
+        demands.append((index, resource, demand))
+    return demands
+
+
+def estimate_footprint(
+    params: StressNGParams, cpus_online: int, memory_available: int, disk_free: int
+) -> typing.Tuple[int, int]:
+    """Return the total memory and disk bytes demanded by the stressors."""
+    demand = {"memory": 0, "disk": 0}
+    for _, resource, bytes_demanded in stressor_demands(
+        params, cpus_online, memory_available, disk_free
+    ):
+        demand[resource] += bytes_demanded
+    return demand["memory"], demand["disk"]
+
+
+def budget_problems(
+    footprint: ResourceFootprint, headroom: int, workdir: str
+) -> typing.List[str]:
+    problems = []
+    memory_budget = footprint.memory_available_bytes * headroom // 100
+    if footprint.memory_bytes > memory_budget:
+        problems.append(
+            f"the stressors allocate {footprint.memory_bytes} bytes of memory, "
+            f"but only {memory_budget} bytes ({headroom}% of the available "
+            "memory) may be used"
+        )
+    disk_budget = footprint.disk_available_bytes * headroom // 100
+    if footprint.disk_bytes > disk_budget:
+        problems.append(
+            f"the stressors write {footprint.disk_bytes} bytes to {workdir}, but "
+            f"only {disk_budget} bytes ({headroom}% of the free space) may be used"
+        )
+    return problems
+
+
+def apply_resource_policy(
+    params: StressNGParams, cpus_online: int
+) -> typing.Tuple[StressNGParams, ResourceBudget, typing.List[str]]:
+    """Check the resource footprint of the stressors against the headroom and
+    return the parameters to run with, the budget and any problems. Only the
+    scale policy changes the parameters; a scaled copy is returned then.
+
+    Memory is budgeted against MemAvailable, the memory the host can give the
+    stressors without swapping, and disk against the free space of the workdir;
+    percentage sizes are resolved against the same quantities."""
+    memory = stressng_host.meminfo()
+    disk = stressng_host.disk_usage(params.workdir)
+    demands = stressor_demands(params, cpus_online, memory["MemAvailable"], disk.free)
+    footprint = ResourceFootprint(
+        memory_bytes=sum(d for _, r, d in demands if r == "memory"),
+        memory_available_bytes=memory["MemAvailable"],
+        disk_bytes=sum(d for _, r, d in demands if r == "disk"),
+        disk_available_bytes=disk.free,
+    )
+    budget = ResourceBudget(policy=params.resource_policy, footprint=footprint)
+    problems = budget_problems(footprint, params.resource_headroom, params.workdir)
+    if not problems or params.resource_policy != ResourcePolicy.SCALE:
+        return params, budget, problems
+
+    scales = {
+        "memory": min(
+            1.0,
+            footprint.memory_available_bytes
+            * params.resource_headroom
+            / 100
+            / max(footprint.memory_bytes, 1),
+        ),
+        "disk": min(
+            1.0,
+            footprint.disk_available_bytes
+            * params.resource_headroom
+            / 100
+            / max(footprint.disk_bytes, 1),
+        ),
+    }
+    budget.memory_scale, budget.disk_scale = scales["memory"], scales["disk"]
+    params = copy.deepcopy(params)
+    for index, resource, bytes_demanded in demands:
+        if scales[resource] == 1.0:
+            continue
+        stressor = params.stressors[index]
+        per_worker = (
+            bytes_demanded * scales[resource] / (stressor.workers or cpus_online)
+        )
+        setattr(
+            stressor,
+            sized_stressors[stressor.stressor][0],
+            f"{max(int(per_worker) >> 10, 1)}K",
+        )
+    return params, budget, []
+
+
+def validate_params(
+    params: StressNGParams, cpus_online: typing.List[int]
+) -> typing.List[str]:
+    """Return the problems of the parameters which stress-ng would only fail on
+    at run time."""
+    problems = []
+    if params.taskset:
+        offline = set(stressng_host.parse_cpu_list(params.taskset)) - set(cpus_online)
+        if offline:
+            problems.append(
+                f"taskset CPUs {stressng_host.format_cpu_list(offline)} are not "
+                f"online (online CPUs: {stressng_host.format_cpu_list(cpus_online)})"
+            )
+    for stressor in params.stressors:
+        hdd_opts = set(getattr(stressor, "hdd_opts", None) or ())
+        for exclusive in exclusive_hdd_opts:
+            conflicting = sorted(opt.value for opt in hdd_opts & exclusive)
+            if len(conflicting) > 1:
+                problems.append(
+                    f"hdd-opts {', '.join(conflicting)} are mutually exclusive"
+                )
+    return problems
+
+
+def _wait_for_process_group(process: subprocess.Popen, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        process.poll()
+        if not stressng_host.process_group(process.pid):
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def terminate_process_group(process: subprocess.Popen):
+    """Stop the process group of stress-ng, escalating from SIGINT (on which
+    stress-ng stops its stressors and still writes its metrics) over SIGTERM
+    to SIGKILL while processes remain in the group."""
+    for signal_number in (signal.SIGINT, signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(process.pid, signal_number)
+        except ProcessLookupError:
+            break
+        if _wait_for_process_group(process, signal_escalation_delay):
+            break
+    try:
+        process.wait(timeout=signal_escalation_delay)
+    except subprocess.TimeoutExpired:
+        # Even SIGKILL does not end a process in uninterruptible sleep
+        pass
+
+
+def supervise_stressng(
+    command: typing.List[str],
+    workdir: str,
+    deadline: float,
+    output: ControlFile,
+    pass_fds: typing.Sequence[int],
+    monitors: typing.Sequence[typing.Callable[[int], None]] = (),
+) -> typing.Tuple[typing.Optional[int], typing.List[ProcessDiagnostics]]:
+    """Run stress-ng in a process group of its own, with its console output
+    going to the output control file, and terminate the whole group if it is
+    still running after deadline seconds. While it runs, each monitor is
+    called with the process group ID every monitor_interval seconds.
+
+    Return the exit code, or None if stress-ng had to be terminated, and the
+    diagnostics of the processes that were still running at the deadline."""
+    process = subprocess.Popen(
+        command,
+        cwd=workdir,
+        stdout=output.fd,
+        stderr=subprocess.STDOUT,
+        pass_fds=tuple(pass_fds) + (output.fd,),
+        start_new_session=True,
+    )
+    end = time.monotonic() + deadline
+    while True:
+        for monitor in monitors:
+            monitor(process.pid)
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            break
+        if monitors:
+            remaining = min(remaining, monitor_interval)
+        try:
+            return process.wait(timeout=remaining), []
+        except subprocess.TimeoutExpired:
+            continue
+    diagnostics = [
+        process_diagnostics(pid) for pid in stressng_host.process_group(process.pid)
+    ]
+    print(
+        f"==>> stress-ng is still running after {deadline} seconds, terminating it..."
+    )
+    terminate_process_group(process)
+    return None, diagnostics
+
+
+def worker_stressor(name: str, stressors: typing.Iterable[str]) -> typing.Optional[str]:
+    """Return the stressor of a stress-ng worker process by its name, which is
+    stress-ng-<stressor> truncated to 15 characters (e.g. stress-ng-matri), or
+    None for other processes."""
+    parent, _, prefix = name.partition("stress-ng-")
+    if parent or not prefix:
+        return None
+    for stressor in stressors:
+        if stressor.startswith(prefix):
+            return stressor
+    return None
+
+
+class ProcessAccountingMonitor:
+    """Sample the kernel-side counters of every process in the stress-ng
+    process group and aggregate them per stressor, based on the process names
+    stress-ng gives its workers (stress-ng-<stressor>)."""
+
+    def __init__(self, stressors: typing.Iterable[str]):
+        self.stressors = list(stressors)
+        self.counters: typing.Dict[int, typing.Tuple[str, typing.Dict[str, int]]] = {}
+        self.start = time.monotonic()
+        self.end = self.start
+
+    def __call__(self, pgid: int):
+        self.end = time.monotonic()
+        for pid in stressng_host.process_group(pgid):
+            counters = stressng_host.process_counters(pid)
+            if counters is None:
+                continue
+            stressor = worker_stressor(counters.pop("name"), self.stressors)
+            if stressor is not None:
+                # The counters are cumulative, so the latest sample of each
+                # process is all that is needed
+                self.counters[pid] = (stressor, counters)
+
+    def results(self) -> typing.List[ProcessAccounting]:
+        elapsed = max(self.end - self.start, monitor_interval)
+        totals = {}
+        for stressor, counters in self.counters.values():
+            total = totals.setdefault(stressor, {"processes": 0})
+            total["processes"] += 1
+            for key, value in counters.items():
+                total[key] = total.get(key, 0) + value
+        return [
+            ProcessAccounting(
+                stressor=stressor,
+                io_syscalls_per_second=(total.get("syscr", 0) + total.get("syscw", 0))
+                / elapsed,
+                **{
+                    field: total[key]
+                    for field, key in process_accounting_fields.items()
+                    if key in total
+                },
+            )
+            for stressor, total in totals.items()
+        ]
+
+
+# The ProcessAccounting field for each of the process counters
+process_accounting_fields = {
+    "processes": "processes",
+    "voluntary_ctxt_switches": "voluntary_ctxt_switches",
+    "nonvoluntary_ctxt_switches": "nonvoluntary_ctxt_switches",
+    "minor_faults": "minflt",
+    "major_faults": "majflt",
+    "read_bytes": "read_bytes",
+    "write_bytes": "write_bytes",
+    "read_syscalls": "syscr",
+    "write_syscalls": "syscw",
+}
+
+
+class SystemActivityMonitor:
+    """Take snapshots of the system-wide /proc/stat, /proc/interrupts and
+    /proc/softirqs counters before and after the run, and track the peak of
+    the runnable and blocked processes in between."""
+
+    def __init__(self):
+        self.before = self.snapshot()
+        self.peaks = {}
+
+    @staticmethod
+    def snapshot() -> typing.Dict[str, typing.Any]:
+        snapshot = {"stat": stressng_host.proc_stat()}
+        for name in ("interrupts", "softirqs"):
+            try:
+                snapshot[name] = stressng_host.per_cpu_counters(f"/proc/{name}")
+            except OSError:
+                snapshot[name] = {}
+        return snapshot
+
+    def __call__(self, _pgid: int):
+        stat = stressng_host.proc_stat()
+        for key in ("procs_running", "procs_blocked"):
+            if key in stat:
+                self.peaks[key] = max(self.peaks.get(key, 0), stat[key])
+
+    def results(self) -> SystemActivity:
+        after = self.snapshot()
+        stat = {
+            key: value - self.before["stat"].get(key, 0)
+            for key, value in after["stat"].items()
+        }
+        activity = SystemActivity(
+            context_switches=stat.get("ctxt", 0),
+            interrupts=stat.get("intr", 0),
+            softirqs=stat.get("softirq", 0),
+            forks=stat.get("processes", 0),
+            procs_running=self.peaks.get("procs_running"),
+            procs_blocked=self.peaks.get("procs_blocked"),
+        )
+        interrupts = counter_deltas(self.before["interrupts"], after["interrupts"])
+        if interrupts:
+            activity.cpu_interrupts = [sum(cpu) for cpu in zip(*interrupts.values())]
+            (
+                activity.interrupt_imbalance,
+                activity.busiest_interrupt_cpu,
+            ) = cpu_imbalance(activity.cpu_interrupts)
+            top = sorted(interrupts.items(), key=lambda item: -sum(item[1]))
+            activity.top_interrupts = {
+                name: sum(counts)
+                for name, counts in top[:top_interrupts]
+                if sum(counts)
+            }
+        softirqs = counter_deltas(self.before["softirqs"], after["softirqs"])
+        if softirqs:
+            activity.cpu_softirqs = [sum(cpu) for cpu in zip(*softirqs.values())]
+            (
+                activity.softirq_imbalance,
+                activity.busiest_softirq_cpu,
+            ) = cpu_imbalance(activity.cpu_softirqs)
+            activity.softirq_types = {
+                name: sum(counts) for name, counts in softirqs.items() if sum(counts)
+            }
+        return activity
+
+
+# Number of interrupt sources reported in the system activity
+top_interrupts = 5
+
+
+def counter_deltas(
+    before: typing.Dict[str, typing.List[int]],
+    after: typing.Dict[str, typing.List[int]],
+) -> typing.Dict[str, typing.List[int]]:
+    """Subtract per-CPU counters; sources which appeared during the run count
+    from zero."""
+    return {
+        name: [
+            count - previous
+            for count, previous in zip(counts, before.get(name, [0] * len(counts)))
+        ]
+        for name, counts in after.items()
+    }
+
+
+def cpu_imbalance(
+    counts: typing.List[int],
+) -> typing.Tuple[typing.Optional[float], typing.Optional[int]]:
+    """Return the ratio of the busiest CPU to the average CPU, and the busiest
+    CPU, or Nones if there were no events at all."""
+    total = sum(counts)
+    if not total:
+        return None, None
+    busiest = max(range(len(counts)), key=counts.__getitem__)
+    return round(counts[busiest] * len(counts) / total, 3), busiest
+
+
+class Pacer:
+    """Duty-cycle the workers of the paced stressors with SIGSTOP and SIGCONT:
+    in every pacing_period, the workers of a stressor run for its duty cycle
+    and are stopped for the rest. The workers are looked up whenever the
+    pacer is called as a monitor, and paced from a thread of its own."""
+
+    def __init__(self, duty_cycles: typing.Dict[str, float]):
+        self.duty_cycles = duty_cycles
+        self.workers: typing.Dict[str, typing.Set[int]] = {}
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.pace, daemon=True)
+
+    def __call__(self, pgid: int):
+        workers = {}
+        for pid in stressng_host.process_group(pgid):
+            name = stressng_host.process_status(pid).get("Name", "")
+            stressor = worker_stressor(name, self.duty_cycles)
+            if stressor is not None:
+                workers.setdefault(stressor, set()).add(pid)
+        self.workers = workers
+        if not self.thread.is_alive() and not self.stopping.is_set():
+            self.thread.start()
+
+    def signal(self, stressor: str, signum: int):
+        for pid in self.workers.get(stressor, ()):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def pace(self):
+        stops = sorted(self.duty_cycles.items(), key=lambda item: item[1])
+        while not self.stopping.is_set():
+            start = time.monotonic()
+            for stressor in self.duty_cycles:
+                self.signal(stressor, signal.SIGCONT)
+            for stressor, duty_cycle in stops:
+                delay = start + duty_cycle * pacing_period - time.monotonic()
+                if self.stopping.wait(max(delay, 0)):
+                    return
+                self.signal(stressor, signal.SIGSTOP)
+            self.stopping.wait(max(start + pacing_period - time.monotonic(), 0))
+
+    def stop(self):
+        """Stop pacing and let all the workers run again."""
+        self.stopping.set()
+        if self.thread.is_alive():
+            self.thread.join()
+        for stressor in self.duty_cycles:
+            self.signal(stressor, signal.SIGCONT)
+
+
+# Seconds of one run/stop cycle of the paced workers
+pacing_period = 0.1
+
+
+def calibrate_pacing(
+    params: StressNGParams,
+) -> typing.Tuple[StressNGParams, typing.List[PacingResult], typing.Optional[str]]:
+    """Run the stressors with a target rate unpaced for the calibration time to
+    measure their peak rate, and derive the duty cycle of each from its target.
+    The cpu stressor is paced by stress-ng itself, through its cpu-load.
+
+    Return the parameters with the cpu loads applied, the pacing of each
+    stressor and an error, if the calibration failed."""
+    paced = [s for s in params.stressors if s.target_ops_per_second is not None]
+    if any(s.target_ops_per_second <= 0 for s in paced):
+        return params, [], "The target rates must be above 0 ops/s"
+    print("==>> Measuring the peak rate of the paced stressors...")
+    output_id, output = run_workload(
+        dataclasses.replace(
+            params,
+            timeout=params.pacing_calibration,
+            stressors=[
+                dataclasses.replace(s, target_ops_per_second=None) for s in paced
+            ],
+            export_format=None,
+            results_store=None,
+            process_accounting=False,
+            system_activity=False,
+        )
+    )
+    if output_id != "success":
+        return params, [], f"The calibration run failed: {output.error}"
+
+    pacing = []
+    stressors = []
+    for stressor in params.stressors:
+        if stressor.target_ops_per_second is None:
+            stressors.append(stressor)
+            continue
+        name = jobfile_value(stressor.stressor)
+        metrics = getattr(output, result_fields[stressor.stressor])
+        if metrics is None or not metrics.bogo_ops_per_second_real_time:
+            return params, [], f"The calibration run reported no rate for {name}"
+        peak = metrics.bogo_ops_per_second_real_time
+        duty_cycle = min(stressor.target_ops_per_second / peak, 1.0)
+        if stressor.target_ops_per_second > peak:
+            print(
+                f"==>> WARNING: the target rate of {name} is above its peak rate "
+                f"of {peak:.1f} ops/s, running it unpaced"
+            )
+        if stressor.stressor == Stressors.CPU:
+            stressor = dataclasses.replace(
+                stressor, cpu_load=max(round(duty_cycle * 100), 1)
+            )
+        stressors.append(stressor)
+        pacing.append(
+            PacingResult(
+                stressor=name,
+                offered_ops_per_second=stressor.target_ops_per_second,
+                peak_ops_per_second=peak,
+                duty_cycle=round(duty_cycle, 4),
+            )
+        )
+    return dataclasses.replace(params, stressors=stressors), pacing, None
+
+
+def process_diagnostics(pid: int) -> ProcessDiagnostics:
+    status = stressng_host.process_status(pid)
+    return ProcessDiagnostics(
+        pid=pid,
+        name=status.get("Name", ""),
+        state=status.get("State", ""),
+        wchan=stressng_host.read_proc(pid, "wchan"),
+        stack=stressng_host.read_proc(pid, "stack"),
+    )
+
+
+# stress-ng's summary of how many instances of which stressors passed, failed
+# or were skipped, e.g. "stress-ng: info:  [123] failed: 1: vm (1)"
+stressor_summary_pattern = re.compile(
+    r"\] (passed|failed|skipped): \d+:(.*)$", re.MULTILINE
+)
+stressor_instances_pattern = re.compile(r"([\w-]+) \((\d+)\)")
+
+
+def parse_stressor_summary(
+    console: str,
+) -> typing.Dict[str, typing.Dict[str, int]]:
+    """Return the number of passed, failed and skipped instances per stressor
+    from the stress-ng console output."""
+    summary = {}
+    for outcome, stressors in stressor_summary_pattern.findall(console):
+        for stressor, instances in stressor_instances_pattern.findall(stressors):
+            counts = summary.setdefault(
+                stressor, {"passed": 0, "failed": 0, "skipped": 0}
+            )
+            counts[outcome] += int(instances)
+    return summary
+
+
+cyclic_percentile_pattern = re.compile(r"cyclic:\s+([\d.]+)%:\s+(\d+) ns")
+cyclic_mean_pattern = re.compile(r"cyclic:\s+mean: ([\d.]+) ns")
+cyclic_range_pattern = re.compile(r"cyclic:\s+min: (\d+) ns, max: (\d+) ns")
+
+
+def parse_cyclic_latencies(console: str) -> typing.Dict[str, typing.Any]:
+    """Parse the latency statistics the cyclic stressor prints, e.g.
+
+    stress-ng: info:  [1234] cyclic:   mean: 5421.38 ns, mode: 5103 ns
+    stress-ng: info:  [1234] cyclic:   min: 4570 ns, max: 26875 ns, std.dev. 1190.52
+    stress-ng: info:  [1234] cyclic:   99.00%:      10212 ns
+
+    into the CyclicOutput fields."""
+    latencies = {}
+    mean = cyclic_mean_pattern.search(console)
+    if mean:
+        latencies["latency_mean"] = float(mean.group(1))
+    latency_range = cyclic_range_pattern.search(console)
+    if latency_range:
+        latencies["latency_min"] = int(latency_range.group(1))
+        latencies["latency_max"] = int(latency_range.group(2))
+    percentiles = {
+        f"{float(percentile):.2f}": int(latency)
+        for percentile, latency in cyclic_percentile_pattern.findall(console)
+    }
+    if percentiles:
+        latencies["latency_percentiles"] = percentiles
+    return latencies
+
+
+def stressor_statuses(
+    params: StressNGParams,
+    console: str,
+    stressng_yaml: typing.Dict[str, typing.Any],
+    oom_kills: typing.Optional[int],
+) -> typing.List[StressorStatus]:
+    summary = parse_stressor_summary(console)
+    reported = {m["stressor"] for m in stressng_yaml.get("metrics") or []}
+    statuses = []
+    for name in dict.fromkeys(jobfile_value(s.stressor) for s in params.stressors):
+        counts = summary.get(name, {"passed": 0, "failed": 0, "skipped": 0})
+        oom_killed = bool(
+            re.search(rf"\b{re.escape(name)}\b.*\bOOM\b", console)
+            or (oom_kills and counts["failed"] and name in memory_stressors)
+        )
+        if counts["failed"]:
+            state = StressorState.FAILED
+            reason = f"{counts['failed']} instance(s) failed"
+            if oom_killed:
+                reason += " after the OOM killer killed workers"
+        elif counts["skipped"] and not counts["passed"]:
+            state = StressorState.SKIPPED
+            reason = "skipped by stress-ng, e.g. for lack of a resource or support"
+        elif counts["passed"] or name in reported:
+            state = StressorState.PASSED
+            reason = None
+        else:
+            state = StressorState.UNKNOWN
+            reason = "no outcome or metrics were reported for the stressor"
+        statuses.append(
+            StressorStatus(
+                stressor=name,
+                status=state,
+                passed_instances=counts["passed"],
+                failed_instances=counts["failed"],
+                skipped_instances=counts["skipped"],
+                oom_killed=oom_killed,
+                reason=reason,
+            )
+        )
+    return statuses
+
+
+# The WorkloadResults field holding the output of each stressor
+result_fields = {
+    Stressors.CPU: "cpuinfo",
+    Stressors.VM: "vminfo",
+    Stressors.MMAP: "mmapinfo",
+    Stressors.MATRIX: "matrixinfo",
+    Stressors.MQ: "mqinfo",
+    Stressors.HDD: "hddinfo",
+    Stressors.IOMIX: "iomixinfo",
+    Stressors.SOCK: "sockinfo",
+    Stressors.CYCLIC: "cyclicinfo",
+}
+
+
+def unserialize_metrics(metrics: typing.Dict[str, typing.Any]) -> CommonOutput:
+    """Unserialize a metrics entry of the stress-ng YAML output into the output
+    of its stressor. The numeric metrics the output has no field for, e.g. new
+    ones of a later stress-ng, go into its extra metrics; others are dropped."""
+    output_schema = stressor_schemas[metrics["stressor"]]
+    known, extra = {}, {}
+    for key, value in metrics.items():
+        if key in output_schema.properties:
+            known[key] = value
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            extra[key] = float(value)
+    if extra:
+        known["extra-metrics"] = extra
+    return output_schema.unserialize(known)
+
+
+def build_results(
+    params: StressNGParams, stressng_yaml: typing.Dict[str, typing.Any]
+) -> WorkloadResults:
+    system_info = stressng_yaml["system-info"]
+    metrics = stressng_yaml["metrics"] or []
+
+    system_un = system_info_output_schema.unserialize(system_info)
+    # Unserialize the result from each metric and cache it keyed by the
+    # name of the stressor which generated it.
+    results = {m["stressor"]: unserialize_metrics(m) for m in metrics}
+
+    return WorkloadResults(
+        test_config=params,
+        systeminfo=system_un,
+        **{field: results.get(stressor) for stressor, field in result_fields.items()},
+    )
+
+
+def apply_worker_policy(
+    params: StressNGParams,
+) -> typing.Tuple[StressNGParams, CpuBudget]:
+    """Resolve the stressors with 0 workers under the auto worker policy and
+    return the parameters to run with, a copy if any were resolved."""
+    quota = stressng_host.cgroup_cpu_quota()
+    cpuset = stressng_host.cgroup_cpuset()
+    budget = CpuBudget(
+        policy=params.worker_policy,
+        cpu_quota=quota,
+        cpuset=stressng_host.format_cpu_list(cpuset) if cpuset else None,
+    )
+    if params.worker_policy != WorkerPolicy.AUTO:
+        return params, budget
+
+    cpus = set(os.sched_getaffinity(0))
+    if cpuset:
+        cpus &= set(cpuset)
+    if params.taskset:
+        cpus &= set(stressng_host.parse_cpu_list(params.taskset))
+    workers = len(cpus)
+    if quota is not None:
+        workers = min(workers, math.ceil(quota))
+    budget.resolved_workers = max(workers, 1)
+    print(f"==>> Resolved 0 workers to {budget.resolved_workers} per stressor")
+    return (
+        dataclasses.replace(
+            params,
+            stressors=[
+                dataclasses.replace(s, workers=s.workers or budget.resolved_workers)
+                for s in params.stressors
+            ],
+        ),
+        budget,
+    )
+
+
+def run_workload(
+    params: StressNGParams,
+) -> typing.Tuple[str, typing.Union[WorkloadResults, WorkloadError]]:
+    # The policies and the pacing change the parameters to fit the host; the
+    # results are stored under the configuration as submitted
+    submitted = params
+    params, cpu_budget = apply_worker_policy(params)
+    cpus_online = len(stressng_host.online_cpus())
+    params, resource_budget, problems = apply_resource_policy(params, cpus_online)
+    for problem in problems:
+        print(f"==>> WARNING: {problem}")
+    if problems and params.resource_policy == ResourcePolicy.REFUSE:
+        return "error", WorkloadError(
+            "Refusing to run with resource policy 'refuse': " + "; ".join(problems)
+        )
+
+    binary = params.stressng_binary or stressng_binary
+    problems = unsupported_stressors(params, binary)
+    problems.extend(unsupported_methods(params, binary))
+    if problems:
+        return "error", WorkloadError("\n".join(problems))
+
+    pacing = []
+    if any(s.target_ops_per_second is not None for s in params.stressors):
+        params, pacing, error = calibrate_pacing(params)
+        if error:
+            return "error", WorkloadError(error)
+
+    print("==>> Generating temporary jobfile...")
+    # generic parameters are in the StressNGParams class (e.g. the timeout),
+    # followed by the list of stressors
+    result, unsupported = render_supported_jobfile(params, binary)
+    for line in unsupported:
+        print(f"==>> WARNING: {binary} does not support '{line}', leaving it out")
+
+    with contextlib.ExitStack() as control_files:
+        try:
+            stressng_jobfile = control_files.enter_context(ControlFile("jobfile"))
+            stressng_outfile = control_files.enter_context(ControlFile("output"))
+            stressng_console = control_files.enter_context(ControlFile("console"))
+            stressng_jobfile.write(result)
+        except EnvironmentError as error:
+            return "error", WorkloadError(f"{error} while trying to write the jobfile")
+
+        stressng_command = [
+            binary,
+            "-j",
+            stressng_jobfile.path,
+            "--metrics",
+            "-Y",
+            stressng_outfile.path,
+        ]
+
+        hygiene = None
+        if params.hygiene is not None:
+            hygiene = apply_hygiene(params, control_files.enter_context(HostSettings()))
+
+        settle = None
+        if params.settle is not None:
+            settle = settle_host(params.settle)
+
+        print("==>> Running stress-ng with the temporary jobfile...")
+        oom_kills_before = stressng_host.oom_kill_count()
+        cpu_stat_before = stressng_host.cgroup_cpu_stat()
+        monitors = []
+        if params.process_accounting:
+            accounting = ProcessAccountingMonitor(
+                jobfile_value(s.stressor) for s in params.stressors
+            )
+            monitors.append(accounting)
+        if params.system_activity:
+            activity = SystemActivityMonitor()
+            monitors.append(activity)
+        pacer = Pacer(
+            {
+                p.stressor: p.duty_cycle
+                for p in pacing
+                if p.stressor != Stressors.CPU and p.duty_cycle < 1
+            }
+        )
+        if pacer.duty_cycles:
+            monitors.append(pacer)
+        try:
+            returncode, diagnostics = supervise_stressng(
+                stressng_command,
+                params.workdir,
+                params.timeout + params.watchdog_grace,
+                stressng_console,
+                (stressng_jobfile.fd, stressng_outfile.fd),
+                monitors,
+            )
+            console = stressng_console.read()
+        except EnvironmentError as error:
+            return "error", WorkloadError(f"{error} while trying to run stress-ng")
+        finally:
+            pacer.stop()
+        print(console)
+
+        try:
+            stressng_yaml = load_stressng_yaml(stressng_outfile.read())
+        except yaml.YAMLError as error:
+            print(error)
+            stressng_yaml = {}
+            yaml_error = f"{error} in the stress-ng output"
+        except EnvironmentError as error:
+            stressng_yaml = {}
+            yaml_error = f"{error} while trying to read the stress-ng output"
+        else:
+            yaml_error = "the stress-ng output has no metrics"
+
+    cpu_stat = stressng_host.cgroup_cpu_stat()
+    if "nr_throttled" in cpu_stat_before and "nr_throttled" in cpu_stat:
+        cpu_budget.nr_throttled = (
+            cpu_stat["nr_throttled"] - cpu_stat_before["nr_throttled"]
+        )
+        cpu_budget.throttled_usec = (
+            cpu_stat["throttled_usec"] - cpu_stat_before["throttled_usec"]
+        )
+    oom_kills = None
+    if oom_kills_before is not None:
+        oom_kills = stressng_host.oom_kill_count() - oom_kills_before
+    stressor_status = stressor_statuses(params, console, stressng_yaml, oom_kills)
+    # Metrics of failed stressors are not trustworthy, only keep the others
+    failed = {
+        status.stressor
+        for status in stressor_status
+        if status.status == StressorState.FAILED
+    }
+    stressng_yaml["metrics"] = [
+        m for m in stressng_yaml.get("metrics") or [] if m["stressor"] not in failed
+    ]
+
+    if returncode is None:
+        partial_results = None
+        if stressng_yaml["metrics"] and "system-info" in stressng_yaml:
+            partial_results = build_results(params, stressng_yaml)
+        if params.cleanup:
+            remove_stressng_leftovers(params.workdir)
+        return "error", WorkloadError(
+            f"{binary} did not finish within the timeout of "
+            f"{params.timeout} seconds plus a grace period of "
+            f"{params.watchdog_grace} seconds and was terminated:\n{console}",
+            diagnostics=diagnostics,
+            partial_results=partial_results,
+            stressor_status=stressor_status,
+        )
+    if returncode != 0 and not stressng_yaml["metrics"]:
+        return "error", WorkloadError(
+            f"""{binary} failed with return code
+                {returncode}:\n{console}""",
+            stressor_status=stressor_status,
+        )
+    if "system-info" not in stressng_yaml:
+        return "error", WorkloadError(yaml_error, stressor_status=stressor_status)
+
+    results = build_results(params, stressng_yaml)
+    if results.cyclicinfo is not None:
+        results.cyclicinfo = dataclasses.replace(
+            results.cyclicinfo, **parse_cyclic_latencies(console)
+        )
+    results.resource_budget = resource_budget
+    results.stressor_status = stressor_status
+    results.cpu_budget = cpu_budget
+    results.binary = binary_info(binary, unsupported)
+    results.hygiene = hygiene
+    results.settle = settle
+    if params.process_accounting:
+        results.process_accounting = accounting.results()
+    if params.system_activity:
+        results.system_activity = activity.results()
+    results.oom_kills = oom_kills
+    for stressor_pacing in pacing:
+        metrics = getattr(results, result_fields[Stressors(stressor_pacing.stressor)])
+        if metrics is not None:
+            achieved = metrics.bogo_ops_per_second_real_time
+            stressor_pacing.achieved_ops_per_second = achieved
+            stressor_pacing.pacing_error = round(
+                100
+                * (achieved - stressor_pacing.offered_ops_per_second)
+                / stressor_pacing.offered_ops_per_second,
+                2,
+            )
+    results.pacing = pacing or None
+    if returncode != 0:
+        print(
+            f"==>> WARNING: {binary} exited with return code {returncode}, "
+            "returning the results of the healthy stressors"
+        )
+
+    print("==>> Workload run complete!")
+
+    if params.cleanup:
+        print("==>> Cleaning up operation files...")
+        remove_stressng_leftovers(params.workdir)
+
+    if params.export_format is not None:
+        print("==>> Exporting results...")
+        try:
+            results.export_file = export_results(
+                stressng_yaml["system-info"],
+                stressng_yaml["metrics"],
+                params.workdir,
+                params.export_format,
+            )
+        except EnvironmentError as error:
+            return "error", WorkloadError(f"{error} while trying to export results")
+
+    if params.results_store is not None:
+        print("==>> Storing results...")
+        try:
+            stressng_store.store_results(params.results_store, results, submitted)
+        except (EnvironmentError, sqlite3.Error) as error:
+            return "error", WorkloadError(f"{error} while trying to store results")
+
+    return "success", results
+
+
 @plugin.step(
     id="workload",
     name="stress-ng workload",
@@ -27,100 +1438,856 @@ from stressng_schema import (
 def stressng_run(
     params: StressNGParams,
 ) -> typing.Tuple[str, typing.Union[WorkloadResults, WorkloadError]]:
-    print("==>> Generating temporary jobfile...")
-    # generic parameters are in the StressNGParams class (e.g. the timeout)
-    result = params.to_jobfile()
-    # now we need to iterate of the list of stressors
-    for item in params.stressors:
-        result = result + item.to_jobfile()
+    return run_workload(params)
 
-    stressng_jobfile = tempfile.mkstemp()
-    stressng_outfile = tempfile.mkstemp()
 
-    # write the temporary jobfile
-    try:
-        with open(stressng_jobfile[1], "w") as jobfile:
-            try:
-                jobfile.write(result)
-            except IOError as error:
-                return "error", WorkloadError(
-                    f"{error} while trying to write {stressng_jobfile[1]}"
-                )
-    except EnvironmentError as error:
-        return "error", WorkloadError(
-            f"{error} while trying to open {stressng_jobfile[1]}"
-        )
+@plugin.step(
+    id="plan",
+    name="stress-ng plan",
+    description="Render the jobfile and validate it against the installed stress-ng "
+    "and the host, and estimate its resource footprint, without running the "
+    "workload",
+    outputs={"success": PlanResults, "error": WorkloadError},
+)
+def stressng_plan(
+    params: StressNGParams,
+) -> typing.Tuple[str, typing.Union[PlanResults, WorkloadError]]:
+    binary = params.stressng_binary or stressng_binary
+    jobfile, unsupported = render_supported_jobfile(params, binary)
+    cpus_online = stressng_host.online_cpus()
 
-    stressng_command = [
-        "/usr/bin/stress-ng",
-        "-j",
-        stressng_jobfile[1],
-        "--metrics",
-        "-Y",
-        stressng_outfile[1],
-    ]
+    problems = unsupported_stressors(params, binary)
+    problems.extend(unsupported_methods(params, binary))
+    problems.extend(validate_params(params, cpus_online))
+    if problems:
+        return "error", WorkloadError("\n".join(problems))
 
-    print("==>> Running stress-ng with the temporary jobfile...")
     try:
-        print(
-            subprocess.check_output(
-                stressng_command,
+        with ControlFile("plan") as planfile:
+            planfile.write(jobfile)
+            subprocess.run(
+                [binary, "--dry-run", "-j", planfile.path],
                 cwd=params.workdir,
                 text=True,
+                stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
+                timeout=10,
+                check=True,
+                pass_fds=(planfile.fd,),
             )
-        )
     except subprocess.CalledProcessError as error:
         return "error", WorkloadError(
-            f"""{error.cmd[0]} failed with return code
-                {error.returncode}:\n{error.output}"""
+            f"{error.cmd[0]} rejected the jobfile with return code "
+            f"{error.returncode}:\n{error.output}"
         )
+    except (EnvironmentError, subprocess.TimeoutExpired) as error:
+        return "error", WorkloadError(f"{error} while validating the jobfile")
 
-    try:
-        with open(stressng_outfile[1], "r") as output:
-            try:
-                stressng_yaml = yaml.safe_load(output)
-            except yaml.YAMLError as error:
-                print(error)
-                return "error", WorkloadError(
-                    f"""{error} in
-                                                  {stressng_outfile[1]}"""
+    _, budget, warnings = apply_resource_policy(params, len(cpus_online))
+    warnings.extend(
+        f"{binary} does not support '{line}', leaving it out" for line in unsupported
+    )
+
+    return "success", PlanResults(
+        jobfile=jobfile,
+        cpus_online=cpus_online,
+        footprint=budget.footprint,
+        warnings=warnings,
+        binary=binary_info(binary, unsupported),
+    )
+
+
+# The method parameter of each stressor with a breakdown mode, keyed by the
+# name of the list of methods to break it down by in MethodBreakdownParams
+breakdown_methods = {
+    Stressors.CPU: ("cpu_methods", "cpu_method"),
+    Stressors.VM: ("vm_methods", "vm_method"),
+    Stressors.MATRIX: ("matrix_methods", "matrix_method"),
+}
+
+
+@plugin.step(
+    id="method-breakdown",
+    name="stress-ng method breakdown",
+    description="Split the timeout of the workload into time slices, each running "
+    "one of the chosen cpu, vm or matrix stressor methods alone, and report the "
+    "throughput of each method",
+    outputs={"success": MethodBreakdownResults, "error": WorkloadError},
+)
+def stressng_method_breakdown(
+    params: MethodBreakdownParams,
+) -> typing.Tuple[str, typing.Union[MethodBreakdownResults, WorkloadError]]:
+    slices = []
+    for stressor in params.workload.stressors:
+        if stressor.stressor not in breakdown_methods:
+            continue
+        methods_field, method_field = breakdown_methods[stressor.stressor]
+        for method in getattr(params, methods_field) or []:
+            slices.append(dataclasses.replace(stressor, **{method_field: method}))
+    if not slices:
+        return "error", WorkloadError(
+            "No methods were chosen for any cpu, vm or matrix stressor of the workload"
+        )
+    slice_timeout = params.workload.timeout // len(slices)
+    if slice_timeout < 1:
+        return "error", WorkloadError(
+            f"The timeout of {params.workload.timeout} seconds is too short for "
+            f"{len(slices)} time slices of at least one second"
+        )
+
+    entries = []
+    systeminfo = None
+    for stressor in slices:
+        method = jobfile_value(
+            getattr(stressor, breakdown_methods[stressor.stressor][1])
+        )
+        print(f"==>> Running the {jobfile_value(stressor.stressor)} {method} slice...")
+        output_id, output = run_workload(
+            dataclasses.replace(
+                params.workload,
+                timeout=slice_timeout,
+                stressors=[stressor],
+                export_format=None,
+                results_store=None,
+            )
+        )
+        entry = MethodBreakdownEntry(
+            stressor=jobfile_value(stressor.stressor), method=method
+        )
+        metrics = (
+            getattr(output, result_fields[stressor.stressor])
+            if output_id == "success"
+            else None
+        )
+        if metrics is None:
+            entry.error = (
+                output.error
+                if output_id == "error"
+                else "stress-ng reported no metrics for the stressor"
+            )
+        else:
+            systeminfo = systeminfo or output.systeminfo
+            entry.bogo_ops_per_second_real_time = metrics.bogo_ops_per_second_real_time
+            entry.bogo_ops_per_second_usr_sys_time = (
+                metrics.bogo_ops_per_second_usr_sys_time
+            )
+        entries.append(entry)
+
+    return "success", MethodBreakdownResults(
+        slice_timeout=slice_timeout, methods=entries, systeminfo=systeminfo
+    )
+
+
+def profile_loads(params: LoadProfileParams) -> typing.List[int]:
+    """Return the percentage load of each segment of a load profile, taken at
+    the middle of the segment."""
+    segments = params.workload.timeout // params.segment_duration
+    loads = []
+    for segment in range(segments):
+        middle = (segment + 0.5) * params.segment_duration
+        if params.shape == LoadShape.STEP:
+            load = params.loads[segment * len(params.loads) // segments]
+        elif params.shape == LoadShape.RAMP:
+            load = params.min_load + (params.max_load - params.min_load) * (
+                segment / max(segments - 1, 1)
+            )
+        elif params.shape == LoadShape.SINE:
+            load = (
+                params.min_load
+                + (params.max_load - params.min_load)
+                * (1 - math.cos(2 * math.pi * middle / params.period))
+                / 2
+            )
+        else:
+            on = middle % params.period < params.period * params.duty_cycle / 100
+            load = params.max_load if on else params.min_load
+        loads.append(round(load))
+    return loads
+
+
+def segment_workload(
+    workload: StressNGParams, duration: int, load: int
+) -> StressNGParams:
+    """Return the workload of one load-profile segment, with its cpu stressors
+    at the given load."""
+    return dataclasses.replace(
+        workload,
+        timeout=duration,
+        stressors=[
+            (
+                dataclasses.replace(s, cpu_load=load)
+                if s.stressor == Stressors.CPU
+                else s
+            )
+            for s in workload.stressors
+        ],
+        export_format=None,
+        results_store=None,
+    )
+
+
+@plugin.step(
+    id="load-profile",
+    name="stress-ng load profile",
+    description="Split the timeout of the workload into segments and vary the load "
+    "of its cpu stressors from segment to segment following a step, ramp, sine or "
+    "burst profile, and report the achieved load and throughput of each segment",
+    outputs={"success": LoadProfileResults, "error": WorkloadError},
+)
+def stressng_load_profile(
+    params: LoadProfileParams,
+) -> typing.Tuple[str, typing.Union[LoadProfileResults, WorkloadError]]:
+    if not any(s.stressor == Stressors.CPU for s in params.workload.stressors):
+        return "error", WorkloadError("The workload has no cpu stressor to load")
+    if params.shape == LoadShape.STEP and not params.loads:
+        return "error", WorkloadError("The step profile needs a list of loads")
+    if any(not 0 <= load <= 100 for load in params.loads or []):
+        return "error", WorkloadError("The loads must be percentages from 0 to 100")
+    loads = profile_loads(params)
+    if not loads:
+        return "error", WorkloadError(
+            f"The timeout of {params.workload.timeout} seconds is shorter than one "
+            f"segment of {params.segment_duration} seconds"
+        )
+
+    segments = []
+    systeminfo = None
+    for index, load in enumerate(loads):
+        print(f"==>> Running segment {index + 1}/{len(loads)} at {load}% load...")
+        output_id, output = run_workload(
+            segment_workload(params.workload, params.segment_duration, load)
+        )
+        segment = LoadProfileSegment(
+            start=index * params.segment_duration, offered_load=load
+        )
+        metrics = output.cpuinfo if output_id == "success" else None
+        if metrics is None:
+            segment.error = (
+                output.error
+                if output_id == "error"
+                else "stress-ng reported no metrics for the cpu stressor"
+            )
+        else:
+            systeminfo = systeminfo or output.systeminfo
+            segment.achieved_load = metrics.cpu_usage_per_instance
+            segment.bogo_ops_per_second_real_time = (
+                metrics.bogo_ops_per_second_real_time
+            )
+        segments.append(segment)
+
+    return "success", LoadProfileResults(
+        segment_duration=params.segment_duration,
+        segments=segments,
+        systeminfo=systeminfo,
+    )
+
+
+def bisect_operating_point(
+    low: int,
+    high: int,
+    tolerance: int,
+    max_probes: int,
+    probe: typing.Callable[[int], bool],
+) -> typing.Optional[int]:
+    """Return the highest intensity from low to high for which probe passes,
+    assuming that it passes up to some intensity and fails above it. The
+    search stops when the highest passing and the lowest failing intensity are
+    at most tolerance apart, or after max_probes probes."""
+    if probe(high):
+        return high
+    if not probe(low):
+        return None
+    probes = 2
+    while high - low > tolerance and probes < max_probes:
+        middle = (low + high) // 2
+        if probe(middle):
+            low = middle
+        else:
+            high = middle
+        probes += 1
+    return low
+
+
+@plugin.step(
+    id="search",
+    name="stress-ng operating point search",
+    description="Bisect the worker count or cpu-load of a stressor for the highest "
+    "intensity at which the latency of a cyclic probe stressor stays within an SLO, "
+    "and report every probe and the operating point found",
+    outputs={"success": SearchResults, "error": WorkloadError},
+)
+def stressng_search(
+    params: SearchParams,
+) -> typing.Tuple[str, typing.Union[SearchResults, WorkloadError]]:
+    stressors = {s.stressor for s in params.workload.stressors}
+    if Stressors.CYCLIC not in stressors:
+        return "error", WorkloadError(
+            "The workload needs a cyclic stressor as the latency probe"
+        )
+    if params.stressor not in stressors:
+        return "error", WorkloadError(
+            f"The workload has no {jobfile_value(params.stressor)} stressor to search"
+        )
+    if params.knob == SearchKnob.CPU_LOAD and params.stressor != Stressors.CPU:
+        return "error", WorkloadError("Only the cpu stressor has a cpu-load")
+    high = params.high
+    if high is None:
+        high = (
+            100
+            if params.knob == SearchKnob.CPU_LOAD
+            else len(stressng_host.online_cpus())
+        )
+    if high < params.low:
+        return "error", WorkloadError(
+            f"The search range from {params.low} to {high} is empty"
+        )
+    percentile = f"{params.percentile:.2f}"
+    knob_field = "cpu_load" if params.knob == SearchKnob.CPU_LOAD else "workers"
+
+    # Probes are cached, so a value is never run twice, and the leftovers of
+    # the stressors are only removed after the last probe
+    probes: typing.Dict[int, SearchProbe] = {}
+    systeminfo = []
+
+    def probe(value: int) -> bool:
+        if value in probes:
+            return probes[value].passed
+        print(f"==>> Probing {knob_field} {value}...")
+        output_id, output = run_workload(
+            dataclasses.replace(
+                params.workload,
+                stressors=[
+                    (
+                        dataclasses.replace(s, **{knob_field: value})
+                        if s.stressor == params.stressor
+                        else s
+                    )
+                    for s in params.workload.stressors
+                ],
+                cleanup=False,
+                export_format=None,
+                results_store=None,
+            )
+        )
+        result = SearchProbe(value=value, passed=False)
+        if output_id == "error":
+            result.error = output.error
+        elif output.cyclicinfo is None or percentile not in (
+            output.cyclicinfo.latency_percentiles or {}
+        ):
+            result.error = f"The cyclic probe reported no {percentile}% latency"
+        else:
+            systeminfo.append(output.systeminfo)
+            result.latency = output.cyclicinfo.latency_percentiles[percentile]
+            result.passed = result.latency <= params.latency_slo
+            metrics = getattr(output, result_fields[params.stressor])
+            if metrics is not None:
+                result.bogo_ops_per_second_real_time = (
+                    metrics.bogo_ops_per_second_real_time
+                )
+        probes[value] = result
+        return result.passed
+
+    operating_point = bisect_operating_point(
+        params.low, high, params.tolerance, params.max_probes, probe
+    )
+    if params.workload.cleanup:
+        remove_stressng_leftovers(params.workload.workdir)
+
+    return "success", SearchResults(
+        operating_point=operating_point,
+        probes=list(probes.values()),
+        systeminfo=systeminfo[0] if systeminfo else None,
+    )
+
+
+def interference_matrix(
+    names: typing.List[str],
+    solo: typing.Dict[str, float],
+    paired: typing.Dict[str, typing.Dict[str, float]],
+    baselines: typing.Optional[typing.Dict[str, typing.Dict[str, float]]] = None,
+) -> typing.List[InterferenceRow]:
+    """Build a row of the slowdown matrix for each stressor from its solo rate
+    and its rate next to each other stressor. The baselines are the solo rates
+    to divide each paired rate into, keyed like the paired rates, where they
+    differ from the solo rate of the row."""
+    baselines = baselines or {}
+    rows = []
+    for name in names:
+        row = InterferenceRow(
+            stressor=name,
+            solo_ops_per_second=solo.get(name),
+            paired_ops_per_second=paired.get(name) or None,
+        )
+        if row.paired_ops_per_second:
+            slowdown = {}
+            for neighbour, rate in row.paired_ops_per_second.items():
+                baseline = baselines.get(name, {}).get(
+                    neighbour, row.solo_ops_per_second
                 )
-    except EnvironmentError as error:
+                if baseline and rate:
+                    slowdown[neighbour] = round(baseline / rate, 4)
+            row.slowdown = slowdown or None
+        rows.append(row)
+    return rows
+
+
+@plugin.step(
+    id="interference",
+    name="stress-ng interference matrix",
+    description="Run each stressor of the workload alone and then in every pair, "
+    "optionally pinned to disjoint CPUs, and report how much each stressor slows "
+    "down next to each other one",
+    outputs={"success": InterferenceResults, "error": WorkloadError},
+)
+def stressng_interference(
+    params: InterferenceParams,
+) -> typing.Tuple[str, typing.Union[InterferenceResults, WorkloadError]]:
+    stressors = params.workload.stressors
+    names = [jobfile_value(s.stressor) for s in stressors]
+    if len(stressors) < 2:
+        return "error", WorkloadError("The workload needs at least two stressors")
+    if len(set(names)) < len(names):
         return "error", WorkloadError(
-            f"{error} while trying to open {stressng_outfile[1]}"
+            "The stressors of the workload have to be of different types"
         )
+    halves = [None, None]
+    if params.pin:
+        cpus = stressng_host.online_cpus()
+        if params.workload.taskset:
+            cpus = sorted(
+                set(cpus) & set(stressng_host.parse_cpu_list(params.workload.taskset))
+            )
+        if len(cpus) < 2:
+            return "error", WorkloadError("Pinning needs at least two CPUs")
+        # The halves are of the same size, leaving out the last CPU of an odd
+        # count, so that the two members of a pair get the same CPU capacity
+        middle = len(cpus) // 2
+        end = 2 * middle
+        halves = [
+            stressng_host.format_cpu_list(cpus[:middle]),
+            stressng_host.format_cpu_list(cpus[middle:end]),
+        ]
 
-    system_info = stressng_yaml["system-info"]
-    metrics = stressng_yaml["metrics"]
+    errors = []
+    systeminfo = []
 
-    system_un = system_info_output_schema.unserialize(system_info)
-    # Unserialize the result from each metric and cache it keyed by the
-    # name of the stressor which generated it.
-    results = {
-        m["stressor"]: stressor_schemas[m["stressor"]].unserialize(m) for m in metrics
+    def run(
+        runs: typing.List[typing.Tuple[typing.Any, typing.Optional[str]]],
+    ) -> typing.Dict[str, float]:
+        """Run the stressors, together or, each with a taskset of its own,
+        concurrently, and return their bogo-ops/s by name. The leftovers are
+        only removed at the end, so that concurrent runs do not remove each
+        other's files. The host hygiene and the settle gate are applied once
+        around all the runs, as concurrent runs would restore each other's
+        settings and wait for each other to settle."""
+        workloads = [
+            dataclasses.replace(
+                params.workload,
+                stressors=run_stressors,
+                taskset=taskset or params.workload.taskset,
+                cleanup=False,
+                export_format=None,
+                results_store=None,
+                hygiene=None,
+                settle=None,
+            )
+            for run_stressors, taskset in runs
+        ]
+        with contextlib.ExitStack() as host_settings:
+            if params.workload.hygiene is not None:
+                apply_hygiene(
+                    dataclasses.replace(
+                        params.workload,
+                        stressors=[
+                            s for run_stressors, _ in runs for s in run_stressors
+                        ],
+                    ),
+                    host_settings.enter_context(HostSettings()),
+                )
+            if params.workload.settle is not None:
+                settle_host(params.workload.settle)
+            with concurrent.futures.ThreadPoolExecutor(len(workloads)) as executor:
+                outputs = list(executor.map(run_workload, workloads))
+        rates = {}
+        for workload, (output_id, output) in zip(workloads, outputs):
+            label = "+".join(jobfile_value(s.stressor) for s in workload.stressors)
+            if output_id == "error":
+                errors.append(f"{label}: {output.error}")
+                continue
+            systeminfo.append(output.systeminfo)
+            for stressor in workload.stressors:
+                metrics = getattr(output, result_fields[stressor.stressor])
+                if metrics is not None:
+                    rates[jobfile_value(stressor.stressor)] = (
+                        metrics.bogo_ops_per_second_real_time
+                    )
+        return rates
+
+    # The solo baselines are measured once and reused for every pair. Pinned,
+    # the first stressor of a pair runs on the first half and the second one
+    # on the second half, so each stressor is measured alone on each half it
+    # runs on in the pairs
+    positions = {name: set() for name in names}
+    for first_name, second_name in itertools.combinations(names, 2):
+        positions[first_name].add(0)
+        positions[second_name].add(1 if params.pin else 0)
+    solo_by_half = {name: {} for name in names}
+    for stressor, name in zip(stressors, names):
+        for half in sorted(positions[name]):
+            where = f" on CPUs {halves[half]}" if params.pin else ""
+            print(f"==>> Running {name} alone{where}...")
+            rates = run([([stressor], halves[half])])
+            if name in rates:
+                solo_by_half[name][half] = rates[name]
+    solo = {
+        name: statistics.mean(rates.values())
+        for name, rates in solo_by_half.items()
+        if rates
     }
 
-    print("==>> Workload run complete!")
-    os.close(stressng_jobfile[0])
-    os.close(stressng_outfile[0])
+    paired = {name: {} for name in names}
+    baselines = {name: {} for name in names}
+    for (first, first_name), (second, second_name) in itertools.combinations(
+        zip(stressors, names), 2
+    ):
+        print(f"==>> Running {first_name} with {second_name}...")
+        if params.pin:
+            rates = run([([first], halves[0]), ([second], halves[1])])
+        else:
+            rates = run([([first, second], None)])
+        if first_name in rates:
+            paired[first_name][second_name] = rates[first_name]
+        if second_name in rates:
+            paired[second_name][first_name] = rates[second_name]
+        if 0 in solo_by_half[first_name]:
+            baselines[first_name][second_name] = solo_by_half[first_name][0]
+        second_half = 1 if params.pin else 0
+        if second_half in solo_by_half[second_name]:
+            baselines[second_name][first_name] = solo_by_half[second_name][second_half]
 
-    if params.cleanup:
-        print("==>> Cleaning up operation files...")
-        os.remove(stressng_jobfile[1])
+    if params.workload.cleanup:
+        remove_stressng_leftovers(params.workload.workdir)
 
-    return "success", WorkloadResults(
-        test_config=params,
-        systeminfo=system_un,
-        cpuinfo=results.get(Stressors.CPU),
-        vminfo=results.get(Stressors.VM),
-        mmapinfo=results.get(Stressors.MMAP),
-        matrixinfo=results.get(Stressors.MATRIX),
-        mqinfo=results.get(Stressors.MQ),
-        hddinfo=results.get(Stressors.HDD),
-        iomixinfo=results.get(Stressors.IOMIX),
-        sockinfo=results.get(Stressors.SOCK),
+    return "success", InterferenceResults(
+        matrix=interference_matrix(names, solo, paired, baselines),
+        errors=errors or None,
+        systeminfo=systeminfo[0] if systeminfo else None,
+    )
+
+
+def tunable_path(knob: str) -> str:
+    """Return the file of a knob given as a sysctl name or a path, which has to
+    be under /proc/sys or /sys."""
+    path = knob if knob.startswith("/") else "/proc/sys/" + knob.replace(".", "/")
+    path = os.path.normpath(path)
+    if not path.startswith(("/proc/sys/", "/sys/")):
+        raise ValueError(f"{knob} is not a /proc/sys or /sys setting")
+    return path
+
+
+def comparison_metrics(results: WorkloadResults) -> typing.Dict[str, float]:
+    """Return the throughput of each stressor and the latency of the cyclic
+    stressor by <stressor>.<output field>."""
+    metrics = {}
+    for stressor, field in result_fields.items():
+        output = getattr(results, field)
+        if output is not None:
+            metrics[f"{stressor.value}.bogo-ops-per-second-real-time"] = (
+                output.bogo_ops_per_second_real_time
+            )
+    if results.cyclicinfo is not None:
+        if results.cyclicinfo.latency_mean is not None:
+            metrics["cyclic.latency-mean"] = results.cyclicinfo.latency_mean
+        for percentile in ("99.00",):
+            latency = (results.cyclicinfo.latency_percentiles or {}).get(percentile)
+            if latency is not None:
+                metrics[f"cyclic.latency-{percentile}"] = latency
+    return metrics
+
+
+def summarize_metrics(
+    samples: typing.Iterable[typing.Dict[str, float]], confidence: float
+) -> typing.List[MetricSummary]:
+    by_metric = {}
+    for run in samples:
+        for metric, value in run.items():
+            by_metric.setdefault(metric, []).append(value)
+    summaries = []
+    for metric, values in sorted(by_metric.items()):
+        mean, low, high = stressng_stats.confidence_interval(values, confidence)
+        summaries.append(
+            MetricSummary(
+                metric=metric,
+                mean=mean,
+                samples=len(values),
+                ci_low=low,
+                ci_high=high,
+            )
+        )
+    return summaries
+
+
+@plugin.step(
+    id="tunables",
+    name="stress-ng kernel tunables comparison",
+    description="Run the workload under every combination of the given /proc/sys "
+    "and /sys knob values in a randomized order, restoring the original values "
+    "afterwards, and compare the throughput and latency of each combination and "
+    "knob value with confidence intervals",
+    outputs={"success": TunablesResults, "error": WorkloadError},
+)
+def stressng_tunables(
+    params: TunablesParams,
+) -> typing.Tuple[str, typing.Union[TunablesResults, WorkloadError]]:
+    try:
+        paths = [tunable_path(t.knob) for t in params.tunables]
+    except ValueError as error:
+        return "error", WorkloadError(str(error))
+    if not 0 < params.confidence < 1:
+        return "error", WorkloadError("The confidence has to be between 0 and 1")
+    combinations = list(itertools.product(*(t.values for t in params.tunables)))
+
+    # Every round runs each combination once, in an order of its own, so that
+    # drift over the session does not favour any combination
+    shuffle = random.Random(params.seed).shuffle
+    run_order = []
+    for _ in range(params.repetitions):
+        round_order = list(range(len(combinations)))
+        shuffle(round_order)
+        run_order.extend(round_order)
+
+    samples = [[] for _ in combinations]
+    errors = [[] for _ in combinations]
+    systeminfo = None
+    for index in run_order:
+        settings = dict(zip(paths, combinations[index]))
+        print(f"==>> Running with {settings}...")
+        with HostSettings() as host_settings:
+            for path, value in settings.items():
+                host_settings.apply(path, value)
+            failed = [s for s in host_settings.settings if s.error]
+            if failed:
+                errors[index].append("; ".join(f"{s.path}: {s.error}" for s in failed))
+                continue
+            output_id, output = run_workload(
+                dataclasses.replace(
+                    params.workload, export_format=None, results_store=None
+                )
+            )
+        if output_id == "error":
+            errors[index].append(output.error)
+            continue
+        systeminfo = systeminfo or output.systeminfo
+        samples[index].append(comparison_metrics(output))
+
+    knobs = [t.knob for t in params.tunables]
+    return "success", TunablesResults(
+        combinations=[
+            TunableCombination(
+                settings=dict(zip(knobs, combination)),
+                metrics=summarize_metrics(samples[index], params.confidence),
+                errors=errors[index] or None,
+            )
+            for index, combination in enumerate(combinations)
+        ],
+        comparisons=[
+            TunableComparison(
+                knob=tunable.knob,
+                value=value,
+                metrics=summarize_metrics(
+                    (
+                        run
+                        for index, combination in enumerate(combinations)
+                        if combination[position] == value
+                        for run in samples[index]
+                    ),
+                    params.confidence,
+                ),
+            )
+            for position, tunable in enumerate(params.tunables)
+            for value in tunable.values
+        ],
+        run_order=run_order,
+        systeminfo=systeminfo,
+    )
+
+
+@plugin.step(
+    id="batch",
+    name="stress-ng batch",
+    description="Run a list of workloads one after another in one plugin process "
+    "and return the results or error of each, so that a failed workload does not "
+    "abort the batch",
+    outputs={"success": BatchResults},
+)
+def stressng_batch(
+    params: BatchParams,
+) -> typing.Tuple[str, BatchResults]:
+    entries = []
+    with stressng_host.cached_probes():
+        for index, workload in enumerate(params.workloads):
+            print(f"==>> Running workload {index + 1}/{len(params.workloads)}...")
+            try:
+                output_id, output = run_workload(workload)
+            except Exception as error:
+                # Anything unexpected only fails this workload, not the batch
+                output_id, output = "error", WorkloadError(
+                    f"{type(error).__name__}: {error}"
+                )
+            if output_id == "success":
+                entries.append(BatchEntry(results=output))
+            else:
+                entries.append(BatchEntry(error=output))
+    return "success", BatchResults(
+        entries=entries, failed=sum(entry.error is not None for entry in entries)
+    )
+
+
+@plugin.step(
+    id="trend-query",
+    name="stress-ng trend query",
+    description="Return the value of a stressor metric in each run of a results "
+    "store, oldest first, with a rolling baseline of the preceding runs",
+    outputs={"success": TrendResults, "error": WorkloadError},
+)
+def stressng_trend_query(
+    params: TrendQueryParams,
+) -> typing.Tuple[str, typing.Union[TrendResults, WorkloadError]]:
+    if not os.path.isfile(params.store):
+        return "error", WorkloadError(f"results store {params.store} does not exist")
+    try:
+        series = stressng_store.trend_series(
+            params.store,
+            jobfile_value(params.stressor),
+            params.metric,
+            params.baseline_window,
+            hostname=params.hostname,
+            fingerprint=params.host_fingerprint,
+            config=params.config_hash,
+            since=params.since,
+            until=params.until,
+        )
+    except sqlite3.Error as error:
+        return "error", WorkloadError(f"{error} while querying {params.store}")
+
+    points = []
+    for run, epoch, hostname, fingerprint, config, value, baseline in series:
+        deviation = None
+        if baseline:
+            deviation = (value - baseline) / baseline * 100
+        points.append(
+            TrendPoint(
+                run=run,
+                epoch=epoch,
+                hostname=hostname,
+                host_fingerprint=fingerprint,
+                config_hash=config,
+                value=value,
+                baseline=baseline,
+                deviation=deviation,
+            )
+        )
+    return "success", TrendResults(
+        stressor=jobfile_value(params.stressor), metric=params.metric, points=points
+    )
+
+
+def default_change_metrics(metrics: typing.Iterable[str]) -> typing.List[str]:
+    """Return the throughput metrics among the stored ones: the bogo-ops/s in
+    real time and the rates, such as the hdd MB/s and matrix per-method rates."""
+    return [
+        metric
+        for metric in metrics
+        if metric == "bogo-ops-per-second-real-time"
+        or metric.endswith(("-rate", "-ops-per-sec"))
+    ]
+
+
+def series_change_points(
+    metric: str,
+    runs: typing.List[typing.Tuple[int, int, str, str, str, float]],
+    params: ChangePointParams,
+    rng: random.Random,
+) -> ChangePointSeries:
+    """Find the change points of a metric in the runs of one host and jobfile,
+    oldest first, and estimate the size of each shift."""
+    values = [run[5] for run in runs]
+    found = stressng_stats.change_points(
+        values,
+        params.permutations,
+        params.significance,
+        params.min_segment,
+        rng,
     )
+    bounds = [0] + [index for index, _ in found] + [len(values)]
+    change_points = []
+    for position, (index, p_value) in enumerate(found):
+        # The means of the segments on either side of the shift
+        start, end = bounds[position], bounds[position + 2]
+        before = statistics.fmean(values[start:index])
+        after = statistics.fmean(values[index:end])
+        change_points.append(
+            ChangePoint(
+                run=runs[index][0],
+                epoch=runs[index][1],
+                index=index,
+                mean_before=before,
+                mean_after=after,
+                shift=after - before,
+                shift_percent=(after - before) / before * 100 if before else None,
+                p_value=p_value,
+            )
+        )
+    return ChangePointSeries(
+        metric=metric,
+        hostname=runs[-1][2],
+        host_fingerprint=runs[0][3],
+        config_hash=runs[0][4],
+        runs=len(values),
+        change_points=change_points,
+    )
+
+
+@plugin.step(
+    id="change-points",
+    name="stress-ng change points",
+    description="Find the runs of a results store at which a throughput metric of "
+    "a stressor shifted, with CUSUM permutation tests, and estimate the size of "
+    "each shift",
+    outputs={"success": ChangePointResults, "error": WorkloadError},
+)
+def stressng_change_points(
+    params: ChangePointParams,
+) -> typing.Tuple[str, typing.Union[ChangePointResults, WorkloadError]]:
+    if not os.path.isfile(params.store):
+        return "error", WorkloadError(f"results store {params.store} does not exist")
+    stressor = jobfile_value(params.stressor)
+    rng = random.Random(params.seed)
+    series = []
+    try:
+        metrics = params.metrics or default_change_metrics(
+            stressng_store.stored_metrics(params.store, stressor)
+        )
+        for metric in metrics:
+            runs = stressng_store.metric_series(
+                params.store,
+                stressor,
+                metric,
+                hostname=params.hostname,
+                fingerprint=params.host_fingerprint,
+                config=params.config_hash,
+                since=params.since,
+                until=params.until,
+            )
+            # Runs of different hosts or jobfiles are separate series, as a
+            # shift between them is no change of either
+            for _, group in itertools.groupby(runs, operator.itemgetter(3, 4)):
+                series.append(series_change_points(metric, list(group), params, rng))
+    except sqlite3.Error as error:
+        return "error", WorkloadError(f"{error} while querying {params.store}")
+
+    return "success", ChangePointResults(stressor=stressor, series=series)
 
 
 if __name__ == "__main__":
@@ -128,6 +2295,15 @@ if __name__ == "__main__":
         plugin.run(
             plugin.build_schema(
                 stressng_run,
+                stressng_plan,
+                stressng_method_breakdown,
+                stressng_load_profile,
+                stressng_search,
+                stressng_interference,
+                stressng_tunables,
+                stressng_batch,
+                stressng_trend_query,
+                stressng_change_points,
             )
         )
     )
@@ -2,6 +2,8 @@
 
 import typing
 import enum
+import functools
+import operator
 import re
 import tempfile
 from dataclasses import dataclass
@@ -13,18 +15,64 @@ from arcaflow_plugin_sdk import annotations
 bytes_or_percent_pattern = re.compile(r"^[1-9]\d*\.?\d*[KkMmGgTt%]$")
 
 
-def params_to_jobfile(params: dict) -> str:
-    result = ""
-    for key, value in params.items():
-        if not value:
+def jobfile_value(value) -> str:
+    # The enums are all str-based, so the string content of a member is its
+    # value; this avoids the comparatively slow Enum.value lookup.
+    if isinstance(value, str):
+        return str.__str__(value)
+    return str(value)
+
+
+def _jobfile_formatter(option: str, field_type) -> typing.Callable[[typing.Any], str]:
+    if isinstance(field_type, schema.BoolType):
+        return lambda value: option
+    if isinstance(field_type, schema.ListType):
+        return lambda value: f"{option} {','.join(map(jobfile_value, value))}"
+    if isinstance(field_type, (schema.StringEnumType, schema.IntEnumType)):
+        return lambda value: f"{option} {jobfile_value(value)}"
+    return lambda value: f"{option} {value}"
+
+
+def plugin_parameter(field_type):
+    """Mark a field of a parameters class as a plugin-internal parameter, which
+    is not rendered as a stress-ng option. Used as a typing.Annotated item, it
+    leaves the type of the field as it is."""
+    return field_type
+
+
+@functools.lru_cache(maxsize=None)
+def jobfile_template(
+    cls,
+) -> typing.Tuple[typing.Callable, typing.Tuple[typing.Callable, ...]]:
+    """Return a getter for the stress-ng option fields of a parameters class and
+    a line formatter for each of them, derived once from the schema ids and
+    types of its fields, in declaration order. The fields marked as
+    plugin_parameter are left out."""
+    hints = typing.get_type_hints(cls, include_extras=True)
+    fields = []
+    formatters = []
+    for option, field in plugin.build_object_schema(cls).properties.items():
+        name = field.field_override or option
+        if plugin_parameter in getattr(hints[name], "__metadata__", ()):
             continue
-        if isinstance(value, bool):
-            result += f"{key}\n"
-        elif isinstance(value, list):
-            result += f"{key} {','.join(value)}\n"
-        else:
-            result += f"{key} {value}\n"
-    return result
+        fields.append(name)
+        formatters.append(_jobfile_formatter(option, field.type))
+    getter = operator.attrgetter(*fields)
+    if len(fields) == 1:
+        return lambda params: (getter(params),), tuple(formatters)
+    return getter, tuple(formatters)
+
+
+def params_to_jobfile(params) -> typing.List[str]:
+    """Return a jobfile line for each stress-ng option that is set in params.
+    An option is unset when it is None, a False flag or an empty list; a zero,
+    such as a cpu-load of 0, is rendered."""
+    getter, formatters = jobfile_template(type(params))
+    return [
+        formatter(value)
+        for formatter, value in zip(formatters, getter(params))
+        if value is not None and value is not False and value != []
+    ]
 
 
 class Stressors(str, enum.Enum):
@@ -36,6 +84,7 @@ class Stressors(str, enum.Enum):
     HDD = "hdd"
     IOMIX = "iomix"
     SOCK = "sock"
+    CYCLIC = "cyclic"
 
 
 # Mapping of Stressors to their corresponding output schemas (each schema
@@ -199,6 +248,22 @@ class HddOpts(str, enum.Enum):
     WR_SEQ = "wr-seq"
 
 
+class CyclicMethod(str, enum.Enum):
+    CLOCK_NS = "clock_ns"
+    ITIMER = "itimer"
+    NANOSLEEP = "nanosleep"
+    POLL = "poll"
+    POSIX_NS = "posix_ns"
+    PSELECT = "pselect"
+    USLEEP = "usleep"
+
+
+class CyclicPolicy(str, enum.Enum):
+    DEADLINE = "deadline"
+    FIFO = "fifo"
+    RR = "rr"
+
+
 class SockDomain(str, enum.Enum):
     IPV4 = "ipv4"
     IPV6 = "ipv6"
@@ -211,22 +276,74 @@ class SockOpts(str, enum.Enum):
     SENDMMSG = "sendmmsg"
 
 
+class ExportFormat(str, enum.Enum):
+    CSV = "csv"
+
+
+class StressorState(str, enum.Enum):
+    PASSED = "passed"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+    UNKNOWN = "unknown"
+
+
+class WorkerPolicy(str, enum.Enum):
+    ONLINE = "online"
+    AUTO = "auto"
+
+
+class ResourcePolicy(str, enum.Enum):
+    WARN = "warn"
+    REFUSE = "refuse"
+    SCALE = "scale"
+
+
+class LoadShape(str, enum.Enum):
+    STEP = "step"
+    RAMP = "ramp"
+    SINE = "sine"
+    BURST = "burst"
+
+
 @dataclass
 class CommonStressorParams:
     stressor: typing.Annotated[
         Stressors,
+        plugin_parameter,
         schema.name("Stressor"),
         schema.description("Stressor for the benchmark workload"),
     ]
 
     workers: typing.Annotated[
         int,
+        plugin_parameter,
         schema.name("Worker Count"),
         schema.description(
             "Number of workers for the stressor; 0 = match the number of on-line CPUs"
         ),
     ]
 
+    target_ops_per_second: typing.Annotated[
+        typing.Optional[float],
+        plugin_parameter,
+        schema.id("target-ops-per-second"),
+        schema.name("Target Operations per Second"),
+        schema.description(
+            "Offered rate of bogo operations per second of all workers of the "
+            "stressor; the plugin measures the peak rate first and paces the "
+            "workers down to the target"
+        ),
+        validation.min(0.0),
+    ] = None
+
+    def jobfile_lines(self) -> typing.List[str]:
+        lines = params_to_jobfile(self)
+        lines.insert(0, f"{jobfile_value(self.stressor)} {self.workers}")
+        return lines
+
+    def to_jobfile(self) -> str:
+        return "".join(f"{line}\n" for line in self.jobfile_lines())
+
 
 @dataclass
 class CpuStressorParams(CommonStressorParams):
@@ -258,15 +375,6 @@ class CpuStressorParams(CommonStressorParams):
         ),
     ] = CpuMethod.ALL
 
-    def to_jobfile(self) -> str:
-        return f"cpu {self.workers}\n" + params_to_jobfile(
-            {
-                "cpu-ops": self.cpu_ops,
-                "cpu-load": self.cpu_load,
-                "cpu-method": self.cpu_method,
-            }
-        )
-
 
 @dataclass
 class VmStressorParams(CommonStressorParams):
@@ -339,19 +447,6 @@ class VmStressorParams(CommonStressorParams):
         ),
     ] = None
 
-    def to_jobfile(self) -> str:
-        return f"vm {self.workers}\n" + params_to_jobfile(
-            {
-                "vm-bytes": self.vm_bytes,
-                "vm-ops": self.vm_ops,
-                "vm-hang": self.vm_hang,
-                "vm-keep": self.vm_keep,
-                "vm-locked": self.vm_locked,
-                "vm-method": self.vm_method,
-                "vm-populate": self.vm_populate,
-            }
-        )
-
 
 @dataclass
 class MmapStressorParams(CommonStressorParams):
@@ -436,20 +531,6 @@ class MmapStressorParams(CommonStressorParams):
         ),
     ] = None
 
-    def to_jobfile(self) -> str:
-        return f"mmap {self.workers}\n" + params_to_jobfile(
-            {
-                "mmap-ops": self.mmap_ops,
-                "mmap-async": self.mmap_async,
-                "mmap-bytes": self.mmap_bytes,
-                "mmap-file": self.mmap_file,
-                "mmap-mmap2": self.mmap_mmap2,
-                "mmap-mprotect": self.mmap_mprotect,
-                "mmap-odirect": self.mmap_odirect,
-                "mmap-osync": self.mmap_osync,
-            }
-        )
-
 
 @dataclass
 class MatrixStressorParams(CommonStressorParams):
@@ -488,16 +569,6 @@ class MatrixStressorParams(CommonStressorParams):
         ),
     ] = None
 
-    def to_jobfile(self) -> str:
-        return f"matrix {self.workers}\n" + params_to_jobfile(
-            {
-                "matrix-ops": self.matrix_ops,
-                "matrix-method": self.matrix_method,
-                "matrix-size": self.matrix_size,
-                "matrix-yx": self.matrix_yx,
-            }
-        )
-
 
 @dataclass
 class MqStressorParams(CommonStressorParams):
@@ -522,14 +593,6 @@ class MqStressorParams(CommonStressorParams):
         ),
     ] = None
 
-    def to_jobfile(self) -> str:
-        return f"mq {self.workers}\n" + params_to_jobfile(
-            {
-                "mq-ops": self.mq_ops,
-                "mq-size": self.mq_size,
-            }
-        )
-
 
 @dataclass
 class HDDStressorParams(CommonStressorParams):
@@ -567,16 +630,6 @@ class HDDStressorParams(CommonStressorParams):
         schema.description("Size of each write in bytes"),
     ] = None
 
-    def to_jobfile(self) -> str:
-        return f"hdd {self.workers}\n" + params_to_jobfile(
-            {
-                "hdd-bytes": self.hdd_bytes,
-                "hdd-opts": self.hdd_opts,
-                "hdd-ops": self.hdd_ops,
-                "hdd-write-size": self.hdd_write_size,
-            }
-        )
-
 
 @dataclass
 class IomixStressorParams(CommonStressorParams):
@@ -600,14 +653,6 @@ class IomixStressorParams(CommonStressorParams):
         ),
     ] = None
 
-    def to_jobfile(self) -> str:
-        return f"iomix {self.workers}\n" + params_to_jobfile(
-            {
-                "iomix-bytes": self.iomix_bytes,
-                "iomix-ops": self.iomix_ops,
-            }
-        )
-
 
 @dataclass
 class SockStressorParams(CommonStressorParams):
@@ -640,14 +685,196 @@ class SockStressorParams(CommonStressorParams):
         ),
     ] = None
 
-    def to_jobfile(self) -> str:
-        return f"sock {self.workers}\n" + params_to_jobfile(
-            {
-                "sock-domain": self.sock_domain,
-                "sock-opts": self.sock_opts,
-                "sock-ops": self.sock_ops,
-            }
-        )
+
+@dataclass
+class CyclicStressorParams(CommonStressorParams):
+    cyclic_method: typing.Annotated[
+        typing.Optional[CyclicMethod],
+        schema.id("cyclic-method"),
+        schema.name("Cyclic Method"),
+        schema.description(
+            "Method used to sleep between the wakeups whose latency is measured; "
+            "the default is 'clock_ns'"
+        ),
+    ] = None
+
+    cyclic_policy: typing.Annotated[
+        typing.Optional[CyclicPolicy],
+        schema.id("cyclic-policy"),
+        schema.name("Cyclic Policy"),
+        schema.description(
+            "Real-time scheduling policy of the cyclic workers ('deadline', 'fifo' "
+            "or 'rr'); the default is 'fifo'"
+        ),
+    ] = None
+
+    cyclic_prio: typing.Annotated[
+        typing.Optional[int],
+        schema.id("cyclic-prio"),
+        schema.name("Cyclic Priority"),
+        schema.description("Real-time scheduling priority, from 1 to 100"),
+        validation.min(1),
+        validation.max(100),
+    ] = None
+
+    cyclic_sleep: typing.Annotated[
+        typing.Optional[int],
+        schema.id("cyclic-sleep"),
+        schema.name("Cyclic Sleep"),
+        schema.description(
+            "Nanoseconds to sleep between the wakeups; the default is 10000"
+        ),
+    ] = None
+
+    cyclic_ops: typing.Annotated[
+        typing.Optional[int],
+        schema.id("cyclic-ops"),
+        schema.name("Cyclic Operations"),
+        schema.description(
+            "Number of latency measurements after which to stop the cyclic workers"
+        ),
+    ] = None
+
+
+@dataclass
+class SettleConditions:
+    package_temperature: typing.Annotated[
+        typing.Optional[float],
+        schema.id("package-temperature"),
+        schema.name("Package Temperature"),
+        schema.description("Hottest CPU package temperature in degrees Celsius"),
+    ] = None
+
+    cpu_frequency: typing.Annotated[
+        typing.Optional[float],
+        schema.id("cpu-frequency"),
+        schema.name("CPU Frequency"),
+        schema.description("Average current CPU frequency in MHz"),
+    ] = None
+
+    load_average: typing.Annotated[
+        typing.Optional[float],
+        schema.id("load-average"),
+        schema.name("Load Average"),
+        schema.description("One-minute load average"),
+    ] = None
+
+
+@dataclass
+class SettleParams:
+    temperature_tolerance: typing.Annotated[
+        float,
+        schema.id("temperature-tolerance"),
+        schema.name("Temperature Tolerance"),
+        schema.description(
+            "Degrees Celsius the package may be hotter than the baseline"
+        ),
+    ] = 5.0
+
+    frequency_tolerance: typing.Annotated[
+        float,
+        schema.id("frequency-tolerance"),
+        schema.name("Frequency Tolerance"),
+        schema.description(
+            "Percentage the average CPU frequency may deviate from the baseline"
+        ),
+    ] = 5.0
+
+    load_tolerance: typing.Annotated[
+        float,
+        schema.id("load-tolerance"),
+        schema.name("Load Tolerance"),
+        schema.description("How much the load average may exceed the baseline"),
+    ] = 0.5
+
+    max_wait: typing.Annotated[
+        int,
+        schema.id("max-wait"),
+        schema.name("Maximum Wait"),
+        schema.description("Seconds to wait at most for the host to settle"),
+        validation.min(0),
+    ] = 120
+
+    idle_temperature: typing.Annotated[
+        float,
+        schema.id("idle-temperature"),
+        schema.name("Idle Temperature"),
+        schema.description(
+            "Package temperature in degrees Celsius of the idle host when no "
+            "baseline is given; the load average of the idle host is then 0 and "
+            "the frequency is not checked"
+        ),
+    ] = 45.0
+
+    baseline: typing.Annotated[
+        typing.Optional[SettleConditions],
+        schema.name("Baseline"),
+        schema.description(
+            "Idle conditions to settle back to, measured on the tuned idle host; "
+            "by default, the idle temperature and no load"
+        ),
+    ] = None
+
+
+@dataclass
+class HygieneParams:
+    governor: typing.Annotated[
+        typing.Optional[str],
+        schema.name("CPU Frequency Governor"),
+        schema.description(
+            "cpufreq scaling governor to set on all CPUs during the run; empty to "
+            "leave the governors alone"
+        ),
+    ] = "performance"
+
+    drop_caches: typing.Annotated[
+        bool,
+        schema.id("drop-caches"),
+        schema.name("Drop Caches"),
+        schema.description(
+            "Write back and drop the page cache, dentries and inodes before "
+            "workloads with hdd or iomix stressors"
+        ),
+    ] = True
+
+    disable_aslr: typing.Annotated[
+        bool,
+        schema.id("disable-aslr"),
+        schema.name("Disable ASLR"),
+        schema.description("Disable address space layout randomization during the run"),
+    ] = False
+
+    disable_thp_defrag: typing.Annotated[
+        bool,
+        schema.id("disable-thp-defrag"),
+        schema.name("Disable THP Defrag"),
+        schema.description(
+            "Disable the direct compaction of transparent huge pages during the run"
+        ),
+    ] = False
+
+    idle_threshold: typing.Annotated[
+        int,
+        schema.id("idle-threshold"),
+        schema.name("Idle Threshold"),
+        schema.description(
+            "Percentage of CPU time in use system-wide below which the host counts "
+            "as idle"
+        ),
+        validation.min(1),
+        validation.max(100),
+    ] = 5
+
+    idle_timeout: typing.Annotated[
+        int,
+        schema.id("idle-timeout"),
+        schema.name("Idle Timeout"),
+        schema.description(
+            "Seconds to wait at most for the host to become idle before the run; "
+            "0 to not wait"
+        ),
+        validation.min(0),
+    ] = 30
 
 
 @dataclass
@@ -658,68 +885,85 @@ class StressNGParams:
         schema.description("Number of seconds after which to stop the stress test"),
     ]
 
-    stressors: typing.List[
-        typing.Annotated[
-            typing.Union[
-                typing.Annotated[
-                    CpuStressorParams,
-                    annotations.discriminator_value(Stressors.CPU.value),
-                    schema.name("CPU Stressor Parameters"),
-                    schema.description("Parameters for running the cpu stressor"),
-                ],
-                typing.Annotated[
-                    VmStressorParams,
-                    annotations.discriminator_value(Stressors.VM.value),
-                    schema.name("VM Stressor Parameters"),
-                    schema.description("Parameters for running the vm stressor"),
-                ],
-                typing.Annotated[
-                    MmapStressorParams,
-                    annotations.discriminator_value(Stressors.MMAP.value),
-                    schema.name("Mmap Stressor Parameters"),
-                    schema.description("Parameters for running the mmap stressor"),
-                ],
-                typing.Annotated[
-                    MatrixStressorParams,
-                    annotations.discriminator_value(Stressors.MATRIX.value),
-                    schema.name("Matrix Stressor Parameters"),
-                    schema.description("Parameters for running the matrix stressor"),
-                ],
-                typing.Annotated[
-                    MqStressorParams,
-                    annotations.discriminator_value(Stressors.MQ.value),
-                    schema.name("MQ Stressor Parameters"),
-                    schema.description("Parameters for running the mq stressor"),
+    stressors: typing.Annotated[
+        typing.List[
+            typing.Annotated[
+                typing.Union[
+                    typing.Annotated[
+                        CpuStressorParams,
+                        annotations.discriminator_value(Stressors.CPU.value),
+                        schema.name("CPU Stressor Parameters"),
+                        schema.description("Parameters for running the cpu stressor"),
+                    ],
+                    typing.Annotated[
+                        VmStressorParams,
+                        annotations.discriminator_value(Stressors.VM.value),
+                        schema.name("VM Stressor Parameters"),
+                        schema.description("Parameters for running the vm stressor"),
+                    ],
+                    typing.Annotated[
+                        MmapStressorParams,
+                        annotations.discriminator_value(Stressors.MMAP.value),
+                        schema.name("Mmap Stressor Parameters"),
+                        schema.description("Parameters for running the mmap stressor"),
+                    ],
+                    typing.Annotated[
+                        MatrixStressorParams,
+                        annotations.discriminator_value(Stressors.MATRIX.value),
+                        schema.name("Matrix Stressor Parameters"),
+                        schema.description(
+                            "Parameters for running the matrix stressor"
+                        ),
+                    ],
+                    typing.Annotated[
+                        MqStressorParams,
+                        annotations.discriminator_value(Stressors.MQ.value),
+                        schema.name("MQ Stressor Parameters"),
+                        schema.description("Parameters for running the mq stressor"),
+                    ],
+                    typing.Annotated[
+                        HDDStressorParams,
+                        annotations.discriminator_value(Stressors.HDD.value),
+                        schema.name("HDD Stressor Parameters"),
+                        schema.description("Parameters for running the hdd stressor"),
+                    ],
+                    typing.Annotated[
+                        IomixStressorParams,
+                        annotations.discriminator_value(Stressors.IOMIX.value),
+                        schema.name("IOMix Stressor Parameters"),
+                        schema.description("Parameters for running the iomix stressor"),
+                    ],
+                    typing.Annotated[
+                        SockStressorParams,
+                        annotations.discriminator_value(Stressors.SOCK.value),
+                        schema.name("Sock Stressor Parameters"),
+                        schema.description(
+                            "Parameters for running the socket stressor"
+                        ),
+                    ],
+                    typing.Annotated[
+                        CyclicStressorParams,
+                        annotations.discriminator_value(Stressors.CYCLIC.value),
+                        schema.name("Cyclic Stressor Parameters"),
+                        schema.description(
+                            "Parameters for running the cyclic real-time latency "
+                            "stressor"
+                        ),
+                    ],
                 ],
-                typing.Annotated[
-                    HDDStressorParams,
-                    annotations.discriminator_value(Stressors.HDD.value),
-                    schema.name("HDD Stressor Parameters"),
-                    schema.description("Parameters for running the hdd stressor"),
-                ],
-                typing.Annotated[
-                    IomixStressorParams,
-                    annotations.discriminator_value(Stressors.IOMIX.value),
-                    schema.name("IOMix Stressor Parameters"),
-                    schema.description("Parameters for running the iomix stressor"),
-                ],
-                typing.Annotated[
-                    SockStressorParams,
-                    annotations.discriminator_value(Stressors.SOCK.value),
-                    schema.name("Sock Stressor Parameters"),
-                    schema.description("Parameters for running the socket stressor"),
-                ],
-            ],
-            annotations.discriminator("stressor", discriminator_inlined=True),
-            schema.name("Stressors List"),
-            schema.description("List of stress-ng stressors and parameters"),
-        ]
+                annotations.discriminator("stressor", discriminator_inlined=True),
+                schema.name("Stressors List"),
+                schema.description("List of stress-ng stressors and parameters"),
+            ]
+        ],
+        plugin_parameter,
     ]
 
-    # The workdir and cleanup items are plugin-internal parameters that are not passed
-    # to the stress-ng command
+    # The items marked as plugin_parameter are plugin-internal parameters that
+    # are not passed to the stress-ng command
     workdir: typing.Annotated[
         typing.Optional[str],
+        plugin_parameter,
         schema.name("Working Directory"),
         schema.description(
             "Directory in which stress-ng will be executed "
@@ -727,14 +971,159 @@ class StressNGParams:
         ),
     ] = tempfile.gettempdir()
 
+    stressng_binary: typing.Annotated[
+        typing.Optional[str],
+        plugin_parameter,
+        schema.id("stressng-binary"),
+        schema.name("stress-ng Binary"),
+        schema.description(
+            "Path of the stress-ng executable to run, e.g. a newer build to compare "
+            "with the packaged one; by default /usr/bin/stress-ng. Options the "
+            "executable does not support are left out of the jobfile"
+        ),
+    ] = None
+
     cleanup: typing.Annotated[
         typing.Optional[bool],
+        plugin_parameter,
         schema.name("Cleanup"),
-        schema.description("Cleanup artifacts after the plugin run"),
+        schema.description(
+            "Remove temporary directories stress-ng left in the working directory "
+            "after the plugin run; the plugin's own control files are always removed"
+        ),
+    ] = False
+
+    export_format: typing.Annotated[
+        typing.Optional[ExportFormat],
+        schema.id("export-format"),
+        plugin_parameter,
+        schema.name("Export Format"),
+        schema.description(
+            "Additionally write the results to a file of the given format in the "
+            "working directory, with one row per stressor and one column per "
+            "system info and common stressor output field"
+        ),
+    ] = None
+
+    results_store: typing.Annotated[
+        typing.Optional[str],
+        plugin_parameter,
+        schema.id("results-store"),
+        schema.name("Results Store"),
+        schema.description(
+            "Path of an SQLite database to append the results of successful runs "
+            "to, for the trend-query step; it is created if it does not exist"
+        ),
+    ] = None
+
+    resource_policy: typing.Annotated[
+        typing.Optional[ResourcePolicy],
+        schema.id("resource-policy"),
+        plugin_parameter,
+        schema.name("Resource Policy"),
+        schema.description(
+            "What to do when the memory the vm and mmap stressors allocate or the "
+            "disk space the hdd and iomix stressors write exceeds the resource "
+            "headroom: 'warn' and run anyway, 'refuse' to run, or 'scale' the "
+            "per-worker sizes down to fit"
+        ),
+    ] = ResourcePolicy.WARN
+
+    worker_policy: typing.Annotated[
+        typing.Optional[WorkerPolicy],
+        schema.id("worker-policy"),
+        plugin_parameter,
+        schema.name("Worker Policy"),
+        schema.description(
+            "How stressors with 0 workers are sized: 'online' leaves it to "
+            "stress-ng, which starts one worker per online CPU, while 'auto' "
+            "starts one per CPU the container may actually use according to the "
+            "cgroup cpu.max quota, the cgroup cpuset and the taskset"
+        ),
+    ] = WorkerPolicy.ONLINE
+
+    process_accounting: typing.Annotated[
+        typing.Optional[bool],
+        schema.id("process-accounting"),
+        plugin_parameter,
+        schema.name("Process Accounting"),
+        schema.description(
+            "Track the stress-ng worker processes during the run and report their "
+            "context switches, page faults and I/O per stressor"
+        ),
+    ] = False
+
+    system_activity: typing.Annotated[
+        typing.Optional[bool],
+        schema.id("system-activity"),
+        plugin_parameter,
+        schema.name("System Activity"),
+        schema.description(
+            "Report the system-wide context switch, interrupt and softirq counts "
+            "of the run, per CPU, to spot interrupt storms on specific cores"
+        ),
     ] = False
 
-    # The below items need to be included in the to_jobfile function below so that the
-    # parameters are passed directly through to stress-ng as root parameters
+    pacing_calibration: typing.Annotated[
+        int,
+        schema.id("pacing-calibration"),
+        plugin_parameter,
+        schema.name("Pacing Calibration"),
+        schema.description(
+            "Seconds to run the stressors with a target rate unpaced first, to "
+            "measure their peak rate"
+        ),
+        validation.min(1),
+    ] = 5
+
+    hygiene: typing.Annotated[
+        typing.Optional[HygieneParams],
+        plugin_parameter,
+        schema.name("Hygiene"),
+        schema.description(
+            "Reduce run-to-run noise by tuning the host for the run (governor, "
+            "caches, ASLR, THP defrag) and waiting for it to become idle; the "
+            "original settings are restored afterwards"
+        ),
+    ] = None
+
+    settle: typing.Annotated[
+        typing.Optional[SettleParams],
+        plugin_parameter,
+        schema.name("Settle"),
+        schema.description(
+            "Before each run, wait until the package temperature, CPU frequency "
+            "and load average are back within a tolerance of the idle baseline"
+        ),
+    ] = None
+
+    watchdog_grace: typing.Annotated[
+        typing.Optional[int],
+        schema.id("watchdog-grace"),
+        plugin_parameter,
+        validation.min(0),
+        schema.name("Watchdog Grace Period"),
+        schema.description(
+            "Seconds past the timeout after which the stress-ng processes are "
+            "terminated with SIGINT, SIGTERM and finally SIGKILL"
+        ),
+    ] = 60
+
+    resource_headroom: typing.Annotated[
+        typing.Optional[int],
+        schema.id("resource-headroom"),
+        plugin_parameter,
+        validation.min(1),
+        validation.max(100),
+        schema.name("Resource Headroom"),
+        schema.description(
+            "Percentage of the available memory and of the free space of the "
+            "working directory's filesystem the stressors may use"
+        ),
+    ] = 90
+
+    # All other items are passed directly through to stress-ng as root parameters,
+    # named by their schema id
     page_in: typing.Annotated[
         typing.Optional[bool],
         schema.id("page-in"),
@@ -771,16 +1160,19 @@ class StressNGParams:
         schema.description("Brief version of the metrics output"),
     ] = None
 
+    def jobfile_lines(self) -> typing.List[str]:
+        lines = params_to_jobfile(self)
+        for stressor in self.stressors:
+            lines.extend(stressor.jobfile_lines())
+        return lines
+
     def to_jobfile(self) -> str:
-        return params_to_jobfile(
-            {
-                "timeout": self.timeout,
-                "page-in": self.page_in,
-                "taskset": self.taskset,
-                "verbose": self.verbose,
-                "metrics-brief": self.metrics_brief,
-            }
-        )
+        """Render the root parameters, without the stressors."""
+        return "".join(f"{line}\n" for line in params_to_jobfile(self))
+
+    def render_jobfile(self) -> str:
+        """Render the complete jobfile, including all the stressors."""
+        return "\n".join(self.jobfile_lines()) + "\n"
 
 
 @dataclass
@@ -1005,6 +1397,20 @@ class CommonOutput:
         ),
     ]
 
+    extra_metrics: typing.Annotated[
+        typing.Optional[typing.Dict[str, float]],
+        schema.id("extra-metrics"),
+        schema.name("Extra metrics"),
+        schema.description(
+            "All other numeric metrics stress-ng reported for the stressor, such as "
+            "per-method and miscellaneous metrics without a field of their own, "
+            "keyed by their stress-ng name"
+        ),
+    ] = None
+
+
+common_output_schema = plugin.build_object_schema(CommonOutput)
+
 
 @dataclass
 class VMOutput(CommonOutput):
@@ -1147,22 +1553,22 @@ class HDDOutput(CommonOutput):
     """
 
     mbsec_read_rate: typing.Annotated[
-        float,
+        typing.Optional[float],
         schema.id("mbsec-read-rate"),
         schema.name("Read rate in MB/s"),
-    ]
+    ] = None
 
     mbsec_write_rate: typing.Annotated[
-        float,
+        typing.Optional[float],
         schema.id("mbsec-write-rate"),
         schema.name("Write rate in MB/s"),
-    ]
+    ] = None
 
     mbsec_readwrite_combined_rate: typing.Annotated[
-        float,
+        typing.Optional[float],
         schema.id("mbsec-readwrite-combined-rate"),
         schema.name("Read-write combined rate in MB/s"),
-    ]
+    ] = None
 
 
 stressor_schemas[Stressors.HDD] = plugin.build_object_schema(HDDOutput)
@@ -1207,68 +1613,1850 @@ stressor_schemas[Stressors.SOCK] = plugin.build_object_schema(SockOutput)
 
 
 @dataclass
-class WorkloadResults:
-    test_config: typing.Annotated[
-        StressNGParams,
-        schema.name("Test configuration"),
-        schema.description("The stressng test parameters"),
-    ]
-
-    systeminfo: typing.Annotated[
-        SystemInfoOutput,
-        schema.name("System Info"),
-        schema.description("System info output object"),
-    ]
-
-    vminfo: typing.Annotated[
-        typing.Optional[VMOutput],
-        schema.name("VM Output"),
-        schema.description("VM stressor output object"),
-    ] = None
-
-    mmapinfo: typing.Annotated[
-        typing.Optional[MmapOutput],
-        schema.name("Mmap Output"),
-        schema.description("mmap stressor output object"),
-    ] = None
+class CyclicOutput(CommonOutput):
+    """
+    This is the data structure that holds the results for the cyclic stressor;
+    stress-ng only reports the latencies in its console output, from which the
+    plugin parses them
+    """
 
-    cpuinfo: typing.Annotated[
-        typing.Optional[CPUOutput],
-        schema.name("CPU Output"),
-        schema.description("CPU stressor output object"),
+    latency_mean: typing.Annotated[
+        typing.Optional[float],
+        schema.id("latency-mean"),
+        schema.name("Mean latency"),
+        schema.description("Mean wakeup latency in nanoseconds"),
     ] = None
 
-    matrixinfo: typing.Annotated[
-        typing.Optional[MatrixOutput],
-        schema.name("Matrix Output"),
-        schema.description("Matrix stressor output object"),
+    latency_min: typing.Annotated[
+        typing.Optional[int],
+        schema.id("latency-min"),
+        schema.name("Minimum latency"),
+        schema.description("Lowest wakeup latency in nanoseconds"),
     ] = None
 
-    mqinfo: typing.Annotated[
-        typing.Optional[MQOutput],
-        schema.name("MQ Output"),
-        schema.description("MQ stressor output object"),
+    latency_max: typing.Annotated[
+        typing.Optional[int],
+        schema.id("latency-max"),
+        schema.name("Maximum latency"),
+        schema.description("Highest wakeup latency in nanoseconds"),
     ] = None
 
-    hddinfo: typing.Annotated[
-        typing.Optional[HDDOutput],
-        schema.name("HDD Output"),
-        schema.description("HDD stressor output object"),
+    latency_percentiles: typing.Annotated[
+        typing.Optional[typing.Dict[str, int]],
+        schema.id("latency-percentiles"),
+        schema.name("Latency percentiles"),
+        schema.description(
+            "Wakeup latency in nanoseconds keyed by percentile, e.g. '99.00'"
+        ),
     ] = None
 
-    iomixinfo: typing.Annotated[
-        typing.Optional[IOMixOutput],
-        schema.name("IOMix Output"),
-        schema.description("IOMix stressor output object"),
-    ] = None
 
-    sockinfo: typing.Annotated[
-        typing.Optional[SockOutput],
-        schema.name("Sock Output"),
-        schema.description("Sock stressor output object"),
-    ] = None
+stressor_schemas[Stressors.CYCLIC] = plugin.build_object_schema(CyclicOutput)
 
 
 @dataclass
-class WorkloadError:
-    error: str
+class ResourceFootprint:
+    memory_bytes: typing.Annotated[
+        int,
+        schema.id("memory-bytes"),
+        schema.name("Memory Bytes"),
+        schema.description(
+            "Total memory the vm and mmap stressors allocate across all workers, "
+            "with percentage sizes taken of the available memory"
+        ),
+    ]
+
+    memory_available_bytes: typing.Annotated[
+        int,
+        schema.id("memory-available-bytes"),
+        schema.name("Memory Available Bytes"),
+        schema.description("Memory available on the host (MemAvailable)"),
+    ]
+
+    disk_bytes: typing.Annotated[
+        int,
+        schema.id("disk-bytes"),
+        schema.name("Disk Bytes"),
+        schema.description(
+            "Total disk space the hdd and iomix stressors write across all workers"
+        ),
+    ]
+
+    disk_available_bytes: typing.Annotated[
+        int,
+        schema.id("disk-available-bytes"),
+        schema.name("Disk Available Bytes"),
+        schema.description("Free space of the working directory's filesystem"),
+    ]
+
+
+@dataclass
+class SettleReport:
+    settled: typing.Annotated[
+        bool,
+        schema.name("Settled"),
+        schema.description(
+            "Whether the host settled, or the run started after the maximum wait"
+        ),
+    ]
+
+    waited: typing.Annotated[
+        float,
+        schema.name("Waited"),
+        schema.description("Seconds spent waiting for the host to settle"),
+    ]
+
+    baseline: typing.Annotated[
+        SettleConditions,
+        schema.name("Baseline"),
+        schema.description("The idle conditions settled back to"),
+    ]
+
+    start: typing.Annotated[
+        SettleConditions,
+        schema.name("Start"),
+        schema.description("The conditions when the run started"),
+    ]
+
+
+@dataclass
+class HostSetting:
+    path: typing.Annotated[
+        str,
+        schema.name("Path"),
+        schema.description("The sysfs or procfs file of the setting"),
+    ]
+
+    value: typing.Annotated[
+        str,
+        schema.name("Value"),
+        schema.description("The value set for the run"),
+    ]
+
+    original: typing.Annotated[
+        typing.Optional[str],
+        schema.name("Original"),
+        schema.description("The value before the run, restored afterwards"),
+    ] = None
+
+    restored: typing.Annotated[
+        bool,
+        schema.name("Restored"),
+        schema.description("Whether the original value was restored"),
+    ] = False
+
+    error: typing.Annotated[
+        typing.Optional[str],
+        schema.name("Error"),
+        schema.description("Why the setting could not be applied or restored"),
+    ] = None
+
+
+@dataclass
+class HygieneReport:
+    settings: typing.Annotated[
+        typing.List[HostSetting],
+        schema.name("Settings"),
+        schema.description("The host settings changed for the run"),
+    ]
+
+    caches_dropped: typing.Annotated[
+        bool,
+        schema.id("caches-dropped"),
+        schema.name("Caches Dropped"),
+        schema.description("Whether the caches were dropped before the run"),
+    ] = False
+
+    idle_wait: typing.Annotated[
+        typing.Optional[float],
+        schema.id("idle-wait"),
+        schema.name("Idle Wait"),
+        schema.description("Seconds waited for the host to become idle"),
+    ] = None
+
+    idle: typing.Annotated[
+        typing.Optional[bool],
+        schema.name("Idle"),
+        schema.description(
+            "Whether the host was idle when the run started, or timed out waiting"
+        ),
+    ] = None
+
+
+@dataclass
+class ResourceBudget:
+    policy: typing.Annotated[
+        ResourcePolicy,
+        schema.name("Policy"),
+        schema.description("The resource policy which was applied"),
+    ]
+
+    footprint: typing.Annotated[
+        ResourceFootprint,
+        schema.name("Resource Footprint"),
+        schema.description(
+            "Estimated memory and disk demand of the requested workload"
+        ),
+    ]
+
+    memory_scale: typing.Annotated[
+        float,
+        schema.id("memory-scale"),
+        schema.name("Memory Scale"),
+        schema.description(
+            "Factor the vm and mmap sizes were scaled by to fit the headroom"
+        ),
+    ] = 1.0
+
+    disk_scale: typing.Annotated[
+        float,
+        schema.id("disk-scale"),
+        schema.name("Disk Scale"),
+        schema.description(
+            "Factor the hdd and iomix sizes were scaled by to fit the headroom"
+        ),
+    ] = 1.0
+
+
+@dataclass
+class CpuBudget:
+    policy: typing.Annotated[
+        WorkerPolicy,
+        schema.name("Worker Policy"),
+        schema.description("The worker policy which was applied"),
+    ]
+
+    resolved_workers: typing.Annotated[
+        typing.Optional[int],
+        schema.id("resolved-workers"),
+        schema.name("Resolved Workers"),
+        schema.description(
+            "Number of workers the auto worker policy started for stressors with "
+            "0 workers"
+        ),
+    ] = None
+
+    cpu_quota: typing.Annotated[
+        typing.Optional[float],
+        schema.id("cpu-quota"),
+        schema.name("CPU Quota"),
+        schema.description("Number of CPUs the cgroup cpu.max quota allows"),
+    ] = None
+
+    cpuset: typing.Annotated[
+        typing.Optional[str],
+        schema.name("CPU Set"),
+        schema.description("The CPUs of the effective cgroup cpuset"),
+    ] = None
+
+    nr_throttled: typing.Annotated[
+        typing.Optional[int],
+        schema.id("nr-throttled"),
+        schema.name("Throttled Periods"),
+        schema.description(
+            "Number of cgroup CPU periods in which the workload was throttled"
+        ),
+    ] = None
+
+    throttled_usec: typing.Annotated[
+        typing.Optional[int],
+        schema.id("throttled-usec"),
+        schema.name("Throttled Microseconds"),
+        schema.description("Total time the cgroup was throttled during the run"),
+    ] = None
+
+
+@dataclass
+class StressNGBinary:
+    path: typing.Annotated[
+        str,
+        schema.name("Path"),
+        schema.description("Path of the stress-ng executable, with symlinks resolved"),
+    ]
+
+    version: typing.Annotated[
+        typing.Optional[str],
+        schema.name("Version"),
+        schema.description("Version the executable reports, if it reports one"),
+    ] = None
+
+    unsupported_options: typing.Annotated[
+        typing.Optional[typing.List[str]],
+        schema.id("unsupported-options"),
+        schema.name("Unsupported Options"),
+        schema.description(
+            "Jobfile lines which were left out because the executable does not "
+            "support the option"
+        ),
+    ] = None
+
+
+@dataclass
+class ProcessAccounting:
+    stressor: typing.Annotated[
+        str,
+        schema.name("Stressor"),
+        schema.description("Name of the stressor"),
+    ]
+
+    processes: typing.Annotated[
+        int,
+        schema.name("Processes"),
+        schema.description("Number of processes of the stressor that were seen"),
+    ] = 0
+
+    voluntary_ctxt_switches: typing.Annotated[
+        int,
+        schema.id("voluntary-ctxt-switches"),
+        schema.name("Voluntary Context Switches"),
+        schema.description("Context switches because a process blocked"),
+    ] = 0
+
+    nonvoluntary_ctxt_switches: typing.Annotated[
+        int,
+        schema.id("nonvoluntary-ctxt-switches"),
+        schema.name("Involuntary Context Switches"),
+        schema.description("Context switches because a process was preempted"),
+    ] = 0
+
+    minor_faults: typing.Annotated[
+        int,
+        schema.id("minor-faults"),
+        schema.name("Minor Faults"),
+        schema.description("Page faults which did not require I/O"),
+    ] = 0
+
+    major_faults: typing.Annotated[
+        int,
+        schema.id("major-faults"),
+        schema.name("Major Faults"),
+        schema.description("Page faults which required I/O"),
+    ] = 0
+
+    read_bytes: typing.Annotated[
+        typing.Optional[int],
+        schema.id("read-bytes"),
+        schema.name("Read Bytes"),
+        schema.description("Bytes read from the storage layer (/proc/<pid>/io)"),
+    ] = None
+
+    write_bytes: typing.Annotated[
+        typing.Optional[int],
+        schema.id("write-bytes"),
+        schema.name("Write Bytes"),
+        schema.description("Bytes written to the storage layer (/proc/<pid>/io)"),
+    ] = None
+
+    read_syscalls: typing.Annotated[
+        typing.Optional[int],
+        schema.id("read-syscalls"),
+        schema.name("Read Syscalls"),
+        schema.description("Number of read-type system calls"),
+    ] = None
+
+    write_syscalls: typing.Annotated[
+        typing.Optional[int],
+        schema.id("write-syscalls"),
+        schema.name("Write Syscalls"),
+        schema.description("Number of write-type system calls"),
+    ] = None
+
+    io_syscalls_per_second: typing.Annotated[
+        typing.Optional[float],
+        schema.id("io-syscalls-per-second"),
+        schema.name("I/O Syscalls per Second"),
+        schema.description(
+            "Estimated rate of read- and write-type system calls over the run"
+        ),
+    ] = None
+
+
+@dataclass
+class SystemActivity:
+    context_switches: typing.Annotated[
+        int,
+        schema.id("context-switches"),
+        schema.name("Context Switches"),
+        schema.description("Context switches on all CPUs during the run"),
+    ]
+
+    interrupts: typing.Annotated[
+        int,
+        schema.name("Interrupts"),
+        schema.description("Interrupts serviced on all CPUs during the run"),
+    ]
+
+    softirqs: typing.Annotated[
+        int,
+        schema.name("Softirqs"),
+        schema.description("Softirqs handled on all CPUs during the run"),
+    ]
+
+    forks: typing.Annotated[
+        int,
+        schema.name("Forks"),
+        schema.description("Processes and threads created during the run"),
+    ]
+
+    procs_running: typing.Annotated[
+        typing.Optional[int],
+        schema.id("procs-running"),
+        schema.name("Peak Runnable Processes"),
+        schema.description("Highest number of runnable processes seen during the run"),
+    ] = None
+
+    procs_blocked: typing.Annotated[
+        typing.Optional[int],
+        schema.id("procs-blocked"),
+        schema.name("Peak Blocked Processes"),
+        schema.description(
+            "Highest number of processes blocked on I/O seen during the run"
+        ),
+    ] = None
+
+    cpu_interrupts: typing.Annotated[
+        typing.Optional[typing.List[int]],
+        schema.id("cpu-interrupts"),
+        schema.name("Interrupts per CPU"),
+        schema.description("Interrupts serviced on each CPU, indexed by CPU"),
+    ] = None
+
+    cpu_softirqs: typing.Annotated[
+        typing.Optional[typing.List[int]],
+        schema.id("cpu-softirqs"),
+        schema.name("Softirqs per CPU"),
+        schema.description("Softirqs handled on each CPU, indexed by CPU"),
+    ] = None
+
+    interrupt_imbalance: typing.Annotated[
+        typing.Optional[float],
+        schema.id("interrupt-imbalance"),
+        schema.name("Interrupt Imbalance"),
+        schema.description(
+            "Interrupts of the busiest CPU relative to the average CPU; 1.0 means "
+            "evenly spread, the number of CPUs means all on one CPU"
+        ),
+    ] = None
+
+    softirq_imbalance: typing.Annotated[
+        typing.Optional[float],
+        schema.id("softirq-imbalance"),
+        schema.name("Softirq Imbalance"),
+        schema.description("Softirqs of the busiest CPU relative to the average CPU"),
+    ] = None
+
+    busiest_interrupt_cpu: typing.Annotated[
+        typing.Optional[int],
+        schema.id("busiest-interrupt-cpu"),
+        schema.name("Busiest Interrupt CPU"),
+        schema.description("CPU which serviced the most interrupts"),
+    ] = None
+
+    busiest_softirq_cpu: typing.Annotated[
+        typing.Optional[int],
+        schema.id("busiest-softirq-cpu"),
+        schema.name("Busiest Softirq CPU"),
+        schema.description("CPU which handled the most softirqs"),
+    ] = None
+
+    softirq_types: typing.Annotated[
+        typing.Optional[typing.Dict[str, int]],
+        schema.id("softirq-types"),
+        schema.name("Softirq Types"),
+        schema.description("Softirqs handled during the run by type, e.g. NET_RX"),
+    ] = None
+
+    top_interrupts: typing.Annotated[
+        typing.Optional[typing.Dict[str, int]],
+        schema.id("top-interrupts"),
+        schema.name("Top Interrupts"),
+        schema.description("The interrupt sources which fired the most during the run"),
+    ] = None
+
+
+@dataclass
+class PacingResult:
+    stressor: typing.Annotated[
+        str,
+        schema.name("Stressor"),
+        schema.description("Name of the stressor"),
+    ]
+
+    offered_ops_per_second: typing.Annotated[
+        float,
+        schema.id("offered-ops-per-second"),
+        schema.name("Offered Operations per Second"),
+        schema.description("Target rate of bogo operations per second"),
+    ]
+
+    peak_ops_per_second: typing.Annotated[
+        float,
+        schema.id("peak-ops-per-second"),
+        schema.name("Peak Operations per Second"),
+        schema.description("Unpaced rate measured in the calibration run"),
+    ]
+
+    duty_cycle: typing.Annotated[
+        float,
+        schema.id("duty-cycle"),
+        schema.name("Duty Cycle"),
+        schema.description(
+            "Fraction of the time the workers were allowed to run (cpu-load for "
+            "the cpu stressor, SIGSTOP/SIGCONT for the others)"
+        ),
+    ]
+
+    achieved_ops_per_second: typing.Annotated[
+        typing.Optional[float],
+        schema.id("achieved-ops-per-second"),
+        schema.name("Achieved Operations per Second"),
+        schema.description("Rate of bogo operations per second of the paced run"),
+    ] = None
+
+    pacing_error: typing.Annotated[
+        typing.Optional[float],
+        schema.id("pacing-error"),
+        schema.name("Pacing Error"),
+        schema.description(
+            "Deviation of the achieved from the offered rate, in percent of the "
+            "offered rate"
+        ),
+    ] = None
+
+
+@dataclass
+class StressorStatus:
+    stressor: typing.Annotated[
+        str,
+        schema.name("Stressor"),
+        schema.description("Name of the stressor"),
+    ]
+
+    status: typing.Annotated[
+        StressorState,
+        schema.name("Status"),
+        schema.description("Outcome of the stressor as reported by stress-ng"),
+    ]
+
+    passed_instances: typing.Annotated[
+        int,
+        schema.id("passed-instances"),
+        schema.name("Passed Instances"),
+        schema.description("Number of instances of the stressor that passed"),
+    ] = 0
+
+    failed_instances: typing.Annotated[
+        int,
+        schema.id("failed-instances"),
+        schema.name("Failed Instances"),
+        schema.description("Number of instances of the stressor that failed"),
+    ] = 0
+
+    skipped_instances: typing.Annotated[
+        int,
+        schema.id("skipped-instances"),
+        schema.name("Skipped Instances"),
+        schema.description("Number of instances of the stressor that were skipped"),
+    ] = 0
+
+    oom_killed: typing.Annotated[
+        bool,
+        schema.id("oom-killed"),
+        schema.name("OOM Killed"),
+        schema.description("Whether the OOM killer killed workers of the stressor"),
+    ] = False
+
+    reason: typing.Annotated[
+        typing.Optional[str],
+        schema.name("Reason"),
+        schema.description("Why the stressor did not pass"),
+    ] = None
+
+
+@dataclass
+class WorkloadResults:
+    test_config: typing.Annotated[
+        StressNGParams,
+        schema.name("Test configuration"),
+        schema.description("The stressng test parameters"),
+    ]
+
+    systeminfo: typing.Annotated[
+        SystemInfoOutput,
+        schema.name("System Info"),
+        schema.description("System info output object"),
+    ]
+
+    settle: typing.Annotated[
+        typing.Optional[SettleReport],
+        schema.name("Settle"),
+        schema.description("Time spent settling and the start conditions of the run"),
+    ] = None
+
+    vminfo: typing.Annotated[
+        typing.Optional[VMOutput],
+        schema.name("VM Output"),
+        schema.description("VM stressor output object"),
+    ] = None
+
+    mmapinfo: typing.Annotated[
+        typing.Optional[MmapOutput],
+        schema.name("Mmap Output"),
+        schema.description("mmap stressor output object"),
+    ] = None
+
+    cpuinfo: typing.Annotated[
+        typing.Optional[CPUOutput],
+        schema.name("CPU Output"),
+        schema.description("CPU stressor output object"),
+    ] = None
+
+    matrixinfo: typing.Annotated[
+        typing.Optional[MatrixOutput],
+        schema.name("Matrix Output"),
+        schema.description("Matrix stressor output object"),
+    ] = None
+
+    mqinfo: typing.Annotated[
+        typing.Optional[MQOutput],
+        schema.name("MQ Output"),
+        schema.description("MQ stressor output object"),
+    ] = None
+
+    hddinfo: typing.Annotated[
+        typing.Optional[HDDOutput],
+        schema.name("HDD Output"),
+        schema.description("HDD stressor output object"),
+    ] = None
+
+    iomixinfo: typing.Annotated[
+        typing.Optional[IOMixOutput],
+        schema.name("IOMix Output"),
+        schema.description("IOMix stressor output object"),
+    ] = None
+
+    sockinfo: typing.Annotated[
+        typing.Optional[SockOutput],
+        schema.name("Sock Output"),
+        schema.description("Sock stressor output object"),
+    ] = None
+
+    cyclicinfo: typing.Annotated[
+        typing.Optional[CyclicOutput],
+        schema.name("Cyclic Output"),
+        schema.description("Cyclic stressor output object"),
+    ] = None
+
+    export_file: typing.Annotated[
+        typing.Optional[str],
+        schema.id("export-file"),
+        schema.name("Export File"),
+        schema.description("Path of the file the results were exported to"),
+    ] = None
+
+    resource_budget: typing.Annotated[
+        typing.Optional[ResourceBudget],
+        schema.id("resource-budget"),
+        schema.name("Resource Budget"),
+        schema.description("Resource footprint check done before the run"),
+    ] = None
+
+    stressor_status: typing.Annotated[
+        typing.Optional[typing.List[StressorStatus]],
+        schema.id("stressor-status"),
+        schema.name("Stressor Status"),
+        schema.description(
+            "Outcome of each stressor; the outputs of failed stressors are omitted"
+        ),
+    ] = None
+
+    process_accounting: typing.Annotated[
+        typing.Optional[typing.List[ProcessAccounting]],
+        schema.id("process-accounting"),
+        schema.name("Process Accounting"),
+        schema.description(
+            "Kernel-side activity of the worker processes of each stressor"
+        ),
+    ] = None
+
+    system_activity: typing.Annotated[
+        typing.Optional[SystemActivity],
+        schema.id("system-activity"),
+        schema.name("System Activity"),
+        schema.description(
+            "System-wide scheduler, interrupt and softirq activity during the run"
+        ),
+    ] = None
+
+    pacing: typing.Annotated[
+        typing.Optional[typing.List[PacingResult]],
+        schema.name("Pacing"),
+        schema.description(
+            "Offered and achieved rate of the stressors with a target rate"
+        ),
+    ] = None
+
+    hygiene: typing.Annotated[
+        typing.Optional[HygieneReport],
+        schema.name("Hygiene"),
+        schema.description("Host settings applied for the run, for reproducibility"),
+    ] = None
+
+    cpu_budget: typing.Annotated[
+        typing.Optional[CpuBudget],
+        schema.id("cpu-budget"),
+        schema.name("CPU Budget"),
+        schema.description("Worker sizing and cgroup CPU throttling of the run"),
+    ] = None
+
+    oom_kills: typing.Annotated[
+        typing.Optional[int],
+        schema.id("oom-kills"),
+        schema.name("OOM Kills"),
+        schema.description(
+            "Number of processes the OOM killer killed during the run, in the "
+            "plugin's cgroup or, without cgroup v2, on the whole system"
+        ),
+    ] = None
+
+    binary: typing.Annotated[
+        typing.Optional[StressNGBinary],
+        schema.name("stress-ng Binary"),
+        schema.description("The stress-ng executable the workload ran with"),
+    ] = None
+
+
+@dataclass
+class PlanResults:
+    jobfile: typing.Annotated[
+        str,
+        schema.name("Jobfile"),
+        schema.description("The jobfile stress-ng would be run with"),
+    ]
+
+    cpus_online: typing.Annotated[
+        typing.List[int],
+        schema.id("cpus-online"),
+        schema.name("Online CPUs"),
+        schema.description("The CPUs which are online on the host"),
+    ]
+
+    footprint: typing.Annotated[
+        ResourceFootprint,
+        schema.name("Resource Footprint"),
+        schema.description("Estimated memory and disk demand of the workload"),
+    ]
+
+    warnings: typing.Annotated[
+        typing.List[str],
+        schema.name("Warnings"),
+        schema.description("Problems which do not prevent the workload from running"),
+    ]
+
+    binary: typing.Annotated[
+        typing.Optional[StressNGBinary],
+        schema.name("stress-ng Binary"),
+        schema.description("The stress-ng executable the jobfile was validated with"),
+    ] = None
+
+
+@dataclass
+class MethodBreakdownParams:
+    workload: typing.Annotated[
+        StressNGParams,
+        schema.name("Workload"),
+        schema.description(
+            "The workload whose cpu, vm and matrix stressors are broken down by "
+            "method; its timeout is the total run time of the breakdown"
+        ),
+    ]
+
+    cpu_methods: typing.Annotated[
+        typing.Optional[typing.List[CpuMethod]],
+        schema.id("cpu-methods"),
+        schema.name("CPU Methods"),
+        schema.description("The cpu stressor methods to measure separately"),
+    ] = None
+
+    vm_methods: typing.Annotated[
+        typing.Optional[typing.List[VmMethod]],
+        schema.id("vm-methods"),
+        schema.name("VM Methods"),
+        schema.description("The vm stressor methods to measure separately"),
+    ] = None
+
+    matrix_methods: typing.Annotated[
+        typing.Optional[typing.List[MatrixMethod]],
+        schema.id("matrix-methods"),
+        schema.name("Matrix Methods"),
+        schema.description("The matrix stressor methods to measure separately"),
+    ] = None
+
+
+@dataclass
+class MethodBreakdownEntry:
+    stressor: typing.Annotated[
+        str,
+        schema.name("Stressor"),
+        schema.description("Name of the stressor"),
+    ]
+
+    method: typing.Annotated[
+        str,
+        schema.name("Method"),
+        schema.description("The stressor method run in this time slice"),
+    ]
+
+    bogo_ops_per_second_real_time: typing.Annotated[
+        typing.Optional[float],
+        schema.id("bogo-ops-per-second-real-time"),
+        schema.name("Bogus operations per second in real time"),
+        schema.description("Bogo operations per second based on wall clock run time"),
+    ] = None
+
+    bogo_ops_per_second_usr_sys_time: typing.Annotated[
+        typing.Optional[float],
+        schema.id("bogo-ops-per-second-usr-sys-time"),
+        schema.name("Bogus operations per second in user and sys time"),
+        schema.description(
+            "Bogo operations per second based on cumulative user and system time"
+        ),
+    ] = None
+
+    error: typing.Annotated[
+        typing.Optional[str],
+        schema.name("Error"),
+        schema.description("Why the method could not be measured"),
+    ] = None
+
+
+@dataclass
+class MethodBreakdownResults:
+    slice_timeout: typing.Annotated[
+        int,
+        schema.id("slice-timeout"),
+        schema.name("Slice Timeout"),
+        schema.description("Seconds each method was run for"),
+    ]
+
+    methods: typing.Annotated[
+        typing.List[MethodBreakdownEntry],
+        schema.name("Methods"),
+        schema.description("Throughput of each stressor method"),
+    ]
+
+    systeminfo: typing.Annotated[
+        typing.Optional[SystemInfoOutput],
+        schema.name("System Info"),
+        schema.description("System info output object of the first time slice"),
+    ] = None
+
+
+@dataclass
+class LoadProfileParams:
+    workload: typing.Annotated[
+        StressNGParams,
+        schema.name("Workload"),
+        schema.description(
+            "The workload whose cpu stressors follow the load profile; its timeout "
+            "is the total run time of the profile"
+        ),
+    ]
+
+    shape: typing.Annotated[
+        LoadShape,
+        schema.name("Shape"),
+        schema.description(
+            "step: the given loads one after another; ramp: linear from the "
+            "minimum to the maximum load; sine: a sinusoid between the minimum "
+            "and maximum load; burst: the maximum load for the duty cycle of each "
+            "period, the minimum load for the rest"
+        ),
+    ]
+
+    segment_duration: typing.Annotated[
+        int,
+        schema.id("segment-duration"),
+        schema.name("Segment Duration"),
+        schema.description(
+            "Seconds of each segment, the unit the load changes in; stress-ng is "
+            "restarted with the new load for each segment"
+        ),
+        validation.min(1),
+    ] = 10
+
+    loads: typing.Annotated[
+        typing.Optional[typing.List[int]],
+        schema.name("Loads"),
+        schema.description(
+            "Percentage loads of the step schedule, spread evenly over the timeout"
+        ),
+    ] = None
+
+    min_load: typing.Annotated[
+        int,
+        schema.id("min-load"),
+        schema.name("Minimum Load"),
+        schema.description("Lowest percentage load of the ramp, sine and burst"),
+        validation.min(0),
+        validation.max(100),
+    ] = 0
+
+    max_load: typing.Annotated[
+        int,
+        schema.id("max-load"),
+        schema.name("Maximum Load"),
+        schema.description("Highest percentage load of the ramp, sine and burst"),
+        validation.min(0),
+        validation.max(100),
+    ] = 100
+
+    period: typing.Annotated[
+        int,
+        schema.name("Period"),
+        schema.description("Seconds of one cycle of the sine or burst"),
+        validation.min(1),
+    ] = 60
+
+    duty_cycle: typing.Annotated[
+        int,
+        schema.id("duty-cycle"),
+        schema.name("Duty Cycle"),
+        schema.description("Percentage of each burst period at the maximum load"),
+        validation.min(0),
+        validation.max(100),
+    ] = 50
+
+
+@dataclass
+class LoadProfileSegment:
+    start: typing.Annotated[
+        int,
+        schema.name("Start"),
+        schema.description("Seconds from the start of the profile"),
+    ]
+
+    offered_load: typing.Annotated[
+        int,
+        schema.id("offered-load"),
+        schema.name("Offered Load"),
+        schema.description("Percentage load the cpu stressors were asked for"),
+    ]
+
+    achieved_load: typing.Annotated[
+        typing.Optional[float],
+        schema.id("achieved-load"),
+        schema.name("Achieved Load"),
+        schema.description(
+            "Average CPU usage per instance of the cpu stressors in percent"
+        ),
+    ] = None
+
+    bogo_ops_per_second_real_time: typing.Annotated[
+        typing.Optional[float],
+        schema.id("bogo-ops-per-second-real-time"),
+        schema.name("Bogus operations per second in real time"),
+        schema.description(
+            "Bogo operations per second of the cpu stressors based on wall clock "
+            "run time"
+        ),
+    ] = None
+
+    error: typing.Annotated[
+        typing.Optional[str],
+        schema.name("Error"),
+        schema.description("Why the segment could not be measured"),
+    ] = None
+
+
+@dataclass
+class LoadProfileResults:
+    segment_duration: typing.Annotated[
+        int,
+        schema.id("segment-duration"),
+        schema.name("Segment Duration"),
+        schema.description("Seconds each segment was run for"),
+    ]
+
+    segments: typing.Annotated[
+        typing.List[LoadProfileSegment],
+        schema.name("Segments"),
+        schema.description("Offered and achieved load of each segment"),
+    ]
+
+    systeminfo: typing.Annotated[
+        typing.Optional[SystemInfoOutput],
+        schema.name("System Info"),
+        schema.description("System info output object of the first segment"),
+    ] = None
+
+
+class SearchKnob(str, enum.Enum):
+    WORKERS = "workers"
+    CPU_LOAD = "cpu-load"
+
+
+@dataclass
+class SearchParams:
+    workload: typing.Annotated[
+        StressNGParams,
+        schema.name("Workload"),
+        schema.description(
+            "The workload to search the operating point of; it has to include a "
+            "cyclic stressor as the latency probe"
+        ),
+    ]
+
+    latency_slo: typing.Annotated[
+        int,
+        schema.id("latency-slo"),
+        schema.name("Latency SLO"),
+        schema.description(
+            "Highest acceptable latency of the cyclic probe at the percentile, in "
+            "nanoseconds"
+        ),
+        validation.min(1),
+    ]
+
+    stressor: typing.Annotated[
+        Stressors,
+        schema.name("Stressor"),
+        schema.description("The stressor of the workload whose intensity is searched"),
+    ] = Stressors.CPU
+
+    knob: typing.Annotated[
+        SearchKnob,
+        schema.name("Knob"),
+        schema.description(
+            "The intensity to search: the worker count of the stressor, or the "
+            "cpu-load of the cpu stressor"
+        ),
+    ] = SearchKnob.WORKERS
+
+    low: typing.Annotated[
+        int,
+        schema.name("Low"),
+        schema.description("Lowest intensity to search"),
+        validation.min(1),
+    ] = 1
+
+    high: typing.Annotated[
+        typing.Optional[int],
+        schema.name("High"),
+        schema.description(
+            "Highest intensity to search; the default is the number of online CPUs "
+            "for workers and 100 for cpu-load"
+        ),
+        validation.min(1),
+    ] = None
+
+    percentile: typing.Annotated[
+        float,
+        schema.name("Percentile"),
+        schema.description(
+            "Latency percentile to hold to the SLO, one of those stress-ng reports "
+            "(25, 50, 75, 90, 95.4, 99, 99.5, 99.9 and 99.99)"
+        ),
+    ] = 99.0
+
+    tolerance: typing.Annotated[
+        int,
+        schema.name("Tolerance"),
+        schema.description(
+            "Stop when the highest passing and the lowest failing intensity are "
+            "at most this far apart"
+        ),
+        validation.min(1),
+    ] = 1
+
+    max_probes: typing.Annotated[
+        int,
+        schema.id("max-probes"),
+        schema.name("Maximum Probes"),
+        schema.description("Highest number of workload runs of the search"),
+        validation.min(2),
+    ] = 8
+
+
+@dataclass
+class SearchProbe:
+    value: typing.Annotated[
+        int,
+        schema.name("Value"),
+        schema.description("The intensity the workload was run at"),
+    ]
+
+    passed: typing.Annotated[
+        bool,
+        schema.name("Passed"),
+        schema.description("Whether the latency stayed within the SLO"),
+    ]
+
+    latency: typing.Annotated[
+        typing.Optional[int],
+        schema.name("Latency"),
+        schema.description("Latency of the cyclic probe at the percentile in ns"),
+    ] = None
+
+    bogo_ops_per_second_real_time: typing.Annotated[
+        typing.Optional[float],
+        schema.id("bogo-ops-per-second-real-time"),
+        schema.name("Bogus operations per second in real time"),
+        schema.description(
+            "Bogo operations per second of the searched stressor based on wall "
+            "clock run time"
+        ),
+    ] = None
+
+    error: typing.Annotated[
+        typing.Optional[str],
+        schema.name("Error"),
+        schema.description("Why the workload run failed; such probes fail"),
+    ] = None
+
+
+@dataclass
+class SearchResults:
+    probes: typing.Annotated[
+        typing.List[SearchProbe],
+        schema.name("Probes"),
+        schema.description("The workload runs of the search, in order"),
+    ]
+
+    operating_point: typing.Annotated[
+        typing.Optional[int],
+        schema.id("operating-point"),
+        schema.name("Operating Point"),
+        schema.description(
+            "Highest intensity found to keep the latency within the SLO; missing "
+            "if even the lowest intensity violates it"
+        ),
+    ] = None
+
+    systeminfo: typing.Annotated[
+        typing.Optional[SystemInfoOutput],
+        schema.name("System Info"),
+        schema.description("System info output object of the first probe"),
+    ] = None
+
+
+@dataclass
+class InterferenceParams:
+    workload: typing.Annotated[
+        StressNGParams,
+        schema.name("Workload"),
+        schema.description(
+            "The workload whose stressors are run alone and in every pair; its "
+            "timeout is the run time of each run"
+        ),
+    ]
+
+    pin: typing.Annotated[
+        bool,
+        schema.name("Pin"),
+        schema.description(
+            "Pin the stressors of a pair to disjoint, equally sized halves of the "
+            "CPUs, as two concurrent stress-ng runs; each stressor is also run "
+            "alone on each half it runs on in the pairs"
+        ),
+    ] = False
+
+
+@dataclass
+class InterferenceRow:
+    stressor: typing.Annotated[
+        str,
+        schema.name("Stressor"),
+        schema.description("Name of the stressor"),
+    ]
+
+    solo_ops_per_second: typing.Annotated[
+        typing.Optional[float],
+        schema.id("solo-ops-per-second"),
+        schema.name("Solo Operations per Second"),
+        schema.description(
+            "Bogo operations per second in real time of the stressor running "
+            "alone; pinned, the mean over the halves of the CPUs it ran on"
+        ),
+    ] = None
+
+    paired_ops_per_second: typing.Annotated[
+        typing.Optional[typing.Dict[str, float]],
+        schema.id("paired-ops-per-second"),
+        schema.name("Paired Operations per Second"),
+        schema.description(
+            "Bogo operations per second in real time of the stressor, keyed by the "
+            "stressor it ran with"
+        ),
+    ] = None
+
+    slowdown: typing.Annotated[
+        typing.Optional[typing.Dict[str, float]],
+        schema.name("Slowdown"),
+        schema.description(
+            "Solo rate on the same CPUs divided by the paired rate of the "
+            "stressor, keyed by the stressor it ran with; 1.0 means no "
+            "interference"
+        ),
+    ] = None
+
+
+@dataclass
+class InterferenceResults:
+    matrix: typing.Annotated[
+        typing.List[InterferenceRow],
+        schema.name("Matrix"),
+        schema.description(
+            "One row per stressor with its slowdown next to each other stressor"
+        ),
+    ]
+
+    errors: typing.Annotated[
+        typing.Optional[typing.List[str]],
+        schema.name("Errors"),
+        schema.description("Why some of the runs could not be measured"),
+    ] = None
+
+    systeminfo: typing.Annotated[
+        typing.Optional[SystemInfoOutput],
+        schema.name("System Info"),
+        schema.description("System info output object of the first run"),
+    ] = None
+
+
+@dataclass
+class Tunable:
+    knob: typing.Annotated[
+        str,
+        schema.name("Knob"),
+        schema.description(
+            "A sysctl name, e.g. vm.swappiness, or the path of a /proc/sys or /sys "
+            "file"
+        ),
+    ]
+
+    values: typing.Annotated[
+        typing.List[str],
+        schema.name("Values"),
+        schema.description("The values of the knob to compare"),
+        validation.min(1),
+    ]
+
+
+@dataclass
+class TunablesParams:
+    workload: typing.Annotated[
+        StressNGParams,
+        schema.name("Workload"),
+        schema.description("The workload to run for each combination of values"),
+    ]
+
+    tunables: typing.Annotated[
+        typing.List[Tunable],
+        schema.name("Tunables"),
+        schema.description(
+            "The knobs to vary; every combination of their values is compared"
+        ),
+        validation.min(1),
+    ]
+
+    repetitions: typing.Annotated[
+        int,
+        schema.name("Repetitions"),
+        schema.description(
+            "Runs of each combination; each round runs all combinations in a new "
+            "random order to cancel out drift"
+        ),
+        validation.min(1),
+    ] = 3
+
+    seed: typing.Annotated[
+        typing.Optional[int],
+        schema.name("Seed"),
+        schema.description("Seed of the random run order, for repeatable schedules"),
+    ] = None
+
+    confidence: typing.Annotated[
+        float,
+        schema.name("Confidence"),
+        schema.description("Confidence level of the intervals, e.g. 0.95"),
+    ] = 0.95
+
+
+@dataclass
+class MetricSummary:
+    metric: typing.Annotated[
+        str,
+        schema.name("Metric"),
+        schema.description(
+            "<stressor>.<output field>, e.g. cpu.bogo-ops-per-second-real-time"
+        ),
+    ]
+
+    mean: typing.Annotated[
+        float,
+        schema.name("Mean"),
+        schema.description("Mean of the samples"),
+    ]
+
+    samples: typing.Annotated[
+        int,
+        schema.name("Samples"),
+        schema.description("Number of runs the metric was measured in"),
+    ]
+
+    ci_low: typing.Annotated[
+        typing.Optional[float],
+        schema.id("ci-low"),
+        schema.name("CI Low"),
+        schema.description("Lower bound of the Student t confidence interval"),
+    ] = None
+
+    ci_high: typing.Annotated[
+        typing.Optional[float],
+        schema.id("ci-high"),
+        schema.name("CI High"),
+        schema.description("Upper bound of the Student t confidence interval"),
+    ] = None
+
+
+@dataclass
+class TunableCombination:
+    settings: typing.Annotated[
+        typing.Dict[str, str],
+        schema.name("Settings"),
+        schema.description("The value of each knob"),
+    ]
+
+    metrics: typing.Annotated[
+        typing.List[MetricSummary],
+        schema.name("Metrics"),
+        schema.description("Throughput and latency of the runs of the combination"),
+    ]
+
+    errors: typing.Annotated[
+        typing.Optional[typing.List[str]],
+        schema.name("Errors"),
+        schema.description("Why some of the runs of the combination failed"),
+    ] = None
+
+
+@dataclass
+class TunableComparison:
+    knob: typing.Annotated[
+        str,
+        schema.name("Knob"),
+        schema.description("The knob compared"),
+    ]
+
+    value: typing.Annotated[
+        str,
+        schema.name("Value"),
+        schema.description("The value of the knob"),
+    ]
+
+    metrics: typing.Annotated[
+        typing.List[MetricSummary],
+        schema.name("Metrics"),
+        schema.description(
+            "Throughput and latency of all runs with the knob at the value, "
+            "whatever the other knobs were set to"
+        ),
+    ]
+
+
+@dataclass
+class TunablesResults:
+    combinations: typing.Annotated[
+        typing.List[TunableCombination],
+        schema.name("Combinations"),
+        schema.description("The results of each combination of knob values"),
+    ]
+
+    comparisons: typing.Annotated[
+        typing.List[TunableComparison],
+        schema.name("Comparisons"),
+        schema.description("The results of each value of each knob"),
+    ]
+
+    run_order: typing.Annotated[
+        typing.List[int],
+        schema.id("run-order"),
+        schema.name("Run Order"),
+        schema.description("Indexes into the combinations in the order they ran"),
+    ]
+
+    systeminfo: typing.Annotated[
+        typing.Optional[SystemInfoOutput],
+        schema.name("System Info"),
+        schema.description("System info output object of the first run"),
+    ] = None
+
+
+@dataclass
+class ProcessDiagnostics:
+    pid: typing.Annotated[
+        int,
+        schema.name("PID"),
+        schema.description("Process ID"),
+    ]
+
+    name: typing.Annotated[
+        str,
+        schema.name("Name"),
+        schema.description("Process name"),
+    ]
+
+    state: typing.Annotated[
+        str,
+        schema.name("State"),
+        schema.description(
+            "Process state from /proc/<pid>/status, e.g. D (disk sleep)"
+        ),
+    ]
+
+    wchan: typing.Annotated[
+        typing.Optional[str],
+        schema.name("Wait Channel"),
+        schema.description("Kernel function the process is waiting in"),
+    ] = None
+
+    stack: typing.Annotated[
+        typing.Optional[str],
+        schema.name("Kernel Stack"),
+        schema.description("Kernel stack of the process from /proc/<pid>/stack"),
+    ] = None
+
+
+@dataclass
+class WorkloadError:
+    error: str
+
+    diagnostics: typing.Annotated[
+        typing.Optional[typing.List[ProcessDiagnostics]],
+        schema.name("Diagnostics"),
+        schema.description(
+            "State of the stress-ng processes which were still running when the "
+            "watchdog terminated them"
+        ),
+    ] = None
+
+    partial_results: typing.Annotated[
+        typing.Optional[WorkloadResults],
+        schema.id("partial-results"),
+        schema.name("Partial Results"),
+        schema.description(
+            "Results stress-ng managed to write before it was terminated"
+        ),
+    ] = None
+
+    stressor_status: typing.Annotated[
+        typing.Optional[typing.List[StressorStatus]],
+        schema.id("stressor-status"),
+        schema.name("Stressor Status"),
+        schema.description("Outcome of each stressor"),
+    ] = None
+
+
+@dataclass
+class BatchParams:
+    workloads: typing.Annotated[
+        typing.List[StressNGParams],
+        schema.name("Workloads"),
+        schema.description("The workloads to run one after another"),
+        validation.min(1),
+    ]
+
+
+@dataclass
+class BatchEntry:
+    results: typing.Annotated[
+        typing.Optional[WorkloadResults],
+        schema.name("Results"),
+        schema.description("The results of the workload, if it succeeded"),
+    ] = None
+
+    error: typing.Annotated[
+        typing.Optional[WorkloadError],
+        schema.name("Error"),
+        schema.description("The error of the workload, if it failed"),
+    ] = None
+
+
+@dataclass
+class BatchResults:
+    entries: typing.Annotated[
+        typing.List[BatchEntry],
+        schema.name("Entries"),
+        schema.description("The outcome of each workload, in the order given"),
+    ]
+
+    failed: typing.Annotated[
+        int,
+        schema.name("Failed"),
+        schema.description("Number of workloads which failed"),
+    ] = 0
+
+
+@dataclass
+class TrendQueryParams:
+    store: typing.Annotated[
+        str,
+        schema.name("Results Store"),
+        schema.description("Path of the SQLite database the results were stored in"),
+    ]
+
+    stressor: typing.Annotated[
+        Stressors,
+        schema.name("Stressor"),
+        schema.description("Stressor whose metric to follow"),
+    ]
+
+    metric: typing.Annotated[
+        typing.Optional[str],
+        schema.name("Metric"),
+        schema.description(
+            "Schema id of the stressor output field (e.g. bogo-ops, max-rss), "
+            "stress-ng name of an extra metric, or latency-percentiles.<percentile> "
+            "of the cyclic stressor"
+        ),
+    ] = "bogo-ops-per-second-real-time"
+
+    hostname: typing.Annotated[
+        typing.Optional[str],
+        schema.name("Hostname"),
+        schema.description("Only include the runs on this host"),
+    ] = None
+
+    host_fingerprint: typing.Annotated[
+        typing.Optional[str],
+        schema.id("host-fingerprint"),
+        schema.name("Host Fingerprint"),
+        schema.description(
+            "Only include the runs on this host hardware and kernel, as reported in "
+            "the trend points"
+        ),
+    ] = None
+
+    config_hash: typing.Annotated[
+        typing.Optional[str],
+        schema.id("config-hash"),
+        schema.name("Configuration Hash"),
+        schema.description("Only include the runs of this jobfile"),
+    ] = None
+
+    since: typing.Annotated[
+        typing.Optional[int],
+        schema.name("Since"),
+        schema.description("Only include the runs from this epoch second on"),
+    ] = None
+
+    until: typing.Annotated[
+        typing.Optional[int],
+        schema.name("Until"),
+        schema.description("Only include the runs up to this epoch second"),
+    ] = None
+
+    baseline_window: typing.Annotated[
+        typing.Optional[int],
+        schema.id("baseline-window"),
+        schema.name("Baseline Window"),
+        schema.description(
+            "Number of preceding runs whose mean is the rolling baseline of a run"
+        ),
+        validation.min(1),
+    ] = 7
+
+
+@dataclass
+class TrendPoint:
+    run: typing.Annotated[
+        int,
+        schema.name("Run"),
+        schema.description("ID of the run in the results store"),
+    ]
+
+    epoch: typing.Annotated[
+        int,
+        schema.name("Epoch"),
+        schema.description("Start of the run, in epoch seconds"),
+    ]
+
+    hostname: typing.Annotated[
+        str,
+        schema.name("Hostname"),
+        schema.description("Host the run was on"),
+    ]
+
+    host_fingerprint: typing.Annotated[
+        str,
+        schema.id("host-fingerprint"),
+        schema.name("Host Fingerprint"),
+        schema.description(
+            "Hash of the host's hardware and kernel as stress-ng reported them, "
+            "without the hostname"
+        ),
+    ]
+
+    config_hash: typing.Annotated[
+        str,
+        schema.id("config-hash"),
+        schema.name("Configuration Hash"),
+        schema.description("Hash of the jobfile of the run"),
+    ]
+
+    value: typing.Annotated[
+        float,
+        schema.name("Value"),
+        schema.description("Value of the metric in the run"),
+    ]
+
+    baseline: typing.Annotated[
+        typing.Optional[float],
+        schema.name("Baseline"),
+        schema.description(
+            "Mean of the metric over the preceding runs of the baseline window; "
+            "none for the first run"
+        ),
+    ] = None
+
+    deviation: typing.Annotated[
+        typing.Optional[float],
+        schema.name("Deviation"),
+        schema.description("Percentage by which the value differs from the baseline"),
+    ] = None
+
+
+@dataclass
+class TrendResults:
+    stressor: typing.Annotated[
+        str,
+        schema.name("Stressor"),
+        schema.description("Stressor whose metric was followed"),
+    ]
+
+    metric: typing.Annotated[
+        str,
+        schema.name("Metric"),
+        schema.description("The metric which was followed"),
+    ]
+
+    points: typing.Annotated[
+        typing.List[TrendPoint],
+        schema.name("Points"),
+        schema.description(
+            "Value and baseline of the metric in each run, oldest first"
+        ),
+    ]
+
+
+@dataclass
+class ChangePointParams:
+    store: typing.Annotated[
+        str,
+        schema.name("Results Store"),
+        schema.description("Path of the SQLite database the results were stored in"),
+    ]
+
+    stressor: typing.Annotated[
+        Stressors,
+        schema.name("Stressor"),
+        schema.description("Stressor whose metrics to analyze"),
+    ]
+
+    metrics: typing.Annotated[
+        typing.Optional[typing.List[str]],
+        schema.name("Metrics"),
+        schema.description(
+            "Metrics to analyze, named as in the trend-query step; by default the "
+            "bogo-ops/s in real time and all stored rates of the stressor, such as "
+            "the hdd MB/s and matrix per-method rates"
+        ),
+    ] = None
+
+    hostname: typing.Annotated[
+        typing.Optional[str],
+        schema.name("Hostname"),
+        schema.description("Only include the runs on this host"),
+    ] = None
+
+    host_fingerprint: typing.Annotated[
+        typing.Optional[str],
+        schema.id("host-fingerprint"),
+        schema.name("Host Fingerprint"),
+        schema.description("Only include the runs on this host hardware and kernel"),
+    ] = None
+
+    config_hash: typing.Annotated[
+        typing.Optional[str],
+        schema.id("config-hash"),
+        schema.name("Configuration Hash"),
+        schema.description("Only include the runs of this jobfile"),
+    ] = None
+
+    since: typing.Annotated[
+        typing.Optional[int],
+        schema.name("Since"),
+        schema.description("Only include the runs from this epoch second on"),
+    ] = None
+
+    until: typing.Annotated[
+        typing.Optional[int],
+        schema.name("Until"),
+        schema.description("Only include the runs up to this epoch second"),
+    ] = None
+
+    permutations: typing.Annotated[
+        typing.Optional[int],
+        schema.name("Permutations"),
+        schema.description(
+            "Random orders of a segment of the series to test a shift in it against"
+        ),
+        validation.min(10),
+    ] = 500
+
+    significance: typing.Annotated[
+        typing.Optional[float],
+        schema.name("Significance"),
+        schema.description(
+            "Largest p-value of the first permutation test at which a shift is "
+            "reported; each further test of the series is at this level divided by "
+            "the number of tests so far"
+        ),
+        validation.min(0.0),
+        validation.max(1.0),
+    ] = 0.05
+
+    min_segment: typing.Annotated[
+        typing.Optional[int],
+        schema.id("min-segment"),
+        schema.name("Minimum Segment"),
+        schema.description("Fewest runs between two shifts and at either end"),
+        validation.min(2),
+    ] = 5
+
+    seed: typing.Annotated[
+        typing.Optional[int],
+        schema.name("Seed"),
+        schema.description("Seed of the permutations, for repeatable results"),
+    ] = None
+
+
+@dataclass
+class ChangePoint:
+    run: typing.Annotated[
+        int,
+        schema.name("Run"),
+        schema.description("ID in the results store of the first run after the shift"),
+    ]
+
+    epoch: typing.Annotated[
+        int,
+        schema.name("Epoch"),
+        schema.description("Start of the first run after the shift, in epoch seconds"),
+    ]
+
+    index: typing.Annotated[
+        int,
+        schema.name("Index"),
+        schema.description("Position of the first run after the shift in the series"),
+    ]
+
+    mean_before: typing.Annotated[
+        float,
+        schema.id("mean-before"),
+        schema.name("Mean Before"),
+        schema.description(
+            "Mean of the metric since the previous shift or the start of the series"
+        ),
+    ]
+
+    mean_after: typing.Annotated[
+        float,
+        schema.id("mean-after"),
+        schema.name("Mean After"),
+        schema.description(
+            "Mean of the metric until the next shift or the end of the series"
+        ),
+    ]
+
+    shift: typing.Annotated[
+        float,
+        schema.name("Shift"),
+        schema.description("Estimated size of the shift, mean after minus mean before"),
+    ]
+
+    shift_percent: typing.Annotated[
+        typing.Optional[float],
+        schema.id("shift-percent"),
+        schema.name("Shift Percent"),
+        schema.description("The shift as a percentage of the mean before"),
+    ] = None
+
+    p_value: typing.Annotated[
+        typing.Optional[float],
+        schema.id("p-value"),
+        schema.name("p-value"),
+        schema.description(
+            "Share of random orders of the segment with at least as large a shift"
+        ),
+    ] = None
+
+
+@dataclass
+class ChangePointSeries:
+    metric: typing.Annotated[
+        str,
+        schema.name("Metric"),
+        schema.description("The metric which was analyzed"),
+    ]
+
+    hostname: typing.Annotated[
+        str,
+        schema.name("Hostname"),
+        schema.description("Hostname of the latest run of the series"),
+    ]
+
+    host_fingerprint: typing.Annotated[
+        str,
+        schema.id("host-fingerprint"),
+        schema.name("Host Fingerprint"),
+        schema.description("Hash of the host hardware and kernel of the series"),
+    ]
+
+    config_hash: typing.Annotated[
+        str,
+        schema.id("config-hash"),
+        schema.name("Configuration Hash"),
+        schema.description("Hash of the jobfile of the series"),
+    ]
+
+    runs: typing.Annotated[
+        int,
+        schema.name("Runs"),
+        schema.description("Number of runs in the series"),
+    ]
+
+    change_points: typing.Annotated[
+        typing.List[ChangePoint],
+        schema.id("change-points"),
+        schema.name("Change Points"),
+        schema.description("The shifts found in the series, oldest first"),
+    ]
+
+
+@dataclass
+class ChangePointResults:
+    stressor: typing.Annotated[
+        str,
+        schema.name("Stressor"),
+        schema.description("Stressor whose metrics were analyzed"),
+    ]
+
+    series: typing.Annotated[
+        typing.List[ChangePointSeries],
+        schema.name("Series"),
+        schema.description(
+            "The change points of each metric in the runs of each host and jobfile"
+        ),
+    ]
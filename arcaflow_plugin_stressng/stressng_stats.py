@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+import itertools
+import math
+import random
+import statistics
+import typing
+
+
+def _beta_continued_fraction(a: float, b: float, x: float) -> float:
+    """Evaluate the continued fraction of the incomplete beta function with the
+    modified Lentz method."""
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1 / (d if abs(d) > tiny else tiny)
+    fraction = d
+    for m in range(1, 200):
+        for numerator in (
+            m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+            -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1)),
+        ):
+            d = 1 + numerator * d
+            d = 1 / (d if abs(d) > tiny else tiny)
+            c = 1 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            fraction *= c * d
+        if abs(c * d - 1) < 1e-12:
+            break
+    return fraction
+
+
+def regularized_beta(a: float, b: float, x: float) -> float:
+    """Return the regularized incomplete beta function I_x(a, b)."""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    front = math.exp(
+        math.lgamma(a + b)
+        - math.lgamma(a)
+        - math.lgamma(b)
+        + a * math.log(x)
+        + b * math.log(1 - x)
+    )
+    if x < (a + 1) / (a + b + 2):
+        return front * _beta_continued_fraction(a, b, x) / a
+    return 1 - front * _beta_continued_fraction(b, a, 1 - x) / b
+
+
+def student_t_cdf(t: float, df: float) -> float:
+    tail = regularized_beta(df / 2, 0.5, df / (df + t * t)) / 2
+    return 1 - tail if t > 0 else tail
+
+
+def student_t_quantile(p: float, df: float) -> float:
+    """Return the t such that student_t_cdf(t, df) == p, by bisection."""
+    low, high = -1.0, 1.0
+    while student_t_cdf(low, df) > p:
+        low *= 2
+    while student_t_cdf(high, df) < p:
+        high *= 2
+    for _ in range(100):
+        middle = (low + high) / 2
+        if student_t_cdf(middle, df) < p:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def confidence_interval(
+    samples: typing.Sequence[float], confidence: float
+) -> typing.Tuple[float, typing.Optional[float], typing.Optional[float]]:
+    """Return the mean of the samples and the bounds of its two-sided Student t
+    confidence interval; the bounds are None for fewer than two samples."""
+    mean = statistics.fmean(samples)
+    if len(samples) < 2:
+        return mean, None, None
+    margin = (
+        student_t_quantile((1 + confidence) / 2, len(samples) - 1)
+        * statistics.stdev(samples)
+        / math.sqrt(len(samples))
+    )
+    return mean, mean - margin, mean + margin
+
+
+def _cusum(deviations: typing.Sequence[float]) -> typing.List[float]:
+    return list(itertools.accumulate(deviations))
+
+
+def cusum_change(
+    values: typing.Sequence[float], min_segment: int
+) -> typing.Tuple[float, int]:
+    """Return the range of the cumulative sums of the deviations from the mean,
+    the CUSUM statistic of a shift in the mean, and the index of the first value
+    after the most likely shift, leaving at least min_segment values on either
+    side."""
+    mean = statistics.fmean(values)
+    sums = _cusum([value - mean for value in values])
+    split = max(
+        range(min_segment - 1, len(values) - min_segment), key=lambda i: abs(sums[i])
+    )
+    return max(sums) - min(sums), split + 1
+
+
+def cusum_p_value(
+    values: typing.Sequence[float],
+    statistic: float,
+    permutations: int,
+    significance: float,
+    rng: random.Random,
+) -> float:
+    """Return the share of random orders of the values whose CUSUM statistic is
+    at least the observed one, as the p-value of the shift. Once the p-value
+    cannot fall below the significance level any more, the test stops early."""
+    mean = statistics.fmean(values)
+    deviations = [value - mean for value in values]
+    limit = significance * (permutations + 1)
+    exceeding = 0
+    for permutation in range(1, permutations + 1):
+        sums = _cusum(rng.sample(deviations, len(deviations)))
+        if max(sums) - min(sums) >= statistic:
+            exceeding += 1
+            if exceeding + 1 > limit:
+                return (exceeding + 1) / (permutation + 1)
+    return (exceeding + 1) / (permutations + 1)
+
+
+def change_points(
+    values: typing.Sequence[float],
+    permutations: int,
+    significance: float,
+    min_segment: int,
+    rng: random.Random,
+) -> typing.List[typing.Tuple[int, float]]:
+    """Find the shifts in the mean of a series by binary segmentation: split it
+    at its most likely shift if a CUSUM permutation test finds the shift
+    significant, then look for further shifts in both parts. The n-th test is
+    at the significance level divided by n, so that the many tests of a long
+    series do not split noise into shifts. Return the index of the first value
+    after each shift and its p-value, in series order."""
+    found = []
+    segments = [(0, len(values))]
+    tests = 0
+    while segments:
+        start, end = segments.pop()
+        if end - start < 2 * min_segment:
+            continue
+        segment = values[start:end]
+        if max(segment) == min(segment):
+            continue
+        tests += 1
+        level = significance / tests
+        statistic, split = cusum_change(segment, min_segment)
+        p_value = cusum_p_value(segment, statistic, permutations, level, rng)
+        if p_value <= level:
+            found.append((start + split, p_value))
+            segments.extend(((start, start + split), (start + split, end)))
+    return sorted(found)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+
+import contextlib
+import dataclasses
+import hashlib
+import sqlite3
+import typing
+
+from stressng_schema import (
+    CommonOutput,
+    StressNGParams,
+    SystemInfoOutput,
+    WorkloadResults,
+    stressor_schemas,
+)
+
+
+# Each run is stored with its host and the metrics of each stressor, one row
+# per metric, so that metrics which are new to a stress-ng version need no
+# schema change. A host is identified by its hardware and kernel, not by its
+# hostname, which in a container changes with every run; the hostname is kept
+# per run. The indexes serve the trend queries by metric over time, with or
+# without a host or jobfile filter; the metrics index covers the values, so a
+# series is read without visiting the table.
+store_schema = """
+CREATE TABLE IF NOT EXISTS hosts (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL UNIQUE,
+    machine TEXT NOT NULL,
+    release TEXT NOT NULL,
+    cpus INTEGER NOT NULL,
+    totalram INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    host_id INTEGER NOT NULL REFERENCES hosts (id),
+    hostname TEXT NOT NULL,
+    epoch INTEGER NOT NULL,
+    config_hash TEXT NOT NULL,
+    stress_ng_version TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_host_epoch ON runs (host_id, epoch);
+CREATE INDEX IF NOT EXISTS runs_config_epoch ON runs (config_hash, epoch);
+CREATE INDEX IF NOT EXISTS runs_hostname_epoch ON runs (hostname, epoch);
+
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    stressor TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (run_id, stressor, metric)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS metrics_stressor_metric_value
+    ON metrics (stressor, metric, run_id, value);
+"""
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open the results store, creating its tables if they do not exist."""
+    db = sqlite3.connect(path, timeout=30)
+    db.execute("PRAGMA journal_mode = WAL")
+    db.executescript(store_schema)
+    return db
+
+
+def host_fingerprint(system_info: SystemInfoOutput) -> str:
+    """Return a hash of the host's hardware and kernel, which tells runs on the
+    same host apart from those after it changed. The hostname is left out, as
+    a container gets a new one for every run."""
+    identity = "\0".join(
+        str(value)
+        for value in (
+            system_info.machine,
+            system_info.release,
+            system_info.cpus,
+            system_info.totalram,
+            system_info.pagesize,
+        )
+    )
+    return hashlib.sha256(identity.encode()).hexdigest()[:16]
+
+
+def config_hash(params: StressNGParams) -> str:
+    """Return a hash of the jobfile of the parameters. Pass the parameters as
+    submitted: the run resolves the worker counts, scales the sizes and sets
+    the cpu loads of paced stressors from what it measures on the host, so
+    the test config of the results differs from run to run."""
+    jobfile = params.render_jobfile()
+    return hashlib.sha256(jobfile.encode()).hexdigest()[:16]
+
+
+def metric_rows(
+    output: CommonOutput,
+) -> typing.Iterator[typing.Tuple[str, str, float]]:
+    """Yield the stressor, name and value of each numeric metric of a stressor
+    output. Maps such as the latency percentiles are flattened to
+    <field>.<key>; the extra metrics keep their stress-ng names."""
+    serialized = stressor_schemas[output.stressor].serialize(output)
+    extra = serialized.pop("extra-metrics", None) or {}
+    for name, value in serialized.items():
+        if isinstance(value, dict):
+            for key, item in value.items():
+                yield output.stressor, f"{name}.{key}", float(item)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield output.stressor, name, float(value)
+    for name, value in extra.items():
+        yield output.stressor, name, float(value)
+
+
+def store_results(path: str, results: WorkloadResults, params: StressNGParams) -> int:
+    """Append the results of a run of the submitted parameters to the store and
+    return the ID of the run."""
+    with contextlib.closing(connect(path)) as db, db:
+        return insert_results(db, results, params)
+
+
+def insert_results(
+    db: sqlite3.Connection, results: WorkloadResults, params: StressNGParams
+) -> int:
+    """Insert the results of a run of the submitted parameters in the current
+    transaction of the store."""
+    system_info = results.systeminfo
+    fingerprint = host_fingerprint(system_info)
+    rows = []
+    for field in dataclasses.fields(results):
+        output = getattr(results, field.name)
+        if isinstance(output, CommonOutput):
+            rows.extend(metric_rows(output))
+    db.execute(
+        "INSERT OR IGNORE INTO hosts "
+        "(fingerprint, machine, release, cpus, totalram) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (
+            fingerprint,
+            system_info.machine,
+            system_info.release,
+            system_info.cpus,
+            system_info.totalram,
+        ),
+    )
+    (host_id,) = db.execute(
+        "SELECT id FROM hosts WHERE fingerprint = ?", (fingerprint,)
+    ).fetchone()
+    run_id = db.execute(
+        "INSERT INTO runs (host_id, hostname, epoch, config_hash, stress_ng_version) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (
+            host_id,
+            system_info.hostname,
+            system_info.epoch,
+            config_hash(params),
+            system_info.stress_ng_version,
+        ),
+    ).lastrowid
+    db.executemany(
+        "INSERT OR REPLACE INTO metrics (run_id, stressor, metric, value) "
+        "VALUES (?, ?, ?, ?)",
+        [(run_id, stressor, name, value) for stressor, name, value in rows],
+    )
+    return run_id
+
+
+def series_filter(
+    stressor: str,
+    metric: str,
+    hostname: typing.Optional[str] = None,
+    fingerprint: typing.Optional[str] = None,
+    config: typing.Optional[str] = None,
+    since: typing.Optional[int] = None,
+    until: typing.Optional[int] = None,
+) -> typing.Tuple[str, typing.List[typing.Any]]:
+    """Return the WHERE clause and its arguments selecting the values of a
+    metric of a stressor in the runs matching the filters that are set."""
+    conditions = ["metrics.stressor = ?", "metrics.metric = ?"]
+    arguments: typing.List[typing.Any] = [stressor, metric]
+    for condition, argument in (
+        ("runs.hostname = ?", hostname),
+        ("hosts.fingerprint = ?", fingerprint),
+        ("runs.config_hash = ?", config),
+        ("runs.epoch >= ?", since),
+        ("runs.epoch <= ?", until),
+    ):
+        if argument is not None:
+            conditions.append(condition)
+            arguments.append(argument)
+    return "WHERE " + " AND ".join(conditions), arguments
+
+
+series_columns = (
+    "SELECT runs.id, runs.epoch, runs.hostname, hosts.fingerprint, "
+    "runs.config_hash, metrics.value"
+)
+
+series_tables = (
+    "FROM metrics "
+    "JOIN runs ON runs.id = metrics.run_id "
+    "JOIN hosts ON hosts.id = runs.host_id"
+)
+
+
+def metric_series(
+    path: str,
+    stressor: str,
+    metric: str,
+    hostname: typing.Optional[str] = None,
+    fingerprint: typing.Optional[str] = None,
+    config: typing.Optional[str] = None,
+    since: typing.Optional[int] = None,
+    until: typing.Optional[int] = None,
+) -> typing.List[typing.Tuple[int, int, str, str, str, float]]:
+    """Return the run ID, epoch, hostname, host fingerprint, configuration hash
+    and value of the metric in each matching run, grouped by host fingerprint
+    and configuration hash and oldest first within each group."""
+    where, arguments = series_filter(
+        stressor, metric, hostname, fingerprint, config, since, until
+    )
+    with contextlib.closing(connect(path)) as db:
+        return db.execute(
+            f"{series_columns} {series_tables} {where} "
+            "ORDER BY hosts.fingerprint, runs.config_hash, runs.epoch, runs.id",
+            arguments,
+        ).fetchall()
+
+
+def trend_series(
+    path: str,
+    stressor: str,
+    metric: str,
+    baseline_window: int,
+    hostname: typing.Optional[str] = None,
+    fingerprint: typing.Optional[str] = None,
+    config: typing.Optional[str] = None,
+    since: typing.Optional[int] = None,
+    until: typing.Optional[int] = None,
+) -> typing.List[typing.Tuple[int, int, str, str, str, float, typing.Optional[float]]]:
+    """Return the run ID, epoch, hostname, host fingerprint, configuration hash,
+    value and rolling baseline of the metric in each matching run, oldest
+    first. The baseline is the mean of the preceding baseline_window runs of
+    the same host and configuration, so that series of different hosts or
+    jobfiles do not mix."""
+    where, arguments = series_filter(
+        stressor, metric, hostname, fingerprint, config, since, until
+    )
+    with contextlib.closing(connect(path)) as db:
+        return db.execute(
+            f"{series_columns}, AVG(metrics.value) OVER ("
+            "PARTITION BY hosts.fingerprint, runs.config_hash "
+            "ORDER BY runs.epoch, runs.id "
+            f"ROWS BETWEEN ? PRECEDING AND 1 PRECEDING) {series_tables} {where} "
+            "ORDER BY runs.epoch, runs.id",
+            [baseline_window] + arguments,
+        ).fetchall()
+
+
+def stored_metrics(path: str, stressor: str) -> typing.List[str]:
+    """Return the names of the metrics stored for a stressor."""
+    with contextlib.closing(connect(path)) as db:
+        return [
+            metric
+            for (metric,) in db.execute(
+                "SELECT DISTINCT metric FROM metrics WHERE stressor = ? "
+                "ORDER BY metric",
+                (stressor,),
+            )
+        ]
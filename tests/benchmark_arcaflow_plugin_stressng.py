@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+
+"""Micro-benchmarks of the plugin's own overhead, independent of stress-ng.
+
+Run with the plugin directory on the PYTHONPATH, as for the tests, e.g.
+``python tests/benchmark_arcaflow_plugin_stressng.py``. stress-ng runs are
+replaced by the stand-in fake_stress_ng.py, which returns at once, so that
+the spawn and end-to-end timings are the plugin's alone.
+"""
+
+import contextlib
+import dataclasses
+import glob
+import io
+import random
+import os
+import tempfile
+import timeit
+import yaml
+import fake_stress_ng
+import stressng_plugin
+import stressng_schema
+import stressng_stats
+import stressng_store
+from arcaflow_plugin_sdk import plugin
+from stressng_schema import StressNGParams, Stressors, stressor_schemas
+from test_arcaflow_plugin_stressng import system_info_sample, metric_sample
+
+fake_binary = os.path.abspath(fake_stress_ng.__file__)
+
+
+def synthetic_output(stressor_count: int, interval_count: int) -> str:
+    """Build a stress-ng YAML output with the given number of metrics entries
+    and a per-interval section the plugin does not use."""
+    stressors = list(stressor_schemas)
+    metrics = []
+    for i in range(stressor_count):
+        metric = metric_sample(stressors[i % len(stressors)].value, i + 1)
+        if metric["stressor"] == "hdd":
+            metric.update(
+                {
+                    "mbsec-read-rate": 100.0,
+                    "mbsec-write-rate": 50.0,
+                    "mbsec-readwrite-combined-rate": 150.0,
+                }
+            )
+        metrics.append(metric)
+    intervals = [
+        {"interval": i, "load-average": 1.0, "free-memory": 1024 * i}
+        for i in range(interval_count)
+    ]
+    return yaml.safe_dump(
+        {
+            "system-info": system_info_sample,
+            "metrics": metrics,
+            "intervals": intervals,
+        },
+        explicit_start=True,
+        sort_keys=False,
+    )
+
+
+def parse_and_unserialize(output: str):
+    stressng_yaml = stressng_plugin.load_stressng_yaml(output)
+    return [stressng_plugin.unserialize_metrics(m) for m in stressng_yaml["metrics"]]
+
+
+stressng_params_schema = plugin.build_object_schema(StressNGParams)
+
+
+def parse_jobfile(jobfile: str) -> StressNGParams:
+    """Parse a jobfile as rendered by the plugin back into its parameters."""
+    params = {"stressors": []}
+    current = params
+    for line in jobfile.splitlines():
+        option, _, value = line.partition(" ")
+        if option in Stressors.__members__.values():
+            current = {"stressor": option, "workers": int(value)}
+            params["stressors"].append(current)
+        elif option.endswith("-opts") and option != "sock-opts":
+            current[option] = value.split(",")
+        elif not value:
+            current[option] = True
+        else:
+            current[option] = int(value) if value.isdigit() else value
+    return stressng_params_schema.unserialize(params)
+
+
+def benchmark_jobfile_rendering():
+    references = {}
+    for reference_jobfile in sorted(glob.glob("tests/reference_jobfile_*")):
+        with open(reference_jobfile) as file:
+            references[reference_jobfile] = file.read()
+    stressors = []
+    for reference_jobfile, reference in references.items():
+        params = parse_jobfile(reference)
+        assert params.render_jobfile() == reference, reference_jobfile
+        stressors.extend(params.stressors)
+    for entry_count in (8, 1000, 10000):
+        params = StressNGParams(
+            timeout=10,
+            stressors=[stressors[i % len(stressors)] for i in range(entry_count)],
+        )
+        report(
+            f"render_jobfile ({entry_count} stressor entries)",
+            params.render_jobfile,
+            number=10,
+        )
+
+
+def report(name: str, func, number: int):
+    best = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"{name:<50} {best * 1000:10.3f} ms")
+
+
+def benchmark_yaml_parsing():
+    for stressor_count, interval_count in ((8, 0), (64, 1000), (512, 10000)):
+        output = synthetic_output(stressor_count, interval_count)
+        label = f"{stressor_count} stressors, {interval_count} intervals"
+        report(
+            f"safe_load ({label})",
+            lambda: yaml.safe_load(output),
+            number=3,
+        )
+        report(
+            f"load_stressng_yaml ({label})",
+            lambda: stressng_plugin.load_stressng_yaml(output),
+            number=3,
+        )
+        report(
+            f"parse+unserialize ({label})",
+            lambda: parse_and_unserialize(output),
+            number=3,
+        )
+
+
+def reference_params() -> StressNGParams:
+    """Return the parameters of all reference jobfiles as one workload."""
+    stressors = []
+    for reference_jobfile in sorted(glob.glob("tests/reference_jobfile_*")):
+        with open(reference_jobfile) as file:
+            stressors.extend(parse_jobfile(file.read()).stressors)
+    return StressNGParams(timeout=10, stressors=stressors)
+
+
+def fake_output(params: StressNGParams) -> str:
+    """Return the YAML output of the stand-in binary for the parameters."""
+    jobs = []
+    for stressor in params.stressors:
+        lines = [line.partition(" ") for line in stressor.to_jobfile().splitlines()]
+        name, _, workers = lines[0]
+        options = {option: value for option, _, value in lines[1:]}
+        jobs.append((name, int(workers) or 1, options))
+    with tempfile.NamedTemporaryFile("r") as output:
+        fake_stress_ng.write_yaml(
+            output.name,
+            [fake_stress_ng.metrics_entry(*job, params.timeout) for job in jobs],
+            params.timeout,
+        )
+        return output.read()
+
+
+def benchmark_spawn():
+    params = reference_params()
+    with stressng_plugin.ControlFile("jobfile") as jobfile, stressng_plugin.ControlFile(
+        "output"
+    ) as outfile, stressng_plugin.ControlFile("console") as console:
+        jobfile.write(params.render_jobfile())
+        command = [fake_binary, "-j", jobfile.path, "--metrics", "-Y", outfile.path]
+        report(
+            "spawn (supervise_stressng)",
+            lambda: stressng_plugin.supervise_stressng(
+                command,
+                tempfile.gettempdir(),
+                60,
+                console,
+                (jobfile.fd, outfile.fd),
+            ),
+            number=3,
+        )
+
+
+def benchmark_result_building():
+    params = reference_params()
+    output = fake_output(params)
+    stressng_yaml = stressng_plugin.load_stressng_yaml(output)
+    metrics = stressng_yaml["metrics"]
+    report(
+        f"unserialize ({len(metrics)} metrics entries)",
+        lambda: [stressng_plugin.unserialize_metrics(m) for m in metrics],
+        number=100,
+    )
+    report(
+        f"build_results ({len(metrics)} metrics entries)",
+        lambda: stressng_plugin.build_results(params, stressng_yaml),
+        number=100,
+    )
+    results = stressng_plugin.build_results(params, stressng_yaml)
+    report(
+        "serialize WorkloadResults",
+        lambda: plugin.build_object_schema(stressng_schema.WorkloadResults).serialize(
+            results
+        ),
+        number=10,
+    )
+
+
+def benchmark_end_to_end():
+    params = reference_params()
+    params.timeout = 1
+    stressng_plugin.stressng_binary = fake_binary
+
+    def run():
+        # Leave out the plugin's progress output
+        with contextlib.redirect_stdout(io.StringIO()):
+            return stressng_plugin.stressng_run("benchmark", params)
+
+    report("stressng_run end to end", run, number=3)
+
+
+def benchmark_results_store(run_count: int = 100000):
+    params = reference_params()
+    stressng_yaml = stressng_plugin.load_stressng_yaml(fake_output(params))
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = os.path.join(store_dir, "results.db")
+        results = stressng_plugin.build_results(params, stressng_yaml)
+        system_info = results.systeminfo
+        with contextlib.closing(stressng_store.connect(store)) as db, db:
+            for run in range(run_count):
+                results.systeminfo = dataclasses.replace(
+                    system_info,
+                    hostname=f"host{run % 10}",
+                    cpus=run % 10 + 1,
+                    epoch=run * 60,
+                )
+                stressng_store.insert_results(db, results, params)
+        results.systeminfo = system_info
+        report(
+            f"store_results (store of {run_count} runs)",
+            lambda: stressng_store.store_results(store, results, params),
+            number=10,
+        )
+        report(
+            f"trend_series, one host ({run_count} runs)",
+            lambda: stressng_store.trend_series(
+                store, "cpu", "bogo-ops-per-second-real-time", 7, hostname="host3"
+            ),
+            number=3,
+        )
+        report(
+            f"trend_series, all hosts ({run_count} runs)",
+            lambda: stressng_store.trend_series(
+                store, "cpu", "bogo-ops-per-second-real-time", 7
+            ),
+            number=3,
+        )
+
+
+def benchmark_change_points():
+    rng = random.Random(0)
+    for length in (1000, 5000):
+        # A 5% drop in throughput at 60% of the series
+        shift = length * 3 // 5
+        values = [1000 + rng.gauss(0, 20) for _ in range(shift)]
+        values += [950 + rng.gauss(0, 20) for _ in range(length - shift)]
+        report(
+            f"change_points ({length} runs, one shift)",
+            lambda: stressng_stats.change_points(values, 500, 0.05, 5, rng),
+            number=1,
+        )
+        report(
+            f"change_points ({length} runs, no shift)",
+            lambda: stressng_stats.change_points(values[:shift], 500, 0.05, 5, rng),
+            number=1,
+        )
+
+
+if __name__ == "__main__":
+    benchmark_jobfile_rendering()
+    benchmark_yaml_parsing()
+    benchmark_spawn()
+    benchmark_result_building()
+    benchmark_end_to_end()
+    benchmark_results_store()
+    benchmark_change_points()
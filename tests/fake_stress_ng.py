@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+
+"""A stand-in for the stress-ng executable, for tests and benchmarks without
+stress-ng and without spending the timeout of each stressor.
+
+It honours -j, --metrics, -Y and --dry-run, reads the stressors from the
+jobfile and writes a YAML output and a console summary in the format of
+stress-ng 0.17 for them. It answers the --version, --stressors, --help and
+--<stressor>-method which probes like stress-ng 0.17.01 does. The run is
+configured through the environment:
+
+FAKE_STRESSNG_RUNTIME  seconds to actually run, the timeout is reported anyway
+                       (default 0)
+FAKE_STRESSNG_RATE     bogo-ops/s per worker (default 1000)
+FAKE_STRESSNG_FAIL     comma-separated stressors to fail (exit code 2)
+FAKE_STRESSNG_SKIP     comma-separated stressors to skip
+FAKE_STRESSNG_HANG     hang ignoring SIGINT and SIGTERM, like a worker stuck
+                       in the kernel, if set to 1
+FAKE_STRESSNG_UNSUPPORTED
+                       comma-separated stressors, options and methods to
+                       leave out of the probes, as of an older build
+
+The max-rss of the vm and mmap stressors follows their vm-bytes and
+mmap-bytes, so that the reported sizes can be configured in the jobfile.
+"""
+
+import os
+import signal
+import sys
+import time
+
+stressors = ("cpu", "vm", "mmap", "matrix", "mq", "hdd", "iomix", "sock", "cyclic")
+
+matrix_methods = (
+    "add",
+    "copy",
+    "div",
+    "frobenius",
+    "hadamard",
+    "identity",
+    "mean",
+    "mult",
+    "negate",
+    "prod",
+    "sub",
+    "square",
+    "trans",
+    "zero",
+)
+
+methods = {
+    "cpu-method": "all ackermann apery bitops callfunc cfloat cdouble clongdouble "
+    "collatz correlate cpuid crc16 decimal32 decimal64 decimal128 dither div64 "
+    "djb2a double euler explog factorial fibonacci fft fletcher16 float float16 "
+    "float32 float80 float128 floatconversion fnv1a gamma gcd gray hamming hanoi "
+    "hyperbolic idct int8 int16 int32 int64 int128 int32float int32double "
+    "int32longdouble int64float int64double int64longdouble int128float "
+    "int128double int128longdouble int128decimal32 int128decimal64 "
+    "int128decimal128 intconversion ipv4checksum jenkin jmp ln2 longdouble loop "
+    "matrixprod murmur3_32 nhash nsqrt omega parity phi pi pjw prime psi queens "
+    "rand rand48 rgb sdbm sieve stats sqrt trig union zeta",
+    "vm-method": "all flip galpat-0 galpat-1 gray incdec inc-nybble rand-set "
+    "rand-sum read64 ror swap move-inv modulo-x prime-0 prime-1 prime-gray-0 "
+    "prime-gray-1 rowhammer walk-0d walk-1d walk-0a walk-1a write64 zero-one",
+    "matrix-method": " ".join(("all",) + matrix_methods),
+    "cyclic-method": "clock_ns itimer nanosleep poll posix_ns pselect usleep",
+}
+
+options = (
+    "timeout",
+    "page-in",
+    "taskset",
+    "verbose",
+    "metrics",
+    "metrics-brief",
+    "job",
+    "yaml",
+    "dry-run",
+    "cpu-ops",
+    "cpu-load",
+    "cpu-method",
+    "vm-bytes",
+    "vm-ops",
+    "vm-hang",
+    "vm-keep",
+    "vm-locked",
+    "vm-method",
+    "vm-populate",
+    "mmap-ops",
+    "mmap-async",
+    "mmap-bytes",
+    "mmap-file",
+    "mmap-mmap2",
+    "mmap-mprotect",
+    "mmap-odirect",
+    "mmap-osync",
+    "matrix-ops",
+    "matrix-method",
+    "matrix-size",
+    "matrix-yx",
+    "mq-ops",
+    "mq-size",
+    "hdd-bytes",
+    "hdd-opts",
+    "hdd-ops",
+    "hdd-write-size",
+    "iomix-bytes",
+    "iomix-ops",
+    "sock-domain",
+    "sock-opts",
+    "sock-ops",
+    "cyclic-method",
+    "cyclic-policy",
+    "cyclic-prio",
+    "cyclic-sleep",
+    "cyclic-ops",
+)
+
+size_multipliers = {"b": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30}
+
+# Total memory assumed for sizes given as a percentage
+total_memory = 8 << 30
+
+cyclic_percentiles = (25.0, 50.0, 75.0, 90.0, 95.4, 99.0, 99.5, 99.9, 99.99)
+
+
+def parse_jobfile(path: str):
+    """Return the root options and the list of (stressor, workers, options)."""
+    options, jobs = {}, []
+    current = options
+    with open(path, "r") as jobfile:
+        for line in jobfile:
+            line = line.split("#")[0].strip()
+            if not line:
+                continue
+            option, _, value = line.partition(" ")
+            if option in stressors:
+                current = {}
+                jobs.append((option, int(value or 0) or os.cpu_count(), current))
+            else:
+                current[option] = value.strip()
+    return options, jobs
+
+
+def parse_size(size: str, workers: int) -> int:
+    """Return the bytes per worker of a stress-ng size such as 256M or 50%."""
+    size = size.strip().lower()
+    if size.endswith("%"):
+        return int(total_memory * float(size[:-1]) / 100) // workers
+    if size[-1:] in size_multipliers:
+        return int(float(size[:-1]) * size_multipliers[size[-1]])
+    return int(size)
+
+
+def metrics_entry(stressor: str, workers: int, options: dict, timeout: int) -> dict:
+    rate = float(os.environ.get("FAKE_STRESSNG_RATE", "1000"))
+    load = int(options.get("cpu-load", 100))
+    bogo_ops = int(rate * workers * timeout * load / 100)
+    user_time = timeout * workers * load / 100 * 0.9
+    system_time = timeout * workers * load / 100 * 0.1
+    max_rss = 4096
+    if stressor in ("vm", "mmap"):
+        max_rss += parse_size(options.get(f"{stressor}-bytes", "256M"), workers) >> 10
+    entry = {
+        "stressor": stressor,
+        "bogo-ops": bogo_ops,
+        "bogo-ops-per-second-usr-sys-time": bogo_ops / max(user_time + system_time, 1),
+        "bogo-ops-per-second-real-time": bogo_ops / timeout,
+        "wall-clock-time": float(timeout),
+        "user-time": user_time,
+        "system-time": system_time,
+        "cpu-usage-per-instance": float(load),
+        "max-rss": max_rss,
+    }
+    if stressor == "matrix":
+        method = options.get("matrix-method", "all")
+        for name in matrix_methods if method == "all" else (method,):
+            entry[f"{name}-matrix-ops-per-sec"] = rate / 10
+    elif stressor == "hdd":
+        entry.update(
+            {
+                "mbsec-read-rate": 512.0,
+                "mbsec-write-rate": 256.0,
+                "mbsec-readwrite-combined-rate": 768.0,
+            }
+        )
+    elif stressor == "sock":
+        entry.update(
+            {
+                "messages-sent-per-sec": rate * 10,
+                "byte-average-out-queue-length": 0.0,
+                "byte-average-in-queue-length": 0.0,
+            }
+        )
+    return entry
+
+
+def write_yaml(path: str, metrics: list, timeout: int):
+    now = time.time()
+    uname = os.uname()
+    with open(path, "w") as output:
+        output.write("---\nsystem-info:\n")
+        for key, value in (
+            ("stress-ng-version", "0.17.01"),
+            ("compiler", "gcc 11.4.1"),
+            ("run-by", "root"),
+            ("date-yyyy-mm-dd", time.strftime("%Y:%m:%d", time.localtime(now))),
+            ("time-hh-mm-ss", time.strftime("%H:%M:%S", time.localtime(now))),
+            ("epoch-secs", int(now)),
+            ("hostname", uname.nodename),
+            ("sysname", uname.sysname),
+            ("nodename", uname.nodename),
+            ("release", uname.release),
+            ("version", f'"{uname.version}"'),
+            ("machine", uname.machine),
+            ("uptime", int(time.monotonic())),
+            ("totalram", total_memory),
+            ("freeram", total_memory // 2),
+            ("sharedram", 0),
+            ("bufferram", 0),
+            ("totalswap", 0),
+            ("freeswap", 0),
+            ("pagesize", 4096),
+            ("cpus", os.cpu_count()),
+            ("cpus-online", os.cpu_count()),
+            ("ticks-per-second", 100),
+        ):
+            output.write(f"      {key}: {value}\n")
+        output.write("metrics:\n")
+        for entry in metrics:
+            prefix = "    - "
+            for key, value in entry.items():
+                output.write(f"{prefix}{key}: {value}\n")
+                prefix = "      "
+        output.write(f"duration: {timeout}\n...\n")
+
+
+def info(message: str):
+    print(f"stress-ng: info:  [{os.getpid()}] {message}", flush=True)
+
+
+def summary(label: str, jobs: list):
+    if jobs:
+        names = " ".join(f"{stressor} ({workers})" for stressor, workers, _ in jobs)
+        info(f"{label}: {sum(workers for _, workers, _ in jobs)}: {names}")
+
+
+def probe(argv: list) -> int:
+    """Answer the capability probes of the plugin."""
+    unsupported = set(os.environ.get("FAKE_STRESSNG_UNSUPPORTED", "").split(","))
+    if argv == ["--version"]:
+        print("stress-ng, version 0.17.01 (gcc 11.4.1, x86_64 Linux) \U0001f4bb")
+    elif argv == ["--stressors"]:
+        print(" ".join(sorted(set(stressors) - unsupported)))
+    elif argv == ["--help"]:
+        print("stress-ng, version 0.17.01\n\nUsage: stress-ng [OPTION [ARG]]")
+        for option in options:
+            if option not in unsupported:
+                print(f"      --{option:<20} {option.replace('-', ' ')}")
+    else:
+        option = argv[0][2:]
+        if option not in methods or option in unsupported:
+            print(f"stress-ng: unrecognized option '{argv[0]}'", file=sys.stderr)
+            return 1
+        choices = [m for m in methods[option].split() if m not in unsupported]
+        print(f"{option} must be one of: {' '.join(choices)}")
+    return 0
+
+
+def main(argv: list) -> int:
+    if argv in (["--version"], ["--stressors"], ["--help"]) or (
+        len(argv) == 2 and argv[1] == "which"
+    ):
+        return probe(argv)
+    jobfile = yaml_path = None
+    dry_run = False
+    args = iter(argv)
+    for arg in args:
+        if arg == "-j":
+            jobfile = next(args)
+        elif arg == "-Y":
+            yaml_path = next(args)
+        elif arg == "--dry-run":
+            dry_run = True
+        elif arg != "--metrics":
+            print(f"stress-ng: unrecognized option '{arg}'", file=sys.stderr)
+            return 1
+    if jobfile is None:
+        print("stress-ng: no jobfile given", file=sys.stderr)
+        return 1
+    options, jobs = parse_jobfile(jobfile)
+    if dry_run:
+        return 0
+    timeout = int(options.get("timeout", "1"))
+    info(f"setting to a {timeout} secs run per stressor")
+    info(
+        "dispatching hogs: "
+        + ", ".join(f"{workers} {stressor}" for stressor, workers, _ in jobs)
+    )
+
+    if os.environ.get("FAKE_STRESSNG_HANG") == "1":
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        while True:
+            time.sleep(60)
+    time.sleep(float(os.environ.get("FAKE_STRESSNG_RUNTIME", "0")))
+
+    fail = set(filter(None, os.environ.get("FAKE_STRESSNG_FAIL", "").split(",")))
+    skip = set(filter(None, os.environ.get("FAKE_STRESSNG_SKIP", "").split(",")))
+    passed = [job for job in jobs if job[0] not in fail | skip]
+    if any(stressor == "cyclic" for stressor, _, _ in passed):
+        info("cyclic: sched SCHED_FIFO: 10000 ns delay, 10000 samples")
+        info("cyclic:   mean: 5421.38 ns, mode: 5103 ns")
+        info("cyclic:   min: 4570 ns, max: 26875 ns, std.dev. 1190.52")
+        info("cyclic: latency percentiles:")
+        for percentile in cyclic_percentiles:
+            latency = int(4570 + percentile**2)
+            info(f"cyclic:   {percentile:5.2f}%: {latency:10d} ns")
+    summary("skipped", [job for job in jobs if job[0] in skip])
+    summary("passed", passed)
+    summary("failed", [job for job in jobs if job[0] in fail])
+    if yaml_path:
+        write_yaml(
+            yaml_path,
+            [metrics_entry(*job, timeout) for job in passed],
+            timeout,
+        )
+    info(f"successful run completed in {timeout}.00 secs")
+    return 2 if fail & {stressor for stressor, _, _ in jobs} else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
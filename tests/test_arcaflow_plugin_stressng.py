@@ -1,8 +1,19 @@
 #!/usr/bin/env python3
 
+import csv
+import os
+import random
+import shutil
+import subprocess
 import unittest
+from unittest import mock
 import math
+import tempfile
+import time
 import yaml
+import stressng_host
+import stressng_stats
+import stressng_store
 import stressng_schema
 import stressng_plugin
 from arcaflow_plugin_sdk import plugin
@@ -10,6 +21,54 @@ from arcaflow_plugin_sdk import plugin
 
 test_time = 5
 
+fake_binary = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "fake_stress_ng.py"
+)
+
+# Without stress-ng, the functional tests run against the stand-in binary
+if not os.access(stressng_plugin.stressng_binary, os.X_OK):
+    stressng_plugin.stressng_binary = fake_binary
+
+system_info_sample = {
+    "stress-ng-version": "0.17.01",
+    "compiler": "gcc 11.4.1",
+    "run-by": "root",
+    "date-yyyy-mm-dd": "2024:01:01",
+    "time-hh-mm-ss": "12:00:00",
+    "epoch-secs": 1704110400,
+    "hostname": "testhost",
+    "sysname": "Linux",
+    "nodename": "testhost",
+    "release": "5.14.0",
+    "version": "#1 SMP PREEMPT_DYNAMIC",
+    "machine": "x86_64",
+    "uptime": 1000,
+    "totalram": 8000000000,
+    "freeram": 4000000000,
+    "sharedram": 1000000,
+    "bufferram": 1000000,
+    "totalswap": 0,
+    "freeswap": 0,
+    "pagesize": 4096,
+    "cpus": 4,
+    "cpus-online": 4,
+    "ticks-per-second": 100,
+}
+
+
+def metric_sample(stressor: str, bogo_ops: int = 1000) -> dict:
+    return {
+        "stressor": stressor,
+        "max-rss": 4096,
+        "bogo-ops": bogo_ops,
+        "bogo-ops-per-second-usr-sys-time": bogo_ops / 2.0,
+        "bogo-ops-per-second-real-time": bogo_ops / 5.0,
+        "wall-clock-time": 5.0,
+        "user-time": 1.5,
+        "system-time": 0.5,
+        "cpu-usage-per-instance": 20.0,
+    }
+
 
 class StressNGTest(unittest.TestCase):
     @staticmethod
@@ -109,6 +168,1078 @@ class StressNGTest(unittest.TestCase):
             )
         )
 
+        plugin.test_object_serialization(
+            stressng_schema.CyclicStressorParams(
+                stressor=stressng_schema.Stressors.CYCLIC,
+                workers=1,
+                cyclic_policy=stressng_schema.CyclicPolicy.FIFO,
+                cyclic_prio=80,
+            )
+        )
+
+    def test_export_results(self):
+        metrics = [metric_sample("cpu"), metric_sample("mq", 2000)]
+        metrics[0]["unexported-metric"] = 1.0
+        with tempfile.TemporaryDirectory() as workdir:
+            path = stressng_plugin.export_results(
+                system_info_sample,
+                metrics,
+                workdir,
+                stressng_schema.ExportFormat.CSV,
+            )
+            with open(path, newline="") as file:
+                rows = list(csv.DictReader(file))
+            # Runs in the same second do not overwrite each other's exports
+            paths = [
+                stressng_plugin.export_results(
+                    system_info_sample,
+                    metrics[:1],
+                    workdir,
+                    stressng_schema.ExportFormat.CSV,
+                )
+                for _ in range(2)
+            ]
+            self.assertEqual(len({path, *paths}), 3)
+            with open(path, newline="") as file:
+                self.assertEqual(len(list(csv.DictReader(file))), 2)
+        self.assertEqual(list(rows[0].keys()), stressng_plugin.export_columns)
+        self.assertEqual([row["stressor"] for row in rows], ["cpu", "mq"])
+        self.assertEqual(rows[1]["bogo-ops"], "2000")
+        self.assertEqual(rows[1]["hostname"], "testhost")
+
+    def test_load_stressng_yaml(self):
+        output = yaml.safe_dump(
+            {
+                "system-info": system_info_sample,
+                "metrics": [metric_sample("cpu"), metric_sample("vm")],
+                "times": {"run-time": 5.0, "load-average-1-minute": 1.5},
+            },
+            explicit_start=True,
+            sort_keys=False,
+        )
+        stressng_yaml = stressng_plugin.load_stressng_yaml(output)
+        self.assertEqual(list(stressng_yaml), ["system-info", "metrics"])
+        self.assertEqual(stressng_yaml["system-info"], system_info_sample)
+        self.assertEqual(stressng_yaml["metrics"][1], metric_sample("vm"))
+
+    def test_cpu_list(self):
+        cpus = stressng_host.parse_cpu_list("0,2-3,6,7-11\n")
+        self.assertEqual(cpus, [0, 2, 3, 6, 7, 8, 9, 10, 11])
+        self.assertEqual(stressng_host.format_cpu_list(cpus), "0,2-3,6-11")
+
+    def test_validate_params(self):
+        stress = stressng_schema.StressNGParams(
+            timeout=test_time,
+            stressors=[
+                stressng_schema.HDDStressorParams(
+                    stressor=stressng_schema.Stressors.HDD,
+                    workers=1,
+                    hdd_opts=[
+                        stressng_schema.HddOpts.DIRECT,
+                        stressng_schema.HddOpts.WR_RND,
+                        stressng_schema.HddOpts.WR_SEQ,
+                    ],
+                )
+            ],
+            taskset="0,2-5",
+        )
+        problems = stressng_plugin.validate_params(stress, [0, 1, 2, 3])
+        self.assertEqual(len(problems), 2)
+        self.assertIn("4-5", problems[0])
+        self.assertIn("wr-rnd, wr-seq", problems[1])
+        stress.taskset = "0-3"
+        stress.stressors[0].hdd_opts = [stressng_schema.HddOpts.DIRECT]
+        self.assertEqual(stressng_plugin.validate_params(stress, [0, 1, 2, 3]), [])
+
+    def test_estimate_footprint(self):
+        stress = stressng_schema.StressNGParams(
+            timeout=test_time,
+            stressors=[
+                stressng_schema.VmStressorParams(
+                    stressor=stressng_schema.Stressors.VM, workers=2, vm_bytes="1.5G"
+                ),
+                stressng_schema.MmapStressorParams(
+                    stressor=stressng_schema.Stressors.MMAP,
+                    workers=0,
+                    mmap_bytes="25%",
+                ),
+                stressng_schema.HDDStressorParams(
+                    stressor=stressng_schema.Stressors.HDD, workers=0
+                ),
+                stressng_schema.CpuStressorParams(
+                    stressor=stressng_schema.Stressors.CPU, workers=4
+                ),
+            ],
+        )
+        memory, disk = stressng_plugin.estimate_footprint(stress, 4, 8 << 30, 1 << 40)
+        self.assertEqual(memory, 5 << 30)
+        self.assertEqual(disk, 4 << 30)
+
+    def test_apply_resource_policy(self):
+        stress = stressng_schema.StressNGParams(
+            timeout=test_time,
+            stressors=[
+                stressng_schema.VmStressorParams(
+                    stressor=stressng_schema.Stressors.VM, workers=2, vm_bytes="1000T"
+                ),
+                stressng_schema.CpuStressorParams(
+                    stressor=stressng_schema.Stressors.CPU, workers=1
+                ),
+            ],
+            resource_policy=stressng_schema.ResourcePolicy.REFUSE,
+        )
+        params, budget, problems = stressng_plugin.apply_resource_policy(stress, 1)
+        self.assertIs(params, stress)
+        self.assertEqual(budget.footprint.memory_bytes, 2000 << 40)
+        self.assertEqual(len(problems), 1)
+
+        stress.resource_policy = stressng_schema.ResourcePolicy.SCALE
+        params, budget, problems = stressng_plugin.apply_resource_policy(stress, 1)
+        self.assertEqual(problems, [])
+        self.assertEqual(stress.stressors[0].vm_bytes, "1000T")
+        self.assertLess(budget.memory_scale, 1.0)
+        self.assertEqual(budget.disk_scale, 1.0)
+        scaled_bytes = stressng_plugin.parse_size(params.stressors[0].vm_bytes, 2, 0)
+        self.assertLessEqual(
+            scaled_bytes, budget.footprint.memory_available_bytes * 90 // 100
+        )
+
+        # Percentages are taken of the memory they are checked against
+        stress.stressors[0].vm_bytes = "80%"
+        with mock.patch(
+            "stressng_host.meminfo",
+            return_value={"MemTotal": 16 << 30, "MemAvailable": 4 << 30},
+        ):
+            params, budget, problems = stressng_plugin.apply_resource_policy(stress, 1)
+        self.assertEqual(budget.footprint.memory_bytes, int((4 << 30) * 0.8))
+        self.assertEqual(problems, [])
+        self.assertIs(params, stress)
+
+    def test_control_file(self):
+        with stressng_plugin.ControlFile("in") as infile, stressng_plugin.ControlFile(
+            "out"
+        ) as outfile:
+            infile.write("timeout 5\n")
+            output = subprocess.check_output(
+                ["sh", "-c", f"cat {infile.path}; echo metrics: > {outfile.path}"],
+                text=True,
+                pass_fds=(infile.fd, outfile.fd),
+            )
+            self.assertEqual(output, "timeout 5\n")
+            self.assertEqual(outfile.read(), "metrics:\n")
+        with self.assertRaises(OSError):
+            os.fstat(outfile.fd)
+
+    def test_supervise_stressng(self):
+        escalation_delay = stressng_plugin.signal_escalation_delay
+        stressng_plugin.signal_escalation_delay = 0.5
+        try:
+            with stressng_plugin.ControlFile("console") as console:
+                returncode, diagnostics = stressng_plugin.supervise_stressng(
+                    ["sh", "-c", "trap '' INT; echo started; sleep 60 & wait"],
+                    tempfile.gettempdir(),
+                    0.5,
+                    console,
+                    (),
+                )
+                self.assertEqual(console.read(), "started\n")
+        finally:
+            stressng_plugin.signal_escalation_delay = escalation_delay
+        self.assertIsNone(returncode)
+        self.assertEqual(
+            sorted(d.name for d in diagnostics), ["sh", "sleep"], diagnostics
+        )
+        for process in diagnostics:
+            # Orphaned workers may remain as zombies until init reaps them
+            state = stressng_host.process_status(process.pid).get("State", "Z")
+            self.assertTrue(state.startswith("Z"), state)
+
+        with stressng_plugin.ControlFile("console") as console:
+            returncode, diagnostics = stressng_plugin.supervise_stressng(
+                ["sh", "-c", "exit 3"], tempfile.gettempdir(), 10, console, ()
+            )
+        self.assertEqual((returncode, diagnostics), (3, []))
+
+    def test_process_accounting(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # The kernel truncates the process name to stress-ng-matri
+            worker = os.path.join(tmpdir, "stress-ng-matrix")
+            shutil.copy(shutil.which("sleep"), worker)
+            monitor = stressng_plugin.ProcessAccountingMonitor(["cpu", "matrix"])
+            with stressng_plugin.ControlFile("console") as console:
+                returncode, _ = stressng_plugin.supervise_stressng(
+                    ["sh", "-c", f"{worker} 1 & {worker} 1 & wait"],
+                    tmpdir,
+                    10,
+                    console,
+                    (),
+                    [monitor],
+                )
+        self.assertEqual(returncode, 0)
+        accounting = monitor.results()
+        self.assertEqual([a.stressor for a in accounting], ["matrix"])
+        self.assertEqual(accounting[0].processes, 2)
+        self.assertGreater(accounting[0].minor_faults, 0)
+        self.assertIsNone(stressng_plugin.worker_stressor("stress-ng", ["cpu"]))
+
+    def test_system_activity(self):
+        before = {"NET_RX": [10, 0, 0, 0], "TIMER": [5, 5, 5, 5]}
+        after = {"NET_RX": [110, 0, 0, 0], "TIMER": [10, 10, 10, 10], "RCU": [1] * 4}
+        deltas = stressng_plugin.counter_deltas(before, after)
+        self.assertEqual(deltas["NET_RX"], [100, 0, 0, 0])
+        self.assertEqual(deltas["RCU"], [1, 1, 1, 1])
+        per_cpu = [sum(cpu) for cpu in zip(*deltas.values())]
+        self.assertEqual(stressng_plugin.cpu_imbalance(per_cpu), (3.419, 0))
+        self.assertEqual(stressng_plugin.cpu_imbalance([0, 0]), (None, None))
+
+        monitor = stressng_plugin.SystemActivityMonitor()
+        monitor(os.getpgid(0))
+        subprocess.run(["true"], check=True)
+        activity = monitor.results()
+        self.assertGreaterEqual(activity.procs_running, 1)
+        self.assertGreater(activity.forks, 0)
+        self.assertGreater(activity.context_switches, 0)
+        plugin.test_object_serialization(activity)
+
+    def test_pacer(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            worker = os.path.join(tmpdir, "stress-ng-hdd")
+            shutil.copy(shutil.which("sleep"), worker)
+            process = subprocess.Popen([worker, "10"], start_new_session=True)
+        try:
+            pacer = stressng_plugin.Pacer({"hdd": 0.001})
+            pacer(process.pid)
+            self.assertEqual(pacer.workers, {"hdd": {process.pid}})
+            # The worker runs briefly at the start of each pacing period, so
+            # a single look may catch it running on a loaded host
+            deadline = time.monotonic() + 5
+            state = stressng_host.process_status(process.pid)["State"]
+            while not state.startswith("T") and time.monotonic() < deadline:
+                time.sleep(0.05)
+                state = stressng_host.process_status(process.pid)["State"]
+            self.assertTrue(state.startswith("T"), state)
+            pacer.stop()
+            state = stressng_host.process_status(process.pid)["State"]
+            self.assertFalse(state.startswith("T"), state)
+        finally:
+            process.kill()
+            process.wait()
+
+    def test_stressor_statuses(self):
+        console = (
+            "stress-ng: info:  [100] setting to a 5 secs run per stressor\n"
+            "stress-ng: debug: [102] vm: assuming killed by OOM killer, "
+            "restarting again (instance 0)\n"
+            "stress-ng: info:  [100] skipped: 1: sock (1)\n"
+            "stress-ng: info:  [100] passed: 3: cpu (2) vm (1)\n"
+            "stress-ng: info:  [100] failed: 1: vm (1)\n"
+        )
+        stress = stressng_schema.StressNGParams(
+            timeout=test_time,
+            stressors=[
+                stressng_schema.CpuStressorParams(
+                    stressor=stressng_schema.Stressors.CPU, workers=2
+                ),
+                stressng_schema.VmStressorParams(
+                    stressor=stressng_schema.Stressors.VM, workers=2
+                ),
+                stressng_schema.SockStressorParams(
+                    stressor=stressng_schema.Stressors.SOCK, workers=1
+                ),
+                stressng_schema.MqStressorParams(
+                    stressor=stressng_schema.Stressors.MQ, workers=1
+                ),
+            ],
+        )
+        statuses = stressng_plugin.stressor_statuses(
+            stress, console, {"metrics": [metric_sample("cpu")]}, 1
+        )
+        self.assertEqual(
+            [(s.stressor, s.status.value) for s in statuses],
+            [
+                ("cpu", "passed"),
+                ("vm", "failed"),
+                ("sock", "skipped"),
+                ("mq", "unknown"),
+            ],
+        )
+        self.assertEqual(statuses[1].passed_instances, 1)
+        self.assertEqual(statuses[1].failed_instances, 1)
+        self.assertTrue(statuses[1].oom_killed)
+        self.assertFalse(statuses[0].oom_killed)
+
+    def test_method_breakdown_slices(self):
+        breakdown = stressng_schema.MethodBreakdownParams(
+            workload=stressng_schema.StressNGParams(
+                timeout=1,
+                stressors=[
+                    stressng_schema.CpuStressorParams(
+                        stressor=stressng_schema.Stressors.CPU, workers=1
+                    )
+                ],
+            ),
+            cpu_methods=[stressng_schema.CpuMethod.FFT, stressng_schema.CpuMethod.PI],
+        )
+        output_id, output = stressng_plugin.stressng_method_breakdown(
+            self.id(), breakdown
+        )
+        self.assertEqual(output_id, "error")
+        self.assertIn("2 time slices", output.error)
+        breakdown.cpu_methods = None
+        output_id, output = stressng_plugin.stressng_method_breakdown(
+            self.id(), breakdown
+        )
+        self.assertEqual(output_id, "error")
+
+    def test_profile_loads(self):
+        profile = stressng_schema.LoadProfileParams(
+            workload=stressng_schema.StressNGParams(
+                timeout=80,
+                stressors=[
+                    stressng_schema.CpuStressorParams(
+                        stressor=stressng_schema.Stressors.CPU, workers=1
+                    )
+                ],
+            ),
+            shape=stressng_schema.LoadShape.STEP,
+            loads=[20, 80],
+        )
+        self.assertEqual(stressng_plugin.profile_loads(profile), [20] * 4 + [80] * 4)
+        profile.shape = stressng_schema.LoadShape.RAMP
+        profile.segment_duration = 20
+        self.assertEqual(stressng_plugin.profile_loads(profile), [0, 33, 67, 100])
+        profile.shape = stressng_schema.LoadShape.SINE
+        profile.period = 80
+        self.assertEqual(stressng_plugin.profile_loads(profile), [15, 85, 85, 15])
+        profile.shape = stressng_schema.LoadShape.BURST
+        profile.period = 40
+        self.assertEqual(stressng_plugin.profile_loads(profile), [100, 0, 100, 0])
+
+        idle = stressng_plugin.segment_workload(profile.workload, 20, 0)
+        jobfile = idle.render_jobfile()
+        self.assertIn("timeout 20\n", jobfile)
+        self.assertIn("cpu-load 0\n", jobfile)
+        self.assertEqual(idle.stressors[0].cpu_load, 0)
+        self.assertIsNone(profile.workload.stressors[0].cpu_load)
+
+        profile.segment_duration = 100
+        output_id, output = stressng_plugin.stressng_load_profile(self.id(), profile)
+        self.assertEqual(output_id, "error")
+        self.assertIn("shorter than one segment", output.error)
+
+    def test_parse_cyclic_latencies(self):
+        console = (
+            "stress-ng: info:  [10] cyclic: sched SCHED_FIFO: 10000 ns delay, "
+            "10000 samples\n"
+            "stress-ng: info:  [10] cyclic:   mean: 5421.38 ns, mode: 5103 ns\n"
+            "stress-ng: info:  [10] cyclic:   min: 4570 ns, max: 26875 ns, "
+            "std.dev. 1190.52\n"
+            "stress-ng: info:  [10] cyclic: latency percentiles:\n"
+            "stress-ng: info:  [10] cyclic:   95.40%:       7021 ns\n"
+            "stress-ng: info:  [10] cyclic:   99.00%:      10212 ns\n"
+        )
+        self.assertEqual(
+            stressng_plugin.parse_cyclic_latencies(console),
+            {
+                "latency_mean": 5421.38,
+                "latency_min": 4570,
+                "latency_max": 26875,
+                "latency_percentiles": {"95.40": 7021, "99.00": 10212},
+            },
+        )
+
+    def test_bisect_operating_point(self):
+        probes = []
+
+        def probe(value):
+            probes.append(value)
+            return value <= 37
+
+        self.assertEqual(
+            stressng_plugin.bisect_operating_point(1, 100, 1, 20, probe), 37
+        )
+        self.assertEqual(probes[:3], [100, 1, 50])
+        self.assertEqual(len(probes), len(set(probes)))
+        probes.clear()
+        self.assertEqual(
+            stressng_plugin.bisect_operating_point(1, 100, 8, 20, probe), 37
+        )
+        self.assertEqual(probes, [100, 1, 50, 25, 37, 43])
+        self.assertEqual(
+            stressng_plugin.bisect_operating_point(1, 30, 1, 20, probe), 30
+        )
+        self.assertIsNone(stressng_plugin.bisect_operating_point(40, 100, 1, 20, probe))
+
+    def test_interference_matrix(self):
+        matrix = stressng_plugin.interference_matrix(
+            ["cpu", "vm", "hdd"],
+            {"cpu": 1000.0, "vm": 400.0},
+            {"cpu": {"vm": 800.0, "hdd": 1000.0}, "vm": {"cpu": 100.0}, "hdd": {}},
+        )
+        self.assertEqual(matrix[0].slowdown, {"vm": 1.25, "hdd": 1.0})
+        self.assertEqual(matrix[1].slowdown, {"cpu": 4.0})
+        self.assertIsNone(matrix[2].slowdown)
+        self.assertIsNone(matrix[2].paired_ops_per_second)
+        plugin.test_object_serialization(
+            stressng_schema.InterferenceResults(matrix=matrix)
+        )
+
+        output_id, output = stressng_plugin.stressng_interference(
+            self.id(),
+            stressng_schema.InterferenceParams(
+                workload=stressng_schema.StressNGParams(
+                    timeout=1,
+                    stressors=[
+                        stressng_schema.CpuStressorParams(
+                            stressor=stressng_schema.Stressors.CPU, workers=1
+                        )
+                    ],
+                )
+            ),
+        )
+        self.assertEqual(output_id, "error")
+
+    @mock.patch("stressng_host.online_cpus", return_value=[0, 1])
+    @mock.patch("stressng_plugin.settle_host")
+    @mock.patch("stressng_plugin.apply_hygiene")
+    @mock.patch(
+        "stressng_plugin.run_workload",
+        return_value=("error", stressng_schema.WorkloadError("failed")),
+    )
+    def test_interference_hygiene(self, run_workload, apply_hygiene, settle_host, _):
+        stressors = [
+            stressng_schema.CpuStressorParams(
+                stressor=stressng_schema.Stressors.CPU, workers=1
+            ),
+            stressng_schema.VmStressorParams(
+                stressor=stressng_schema.Stressors.VM, workers=1
+            ),
+        ]
+        output_id, output = stressng_plugin.stressng_interference(
+            self.id(),
+            stressng_schema.InterferenceParams(
+                workload=stressng_schema.StressNGParams(
+                    timeout=1,
+                    stressors=stressors,
+                    hygiene=stressng_schema.HygieneParams(),
+                    settle=stressng_schema.SettleParams(),
+                ),
+                pin=True,
+            ),
+        )
+        self.assertEqual(output_id, "success")
+        # Once for each solo run and once around the concurrent pinned pair
+        self.assertEqual(apply_hygiene.call_count, 3)
+        self.assertEqual(apply_hygiene.call_args.args[0].stressors, stressors)
+        self.assertEqual(settle_host.call_count, 3)
+        self.assertEqual(run_workload.call_count, 4)
+        for call in run_workload.call_args_list:
+            self.assertIsNone(call.args[0].hygiene)
+            self.assertIsNone(call.args[0].settle)
+
+    @mock.patch("stressng_host.online_cpus", return_value=[0, 1, 2])
+    @mock.patch("stressng_plugin.run_workload")
+    def test_interference_pinned_baselines(self, run_workload, _):
+        # The second half runs at half the rate, alone as well as paired
+        half_rates = {"0": 1000.0, "1": 500.0}
+
+        def run(workload):
+            rate = half_rates[workload.taskset]
+            results = mock.Mock(systeminfo=None)
+            for stressor in workload.stressors:
+                setattr(
+                    results,
+                    stressng_plugin.result_fields[stressor.stressor],
+                    mock.Mock(bogo_ops_per_second_real_time=rate),
+                )
+            return "success", results
+
+        run_workload.side_effect = run
+        output_id, output = stressng_plugin.stressng_interference(
+            self.id(),
+            stressng_schema.InterferenceParams(
+                workload=stressng_schema.StressNGParams(
+                    timeout=1,
+                    stressors=[
+                        stressng_schema.CpuStressorParams(
+                            stressor=stressng_schema.Stressors.CPU, workers=1
+                        ),
+                        stressng_schema.VmStressorParams(
+                            stressor=stressng_schema.Stressors.VM, workers=1
+                        ),
+                        stressng_schema.HDDStressorParams(
+                            stressor=stressng_schema.Stressors.HDD, workers=1
+                        ),
+                    ],
+                ),
+                pin=True,
+            ),
+        )
+        self.assertEqual(output_id, "success")
+        # The odd CPU is left out, so that both halves have one CPU
+        self.assertEqual(
+            {call.args[0].taskset for call in run_workload.call_args_list},
+            {"0", "1"},
+        )
+        # cpu only runs first and hdd only second; vm runs alone on both halves
+        self.assertEqual(run_workload.call_count, 4 + 3 * 2)
+        self.assertEqual(
+            [row.solo_ops_per_second for row in output.matrix], [1000.0, 750.0, 500.0]
+        )
+        for row in output.matrix:
+            self.assertEqual(set(row.slowdown.values()), {1.0})
+
+    def test_host_settings(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            defrag = os.path.join(tmpdir, "defrag")
+            with open(defrag, "w") as setting:
+                setting.write("always defer [madvise] never\n")
+            missing = os.path.join(tmpdir, "missing")
+            with self.assertRaises(RuntimeError):
+                with stressng_plugin.HostSettings() as settings:
+                    settings.apply(defrag, "never")
+                    settings.apply(missing, "0")
+                    self.assertEqual(stressng_host.read_setting(defrag), "never")
+                    raise RuntimeError("the run failed")
+            self.assertEqual(stressng_host.read_setting(defrag), "madvise")
+        applied, failed = settings.settings
+        self.assertEqual((applied.original, applied.restored), ("madvise", True))
+        self.assertFalse(failed.restored)
+        self.assertIn("No such file", failed.error)
+        plugin.test_object_serialization(
+            stressng_schema.HygieneReport(settings=settings.settings)
+        )
+
+    @mock.patch("stressng_plugin.settle_interval", 0)
+    def test_settle_host(self):
+        conditions = stressng_schema.SettleConditions
+        settle = stressng_schema.SettleParams(
+            baseline=conditions(
+                package_temperature=40.0, cpu_frequency=2000.0, load_average=0.2
+            )
+        )
+        self.assertTrue(
+            stressng_plugin.is_settled(
+                conditions(44.0, 1950.0, 0.6), settle.baseline, settle
+            )
+        )
+        self.assertTrue(
+            stressng_plugin.is_settled(conditions(), settle.baseline, settle)
+        )
+        for hot in (
+            conditions(package_temperature=46.0),
+            conditions(cpu_frequency=1800.0),
+            conditions(load_average=0.8),
+        ):
+            self.assertFalse(stressng_plugin.is_settled(hot, settle.baseline, settle))
+
+        cooling = [conditions(60.0), conditions(50.0), conditions(42.0)]
+        with mock.patch("stressng_plugin.settle_conditions", side_effect=cooling):
+            report = stressng_plugin.settle_host(settle)
+        self.assertTrue(report.settled)
+        self.assertEqual(report.start.package_temperature, 42.0)
+
+        settle.max_wait = 0
+        with mock.patch(
+            "stressng_plugin.settle_conditions", return_value=conditions(60.0)
+        ):
+            report = stressng_plugin.settle_host(settle)
+        self.assertFalse(report.settled)
+        plugin.test_object_serialization(report)
+
+        # Without a baseline, a host still hot from the previous step waits
+        # for the absolute idle conditions rather than passing at once
+        settle = stressng_schema.SettleParams()
+        hot = [conditions(70.0, 2000.0, 4.0)] * 3 + [conditions(48.0, 1200.0, 0.3)]
+        with mock.patch("stressng_plugin.settle_conditions", side_effect=hot):
+            report = stressng_plugin.settle_host(settle)
+        self.assertTrue(report.settled)
+        self.assertEqual(report.baseline, conditions(45.0, None, 0.0))
+        self.assertEqual(report.start.package_temperature, 48.0)
+
+    def test_settle_after_hygiene(self):
+        # The performance governor raises the idle frequency; the gate runs
+        # after the hygiene settings and settles on the cool, idle host
+        steps = []
+        conditions = stressng_schema.SettleConditions(40.0, 3500.0, 0.1)
+
+        def apply_hygiene(*_):
+            steps.append("hygiene")
+            return stressng_schema.HygieneReport(settings=[])
+
+        def settle_conditions():
+            steps.append("settle")
+            return conditions
+
+        stress = stressng_schema.StressNGParams(
+            timeout=1,
+            stressors=[
+                stressng_schema.CpuStressorParams(
+                    stressor=stressng_schema.Stressors.CPU, workers=1
+                )
+            ],
+            hygiene=stressng_schema.HygieneParams(governor="performance"),
+            settle=stressng_schema.SettleParams(max_wait=0),
+        )
+        with mock.patch(
+            "stressng_plugin.apply_hygiene", side_effect=apply_hygiene
+        ), mock.patch(
+            "stressng_plugin.settle_conditions", side_effect=settle_conditions
+        ):
+            output_id, output = stressng_plugin.stressng_run(self.id(), stress)
+        self.assertEqual(output_id, "success")
+        self.assertEqual(steps[0], "hygiene")
+        self.assertTrue(output.settle.settled)
+        self.assertIsNone(output.settle.baseline.cpu_frequency)
+
+    def test_confidence_interval(self):
+        self.assertAlmostEqual(stressng_stats.student_t_quantile(0.975, 1), 12.7062, 4)
+        self.assertAlmostEqual(stressng_stats.student_t_quantile(0.975, 5), 2.5706, 4)
+        mean, low, high = stressng_stats.confidence_interval([1, 2, 3, 4], 0.95)
+        self.assertEqual(mean, 2.5)
+        self.assertAlmostEqual(high - mean, 2.0543, 4)
+        self.assertEqual(
+            stressng_stats.confidence_interval([3.0], 0.95), (3.0, None, None)
+        )
+
+    def test_tunables(self):
+        self.assertEqual(
+            stressng_plugin.tunable_path("vm.swappiness"), "/proc/sys/vm/swappiness"
+        )
+        with self.assertRaises(ValueError):
+            stressng_plugin.tunable_path("/proc/sys/../../etc/passwd")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            swappiness = os.path.join(tmpdir, "swappiness")
+            with open(swappiness, "w") as setting:
+                setting.write("60\n")
+
+            def run_workload(params):
+                # The throughput follows the knob set for the run
+                rate = int(stressng_host.read_setting(swappiness))
+                return "success", stressng_plugin.build_results(
+                    params,
+                    {
+                        "system-info": system_info_sample,
+                        "metrics": [metric_sample("cpu", rate * 5)],
+                    },
+                )
+
+            with mock.patch("stressng_plugin.run_workload", run_workload), mock.patch(
+                "stressng_plugin.tunable_path", lambda knob: knob
+            ):
+                output_id, output = stressng_plugin.stressng_tunables(
+                    self.id(),
+                    stressng_schema.TunablesParams(
+                        workload=stressng_schema.StressNGParams(
+                            timeout=1,
+                            stressors=[
+                                stressng_schema.CpuStressorParams(
+                                    stressor=stressng_schema.Stressors.CPU, workers=1
+                                )
+                            ],
+                        ),
+                        tunables=[
+                            stressng_schema.Tunable(
+                                knob=swappiness, values=["10", "100"]
+                            )
+                        ],
+                        seed=1,
+                    ),
+                )
+            self.assertEqual(stressng_host.read_setting(swappiness), "60")
+        self.assertEqual(output_id, "success")
+        self.assertEqual(sorted(output.run_order), [0, 0, 0, 1, 1, 1])
+        low, high = output.comparisons
+        self.assertEqual((low.value, low.metrics[0].mean), ("10", 10.0))
+        self.assertEqual((high.value, high.metrics[0].mean), ("100", 100.0))
+        self.assertEqual(output.combinations[1].metrics[0].samples, 3)
+        plugin.test_object_serialization(output)
+
+    def test_batch(self):
+        workloads = [
+            stressng_schema.StressNGParams(
+                timeout=timeout,
+                stressors=[
+                    stressng_schema.CpuStressorParams(
+                        stressor=stressng_schema.Stressors.CPU, workers=1
+                    )
+                ],
+            )
+            for timeout in (1, 2, 3)
+        ]
+
+        def run_workload(params):
+            stressng_host.online_cpus()
+            if params.timeout == 2:
+                return "error", stressng_schema.WorkloadError("stress-ng failed")
+            if params.timeout == 3:
+                raise OSError("no space left")
+            return "success", stressng_plugin.build_results(
+                params,
+                {"system-info": system_info_sample, "metrics": [metric_sample("cpu")]},
+            )
+
+        with mock.patch("stressng_plugin.run_workload", run_workload), mock.patch(
+            "os.cpu_count", return_value=3
+        ), mock.patch("builtins.open", side_effect=OSError) as probe:
+            output_id, output = stressng_plugin.stressng_batch(
+                self.id(), stressng_schema.BatchParams(workloads=workloads)
+            )
+        # The online CPUs were only probed for the first workload
+        self.assertEqual(probe.call_count, 1)
+        self.assertEqual(output_id, "success")
+        self.assertEqual(output.failed, 2)
+        self.assertEqual(output.entries[0].results.cpuinfo.stressor, "cpu")
+        self.assertEqual(output.entries[1].error.error, "stress-ng failed")
+        self.assertEqual(output.entries[2].error.error, "OSError: no space left")
+        self.assertIsNone(stressng_host._probe_cache)
+
+    def test_extra_metrics(self):
+        matrix = metric_sample("matrix")
+        matrix.update(
+            {
+                "add-matrix-ops-per-sec": 10.5,
+                "lu-matrix-ops-per-sec": 7,
+                "miscellaneous-note": "not a number",
+            }
+        )
+        hdd = metric_sample("hdd")
+        hdd["mbsec-write-rate"] = 50.0
+        results = stressng_plugin.build_results(
+            stressng_schema.StressNGParams(timeout=5, stressors=[]),
+            {"system-info": system_info_sample, "metrics": [matrix, hdd]},
+        )
+        self.assertEqual(results.matrixinfo.add_matrix_ops_per_sec, 10.5)
+        self.assertEqual(
+            results.matrixinfo.extra_metrics, {"lu-matrix-ops-per-sec": 7.0}
+        )
+        # stress-ng only reports the rates of the kinds of I/O that were done
+        self.assertIsNone(results.hddinfo.mbsec_read_rate)
+        self.assertEqual(results.hddinfo.mbsec_write_rate, 50.0)
+        self.assertIsNone(results.hddinfo.extra_metrics)
+
+        serialized = plugin.build_object_schema(
+            stressng_schema.WorkloadResults
+        ).serialize(results)
+        self.assertEqual(
+            serialized["matrixinfo"]["extra-metrics"], {"lu-matrix-ops-per-sec": 7.0}
+        )
+
+    def test_results_store(self):
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir)
+        store = os.path.join(workdir, "results.db")
+        stress = stressng_schema.StressNGParams(
+            timeout=5,
+            stressors=[
+                stressng_schema.CpuStressorParams(
+                    stressor=stressng_schema.Stressors.CPU, workers=1
+                )
+            ],
+        )
+        # The last run is on the same host in a container of another name
+        for epoch, hostname, cpus, bogo_ops in (
+            (300, "testhost", 4, 1200),
+            (100, "testhost", 4, 1000),
+            (200, "testhost", 4, 1100),
+            (250, "otherhost", 16, 5000),
+            (400, "3f2a9c0d1e7b", 4, 1300),
+        ):
+            cpu = metric_sample("cpu", bogo_ops)
+            cpu["fft-ops-per-sec"] = 3
+            results = stressng_plugin.build_results(
+                stress,
+                {
+                    "system-info": dict(
+                        system_info_sample,
+                        hostname=hostname,
+                        cpus=cpus,
+                        **{"epoch-secs": epoch},
+                    ),
+                    "metrics": [cpu],
+                },
+            )
+            stressng_store.store_results(store, results, stress)
+
+        output_id, output = stressng_plugin.stressng_trend_query(
+            self.id(),
+            stressng_schema.TrendQueryParams(
+                store=store,
+                stressor=stressng_schema.Stressors.CPU,
+                metric="bogo-ops",
+                hostname="testhost",
+                baseline_window=2,
+            ),
+        )
+        self.assertEqual(output_id, "success")
+        self.assertEqual([p.epoch for p in output.points], [100, 200, 300])
+        self.assertEqual([p.value for p in output.points], [1000, 1100, 1200])
+        self.assertEqual([p.baseline for p in output.points], [None, 1000, 1050])
+        self.assertAlmostEqual(output.points[2].deviation, 100 * 150 / 1050)
+        self.assertEqual(len({p.config_hash for p in output.points}), 1)
+
+        # The baseline of a run only covers the runs of its host and jobfile
+        output_id, output = stressng_plugin.stressng_trend_query(
+            self.id(),
+            stressng_schema.TrendQueryParams(
+                store=store,
+                stressor=stressng_schema.Stressors.CPU,
+                metric="bogo-ops",
+                baseline_window=2,
+            ),
+        )
+        self.assertEqual([p.epoch for p in output.points], [100, 200, 250, 300, 400])
+        self.assertEqual(
+            [p.baseline for p in output.points], [None, 1000, None, 1050, 1150]
+        )
+        self.assertEqual(output.points[4].hostname, "3f2a9c0d1e7b")
+        self.assertEqual(
+            output.points[4].host_fingerprint, output.points[0].host_fingerprint
+        )
+
+        # Extra metrics are stored under their stress-ng names
+        output_id, output = stressng_plugin.stressng_trend_query(
+            self.id(),
+            stressng_schema.TrendQueryParams(
+                store=store,
+                stressor=stressng_schema.Stressors.CPU,
+                metric="fft-ops-per-sec",
+                since=200,
+                until=250,
+            ),
+        )
+        self.assertEqual([p.hostname for p in output.points], ["testhost", "otherhost"])
+        self.assertEqual([p.value for p in output.points], [3, 3])
+
+        output_id, output = stressng_plugin.stressng_trend_query(
+            self.id(),
+            stressng_schema.TrendQueryParams(
+                store=os.path.join(workdir, "missing.db"),
+                stressor=stressng_schema.Stressors.CPU,
+            ),
+        )
+        self.assertEqual(output_id, "error")
+
+    def test_results_store_paced(self):
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir)
+        store = os.path.join(workdir, "results.db")
+        stress = stressng_schema.StressNGParams(
+            timeout=1,
+            stressors=[
+                stressng_schema.CpuStressorParams(
+                    stressor=stressng_schema.Stressors.CPU,
+                    workers=1,
+                    target_ops_per_second=250.0,
+                )
+            ],
+            pacing_calibration=1,
+            results_store=store,
+        )
+        loads = []
+        for rate in ("1000", "500"):
+            with mock.patch.dict(os.environ, {"FAKE_STRESSNG_RATE": rate}):
+                output_id, output = stressng_plugin.stressng_run(self.id(), stress)
+            self.assertEqual(output_id, "success")
+            loads.append(output.test_config.stressors[0].cpu_load)
+        # The calibrated cpu loads differ, the stored configuration does not
+        self.assertEqual(loads, [25, 50])
+        output_id, output = stressng_plugin.stressng_trend_query(
+            self.id(),
+            stressng_schema.TrendQueryParams(
+                store=store, stressor=stressng_schema.Stressors.CPU
+            ),
+        )
+        self.assertEqual(len(output.points), 2)
+        self.assertEqual(
+            {p.config_hash for p in output.points},
+            {stressng_store.config_hash(stress)},
+        )
+
+    def test_change_points(self):
+        rng = random.Random(0)
+        series = [100 + rng.gauss(0, 1) for _ in range(30)]
+        series += [90 + rng.gauss(0, 1) for _ in range(20)]
+        series += [95 + rng.gauss(0, 1) for _ in range(30)]
+        found = stressng_stats.change_points(series, 200, 0.05, 5, rng)
+        self.assertEqual([index for index, _ in found], [30, 50])
+        self.assertTrue(all(p_value <= 0.05 for _, p_value in found))
+        self.assertEqual(
+            stressng_stats.change_points(
+                [100 + rng.gauss(0, 1) for _ in range(50)], 200, 0.05, 5, rng
+            ),
+            [],
+        )
+        self.assertEqual(
+            stressng_stats.change_points([5.0] * 20, 200, 0.05, 5, rng), []
+        )
+
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir)
+        store = os.path.join(workdir, "results.db")
+        stress = stressng_schema.StressNGParams(timeout=5, stressors=[])
+        for run in range(40):
+            cpu = metric_sample("cpu", 1000 if run < 25 else 800)
+            cpu["bogo-ops-per-second-real-time"] += rng.gauss(0, 2)
+            cpu["fft-ops-per-sec"] = 50.0 + run % 2
+            results = stressng_plugin.build_results(
+                stress,
+                {
+                    "system-info": dict(system_info_sample, **{"epoch-secs": run}),
+                    "metrics": [cpu],
+                },
+            )
+            stressng_store.store_results(store, results, stress)
+        # A slower host next to it is a series of its own, not a shift
+        for run in range(10):
+            results = stressng_plugin.build_results(
+                stress,
+                {
+                    "system-info": dict(
+                        system_info_sample,
+                        hostname="otherhost",
+                        cpus=16,
+                        **{"epoch-secs": 20 + run},
+                    ),
+                    "metrics": [metric_sample("cpu", 500)],
+                },
+            )
+            stressng_store.store_results(store, results, stress)
+        output_id, output = stressng_plugin.stressng_change_points(
+            self.id(),
+            stressng_schema.ChangePointParams(
+                store=store, stressor=stressng_schema.Stressors.CPU, seed=1
+            ),
+        )
+        self.assertEqual(output_id, "success")
+        self.assertEqual(
+            sorted((s.metric, s.hostname, s.runs) for s in output.series),
+            [
+                ("bogo-ops-per-second-real-time", "otherhost", 10),
+                ("bogo-ops-per-second-real-time", "testhost", 40),
+                ("fft-ops-per-sec", "testhost", 40),
+            ],
+        )
+        other = [s for s in output.series if s.hostname == "otherhost"]
+        self.assertEqual(other[0].change_points, [])
+        output_id, output = stressng_plugin.stressng_change_points(
+            self.id(),
+            stressng_schema.ChangePointParams(
+                store=store,
+                stressor=stressng_schema.Stressors.CPU,
+                hostname="testhost",
+                seed=1,
+            ),
+        )
+        self.assertEqual(
+            [s.metric for s in output.series],
+            ["bogo-ops-per-second-real-time", "fft-ops-per-sec"],
+        )
+        throughput, fft = output.series
+        self.assertEqual(throughput.runs, 40)
+        self.assertNotEqual(throughput.host_fingerprint, other[0].host_fingerprint)
+        self.assertEqual(throughput.config_hash, other[0].config_hash)
+        self.assertEqual(len(throughput.change_points), 1)
+        change = throughput.change_points[0]
+        self.assertEqual((change.index, change.epoch), (25, 25))
+        self.assertAlmostEqual(change.shift, -40, delta=3)
+        self.assertAlmostEqual(change.shift_percent, -20, delta=1)
+        self.assertEqual(fft.change_points, [])
+
+    def test_binary_capabilities(self):
+        stress = stressng_schema.StressNGParams(
+            timeout=1,
+            stressors=[
+                stressng_schema.CpuStressorParams(
+                    stressor=stressng_schema.Stressors.CPU,
+                    workers=1,
+                    cpu_method=stressng_schema.CpuMethod.FFT,
+                ),
+                stressng_schema.MmapStressorParams(
+                    stressor=stressng_schema.Stressors.MMAP,
+                    workers=1,
+                    mmap_osync=True,
+                ),
+            ],
+            stressng_binary=fake_binary,
+        )
+        stressng_plugin._probe_binary.cache_clear()
+        self.addCleanup(stressng_plugin._probe_binary.cache_clear)
+        with mock.patch.dict(
+            os.environ, {"FAKE_STRESSNG_UNSUPPORTED": "mmap,mmap-osync,fft"}
+        ):
+            jobfile, unsupported = stressng_plugin.render_supported_jobfile(
+                stress, fake_binary
+            )
+            problems = stressng_plugin.unsupported_stressors(stress, fake_binary)
+            problems += stressng_plugin.unsupported_methods(stress, fake_binary)
+        self.assertEqual(unsupported, ["mmap-osync"])
+        self.assertEqual(jobfile, "timeout 1\ncpu 1\ncpu-method fft\nmmap 1\n")
+        self.assertEqual(
+            problems,
+            [
+                f"{fake_binary} (version 0.17.01) does not support the mmap stressor",
+                f"{fake_binary} (version 0.17.01) does not support the fft method "
+                "of the cpu stressor",
+            ],
+        )
+
+        # The probes are cached, so the environment no longer matters
+        jobfile, unsupported = stressng_plugin.render_supported_jobfile(
+            stress, fake_binary
+        )
+        self.assertEqual(len(unsupported), 1)
+        # An unsupported method fails the run and the plan
+        stress.stressors.pop()
+        for step in (stressng_plugin.stressng_run, stressng_plugin.stressng_plan):
+            output_id, output = step(self.id(), stress)
+            self.assertEqual(output_id, "error")
+            self.assertIn("does not support the fft method", output.error)
+        stressng_plugin._probe_binary.cache_clear()
+
+        stress.stressors[0].cpu_method = stressng_schema.CpuMethod.ALL
+        output_id, output = stressng_plugin.stressng_run(self.id(), stress)
+        self.assertEqual(output_id, "success")
+        self.assertEqual(output.binary.path, fake_binary)
+        self.assertEqual(output.binary.version, "0.17.01")
+        self.assertIsNone(output.binary.unsupported_options)
+
+        stress.stressng_binary = "/nonexistent/stress-ng"
+        self.assertEqual(
+            stressng_plugin.render_supported_jobfile(stress, stress.stressng_binary),
+            (stress.render_jobfile(), []),
+        )
+
+    @mock.patch("os.sched_getaffinity", return_value=set(range(16)))
+    @mock.patch("stressng_host.cgroup_cpuset", return_value=list(range(8)))
+    @mock.patch("stressng_host.cgroup_cpu_quota", return_value=2.5)
+    def test_apply_worker_policy(self, *_):
+        stress = stressng_schema.StressNGParams(
+            timeout=test_time,
+            stressors=[
+                stressng_schema.CpuStressorParams(
+                    stressor=stressng_schema.Stressors.CPU, workers=0
+                ),
+                stressng_schema.MqStressorParams(
+                    stressor=stressng_schema.Stressors.MQ, workers=1
+                ),
+            ],
+        )
+        params, budget = stressng_plugin.apply_worker_policy(stress)
+        self.assertIs(params, stress)
+        self.assertIsNone(budget.resolved_workers)
+        self.assertEqual(budget.cpuset, "0-7")
+
+        stress.worker_policy = stressng_schema.WorkerPolicy.AUTO
+        params, budget = stressng_plugin.apply_worker_policy(stress)
+        self.assertEqual([s.workers for s in params.stressors], [3, 1])
+        self.assertEqual(stress.stressors[0].workers, 0)
+
+        stress.taskset = "6-11"
+        params, budget = stressng_plugin.apply_worker_policy(stress)
+        self.assertEqual(budget.resolved_workers, 2)
+
     def test_functional_cpu(self):
         # idea is to run a small cpu bound benchmark and
         # compare its output with a known-good output
@@ -375,6 +1506,34 @@ class StressNGTest(unittest.TestCase):
         self.assertEqual(res[1].sockinfo.stressor, "sock")
         self.assertGreaterEqual(math.ceil(res[1].sockinfo.wall_clock_time), test_time)
 
+    def test_functional_cyclic(self):
+        cyclic = stressng_schema.CyclicStressorParams(
+            stressor="cyclic",
+            workers=1,
+            cyclic_method=stressng_schema.CyclicMethod.CLOCK_NS,
+            cyclic_policy=stressng_schema.CyclicPolicy.RR,
+            cyclic_sleep=20000,
+        )
+
+        stress = stressng_schema.StressNGParams(timeout=test_time, stressors=[cyclic])
+
+        reference_jobfile = "tests/reference_jobfile_cyclic"
+
+        result = stress.to_jobfile()
+
+        for item in stress.stressors:
+            result = result + item.to_jobfile()
+
+        with open(reference_jobfile, "r") as file:
+            reference = yaml.safe_load(file)
+
+        self.assertEqual(yaml.safe_load(result), reference)
+        res = stressng_plugin.stressng_run(self.id(), stress)
+        print(res)
+        self.assertIn("success", res)
+        self.assertEqual(res[1].cyclicinfo.stressor, "cyclic")
+        self.assertIn("99.00", res[1].cyclicinfo.latency_percentiles)
+
 
 if __name__ == "__main__":
     unittest.main()